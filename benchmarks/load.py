@@ -0,0 +1,251 @@
+# Teste de carga do /predict com curvas de throughput x latência por nível de concorrência.
+#
+# Para cada nível de LOAD_CONCURRENCY, N clientes (threads, cada um com sua sessão HTTP
+# keep-alive) disparam POST /predict em laço fechado durante LOAD_DURATION_S segundos,
+# com job_id sorteado entre as vagas carregadas. Por nível: requisições/s, p50/p95/p99 e
+# taxa de erro (status != 200 ou falha de conexão). O nível de saturação é o primeiro em
+# que o throughput deixa de crescer pelo menos LOAD_SATURATION_GAIN (padrão 10%).
+#
+# Alvos:
+#   - LOAD_URL definido (ex.: http://localhost:8000): dispara contra uma instância já no ar
+#     (gunicorn/docker compose carregado com a base sintética); LOAD_JOBS=<vagas.json> dá os ids.
+#   - sem LOAD_URL: sobe a aplicação no próprio processo (servidor WSGI com threads) com os
+#     substitutos locais de benchmarks/stubs.py (fakeredis ou BENCH_REDIS_URL, ChromaDB em
+#     memória, stub do MLflow) e o provedor de embeddings local (EMBEDDING_PROVIDER=local),
+#     carregando a base de SYNTH_DIR (gerada antes por benchmarks/synthetic.py, se faltar).
+#     O backend vetorial padrão é o índice local (VECTOR_BACKEND=local), montado direto do
+#     snapshot; com VECTOR_BACKEND=chroma o snapshot é importado no ChromaDB em memória.
+#
+# Uso:  python -m benchmarks.load
+#
+# Variáveis de ambiente:
+#   - LOAD_CONCURRENCY (padrão "1,2,4,8,16,32"), LOAD_DURATION_S (padrão 10), LOAD_WARMUP_S (padrão 2)
+#   - LOAD_K (padrão 10), LOAD_TIMEOUT_S (padrão 30)
+#   - LOAD_FILTER_AREA (padrão false): envia filter_area=true (busca restrita à área da vaga)
+#   - LOAD_MODE (padrão vector): `mode` do /predict; com hybrid a aplicação local também
+#     monta o índice léxico BM25 (em SYNTH_DIR/index/lexical)
+#   - LOAD_OUT (padrão load_report.json)
+#   - SYNTH_DIR, SYNTH_CANDIDATOS, SYNTH_VAGAS, SYNTH_DIM (ver benchmarks/synthetic.py)
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks import stubs, synthetic
+from src.services.json_stream import iter_json_object
+
+
+def _ids_vagas(path: str) -> List[str]:
+    with open(path, "rb") as f:
+        return [vaga_id for vaga_id, _ in iter_json_object(f)]
+
+
+def _percentis(lat_ms: Sequence[float]) -> Dict[str, float]:
+    if not lat_ms:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "media_ms": None}
+    a = np.asarray(lat_ms)
+    p50, p95, p99 = np.percentile(a, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "media_ms": round(float(a.mean()), 2),
+    }
+
+
+def nivel(url: str, jobs: Sequence[str], concorrencia: int, duracao_s: float,
+          aquecimento_s: float = 0.0, k: int = 10, timeout_s: float = 30.0, seed: int = 0,
+          filtro_area: bool = False, modo: str = "vector") -> Dict:
+    """
+    Roda `concorrencia` clientes em laço fechado por `aquecimento_s + duracao_s` segundos.
+    Só as requisições iniciadas depois do aquecimento entram nas estatísticas.
+    """
+    inicio = time.monotonic()
+    medir_de = inicio + aquecimento_s
+    fim = medir_de + duracao_s
+    lat: List[List[float]] = [[] for _ in range(concorrencia)]
+    erros = [0] * concorrencia
+    status: List[Dict[str, int]] = [{} for _ in range(concorrencia)]
+
+    def cliente(c: int) -> None:
+        rng = np.random.default_rng(seed + c)
+        s = requests.Session()
+        s.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        while True:
+            t0 = time.monotonic()
+            if t0 >= fim:
+                break
+            body = {"job_id": jobs[int(rng.integers(len(jobs)))], "k": k, "filter_area": filtro_area, "mode": modo}
+            try:
+                r = s.post(f"{url}/predict", json=body, timeout=timeout_s)
+                r.content  # lê o corpo inteiro, como um cliente real
+                codigo = str(r.status_code)
+            except requests.RequestException as e:
+                codigo = type(e).__name__
+            t1 = time.monotonic()
+            if t0 < medir_de:
+                continue
+            lat[c].append((t1 - t0) * 1000)
+            status[c][codigo] = status[c].get(codigo, 0) + 1
+            if codigo != "200":
+                erros[c] += 1
+        s.close()
+
+    threads = [threading.Thread(target=cliente, args=(c,), daemon=True) for c in range(concorrencia)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    todas = [x for l in lat for x in l]
+    total = len(todas)
+    por_status: Dict[str, int] = {}
+    for d in status:
+        for codigo, n in d.items():
+            por_status[codigo] = por_status.get(codigo, 0) + n
+    return {
+        "concorrencia": concorrencia,
+        "requisicoes": total,
+        "throughput_rps": round(total / duracao_s, 2),
+        **_percentis(todas),
+        "taxa_erro": round(sum(erros) / total, 4) if total else None,
+        "status": por_status,
+    }
+
+
+def _saturacao(niveis: List[Dict], ganho: float) -> Optional[int]:
+    for ant, atual in zip(niveis, niveis[1:]):
+        if atual["throughput_rps"] < ant["throughput_rps"] * (1 + ganho):
+            return ant["concorrencia"]
+    return None
+
+
+# ---------- aplicação local com substitutos ----------
+def _preparar_base(synth_dir: str) -> Dict:
+    """Gera a base sintética se faltar e devolve os caminhos (mesmas chaves de synthetic.generate)."""
+    dim = int(os.getenv("SYNTH_DIM") or os.getenv("LOCAL_EMBED_DIM", 3072))
+    base = {
+        "vagas": os.path.join(synth_dir, "vagas.json"),
+        "applicants": os.path.join(synth_dir, "applicants.json"),
+        "snapshot": os.path.join(synth_dir, f"candidates_dim{dim}"),
+        "dim": dim,
+    }
+    if not all(os.path.exists(p) for p in (base["vagas"], base["applicants"], base["snapshot"] + ".npy")):
+        print(f"[LOAD] Gerando base sintética em '{synth_dir}' ...")
+        base = synthetic.generate(
+            out_dir=synth_dir,
+            n_candidatos=int(os.getenv("SYNTH_CANDIDATOS", 100_000)),
+            n_vagas=int(os.getenv("SYNTH_VAGAS", 1000)),
+            dim=dim,
+        )
+    return base
+
+
+def iniciar_app_local(synth_dir: str, mlflow_url: str, lexico: bool = False):
+    """
+    Carrega a base sintética nos substitutos locais e sobe a aplicação numa thread
+    (com `lexico`, monta também o índice BM25 do modo híbrido).
+    Retorna (url, servidor, resumo da carga).
+    """
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # sem uma linha de log por requisição
+    base = _preparar_base(synth_dir)
+    stubs.use_local_redis()
+    stubs.use_memory_chroma()
+    os.environ["MLFLOW_URL"] = mlflow_url
+    os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+    os.environ["LOCAL_EMBED_DIM"] = str(base["dim"])
+    os.environ.setdefault("VECTOR_BACKEND", "local")
+    os.environ.setdefault("LOCAL_INDEX_DIR", os.path.join(synth_dir, "index"))
+    os.environ.setdefault("LEXICAL_INDEX_DIR", os.path.join(synth_dir, "index", "lexical"))
+
+    from src import create_app
+    from src.services.Data import Data
+
+    t0 = time.monotonic()
+    dados = Data()
+    with open(base["vagas"], "rb") as f:
+        dados.load_vagas(f)
+    with open(base["applicants"], "rb") as f:
+        dados.load_applicants(f)
+
+    backend = os.environ["VECTOR_BACKEND"].strip().lower()
+    if backend == "chroma":
+        from scripts.import_data import import_collection_npy
+        import_collection_npy(base["dim"], base["snapshot"], batch=5000, skip_if_present=False)
+    else:
+        from src.services.local_index import LocalVectorIndex
+        LocalVectorIndex().build_from_snapshot(base["snapshot"])
+        if backend == "ivfpq":
+            from src.services.ivfpq_index import IVFPQIndex
+            IVFPQIndex().build(base["dim"])
+    if lexico:
+        from scripts.build_lexical_index import build_lexical_index
+        build_lexical_index(rebuild=True)
+    carga_s = time.monotonic() - t0
+
+    app = create_app("config.ProductionConfig")
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name="load-app", daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}"
+    return url, servidor, {"backend": backend, "dim": base["dim"], "carga_segundos": round(carga_s, 1),
+                           "vagas": base["vagas"], "applicants": base["applicants"]}
+
+
+def run(concorrencias: Sequence[int], duracao_s: float, aquecimento_s: float, k: int, timeout_s: float,
+        url: Optional[str] = None, jobs_path: Optional[str] = None, synth_dir: str = "database/synthetic",
+        ganho_saturacao: float = 0.1, filtro_area: bool = False, modo: str = "vector") -> Dict:
+    relatorio: Dict = {"alvo": url or "local", "k": k, "duracao_s": duracao_s, "filtro_area": filtro_area,
+                       "modo": modo, "niveis": []}
+
+    with stubs.MLflowStub() as mlflow:
+        servidor = None
+        if url:
+            jobs = _ids_vagas(jobs_path or os.path.join(synth_dir, "vagas.json"))
+        else:
+            url, servidor, relatorio["app"] = iniciar_app_local(synth_dir, mlflow.url, lexico=modo == "hybrid")
+            jobs = _ids_vagas(relatorio["app"]["vagas"])
+
+        try:
+            for c in concorrencias:
+                r = nivel(url, jobs, c, duracao_s, aquecimento_s, k=k, timeout_s=timeout_s,
+                          filtro_area=filtro_area, modo=modo)
+                relatorio["niveis"].append(r)
+                print(f"[LOAD] c={c:3d} {r['throughput_rps']:8.1f} req/s  p50={r['p50_ms']}ms "
+                      f"p95={r['p95_ms']}ms p99={r['p99_ms']}ms erros={r['taxa_erro']}")
+        finally:
+            if servidor is not None:
+                servidor.shutdown()
+                # drena a fila do Log do app para o stub antes de ele ser encerrado (o atexit chegaria tarde)
+                from src.services.log import Log
+                Log(mlflow_url=mlflow.url).flusher.close()
+
+    relatorio["saturacao_concorrencia"] = _saturacao(relatorio["niveis"], ganho_saturacao)
+    return relatorio
+
+
+if __name__ == "__main__":
+    relatorio = run(
+        concorrencias=[int(c) for c in os.getenv("LOAD_CONCURRENCY", "1,2,4,8,16,32").split(",") if c.strip()],
+        duracao_s=float(os.getenv("LOAD_DURATION_S", 10)),
+        aquecimento_s=float(os.getenv("LOAD_WARMUP_S", 2)),
+        k=int(os.getenv("LOAD_K", 10)),
+        timeout_s=float(os.getenv("LOAD_TIMEOUT_S", 30)),
+        url=os.getenv("LOAD_URL") or None,
+        jobs_path=os.getenv("LOAD_JOBS") or None,
+        synth_dir=os.getenv("SYNTH_DIR", "database/synthetic"),
+        ganho_saturacao=float(os.getenv("LOAD_SATURATION_GAIN", 0.1)),
+        filtro_area=os.getenv("LOAD_FILTER_AREA", "false").lower() == "true",
+        modo=os.getenv("LOAD_MODE", "vector").strip().lower(),
+    )
+    out_path = os.getenv("LOAD_OUT", "load_report.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"[DONE] Relatório em '{out_path}' (saturação em c={relatorio['saturacao_concorrencia']}).")
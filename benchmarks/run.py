@@ -0,0 +1,266 @@
+# Micro-benchmarks dos componentes do caminho de recuperação, cada um isolado e contra
+# substitutos locais (benchmarks/stubs.py): Redis local ou fakeredis, ChromaDB em memória e
+# um servidor stub do MLflow. Nenhuma chamada sai da máquina.
+#
+# Para cada componente mede a latência por chamada (p50/p95/média, sem tracemalloc ligado)
+# e, numa segunda rodada com tracemalloc, o pico de memória alocada por chamada e o que
+# ficou retido ao final. O resultado é um JSON (BENCH_OUT); com BENCH_BASELINE, compara
+# com um resultado anterior e sai com código 1 se algum componente regrediu além de
+# BENCH_TOLERANCE.
+#
+# Uso:  python -m benchmarks.run
+#
+# Variáveis de ambiente:
+#   - BENCH_OUT (padrão benchmarks/results.json)
+#   - BENCH_BASELINE: JSON de uma execução anterior para comparação (opcional)
+#   - BENCH_TOLERANCE (padrão 0.25): piora relativa aceita em p50, p95 e pico de memória
+#   - BENCH_N (padrão 2000): vagas, perfis e vetores na base sintética
+#   - BENCH_DIM (padrão 768): dimensão dos embeddings
+#   - BENCH_ITER (padrão 200): chamadas medidas por componente (import/export: BENCH_ITER_IO, padrão 5)
+#   - BENCH_ONLY: lista separada por vírgula de prefixos de componentes a rodar (ex.: "data,log")
+#   - BENCH_REDIS_URL: Redis local em vez do fakeredis (ver stubs.use_local_redis)
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import stubs
+
+# Métricas comparadas com o baseline e a folga absoluta abaixo da qual a diferença é ruído
+_COMPARADAS = {"p50_ms": 0.05, "p95_ms": 0.1, "pico_kb": 4.0}
+
+
+def _percentis(lat_ms: List[float]) -> Dict[str, float]:
+    a = np.asarray(lat_ms)
+    return {
+        "p50_ms": round(float(np.percentile(a, 50)), 4),
+        "p95_ms": round(float(np.percentile(a, 95)), 4),
+        "media_ms": round(float(a.mean()), 4),
+    }
+
+
+def medir(fn: Callable[[int], object], iteracoes: int, aquecimento: int = 3) -> Dict[str, float]:
+    """
+    Roda `fn(i)` `iteracoes` vezes para a latência e mais `iteracoes` vezes sob tracemalloc:
+      - pico_kb: maior pico de alocação observado numa única chamada
+      - retido_b_por_chamada: memória que continuou alocada ao final, dividida pelas chamadas
+    """
+    for i in range(aquecimento):
+        fn(i)
+
+    lat = []
+    for i in range(iteracoes):
+        t0 = time.perf_counter()
+        fn(i)
+        lat.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    try:
+        inicio, _ = tracemalloc.get_traced_memory()
+        pico = 0
+        for i in range(iteracoes):
+            tracemalloc.reset_peak()
+            antes, _ = tracemalloc.get_traced_memory()
+            fn(i)
+            _, p = tracemalloc.get_traced_memory()
+            pico = max(pico, p - antes)
+        fim, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "chamadas": iteracoes,
+        **_percentis(lat),
+        "pico_kb": round(pico / 1024, 1),
+        "retido_b_por_chamada": round(max(0, fim - inicio) / iteracoes, 1),
+    }
+
+
+# ---------- base sintética ----------
+def _popular_redis(data, n: int, rng: np.random.Generator) -> None:
+    palavras = np.array("python java sql dados nuvem gestão projetos análise vendas suporte "
+                        "financeiro contábil logística marketing inglês espanhol sênior pleno júnior".split())
+    pipes = [data.redis_db0.pipeline(transaction=False),
+             data.redis_db1.pipeline(transaction=False),
+             data.redis_db2.pipeline(transaction=False),
+             data.redis_db3.pipeline(transaction=False)]
+    for i in range(n):
+        texto = " ".join(rng.choice(palavras, size=80))
+        pipes[0].set(str(i), "Tecnologia da Informação")
+        pipes[1].set(str(i), texto)
+        pipes[2].set(str(i), texto)
+        pipes[3].set(str(i), json.dumps({"nome": f"Candidato {i}"}, ensure_ascii=False))
+    for p in pipes:
+        p.execute()
+
+
+def _vetores(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    m = rng.standard_normal((n, dim), dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+# ---------- componentes ----------
+def bench_data(n: int, iteracoes: int, rng: np.random.Generator) -> Dict[str, Dict]:
+    from src.services.Data import Data
+
+    data = Data()
+    _popular_redis(data, n, rng)
+    vagas = [str(i) for i in rng.integers(0, n, size=iteracoes + 3)]
+    lotes = [[str(i) for i in rng.integers(0, n, size=10)] for _ in range(iteracoes + 3)]
+    return {
+        "data.get_vaga_descricao": medir(lambda i: data.get_vaga_descricao(vagas[i]), iteracoes),
+        "data.get_candidatos": medir(lambda i: data.get_candidatos(lotes[i]), iteracoes),
+    }
+
+
+def bench_chroma(n: int, dim: int, iteracoes: int, rng: np.random.Generator) -> Dict[str, Dict]:
+    from src.services.retrieve_data import ChromaDB
+
+    chroma = ChromaDB()
+    base = _vetores(n, dim, rng)
+    ids = [str(i) for i in range(n)]
+    for a in range(0, n, 1000):
+        chroma.upsert_embeddings(base[a:a + 1000], ids[a:a + 1000], dim=dim)
+
+    consultas = _vetores(iteracoes + 3, dim, rng)
+    lote = min(100, n)
+    novos = _vetores(lote, dim, rng)
+
+    def upsert(i: int) -> None:
+        # reescreve ids já existentes: mede o upsert sem crescer a coleção
+        a = (i * lote) % (n - lote + 1)
+        chroma.upsert_embeddings(novos, ids[a:a + lote], dim=dim)
+
+    return {
+        "chroma.query_similar_by_embedding": medir(
+            lambda i: chroma.query_similar_by_embedding(consultas[i], top_k=10, dim=dim), iteracoes),
+        "chroma.upsert_embeddings": medir(upsert, max(1, iteracoes // 10)),
+    }
+
+
+def bench_log(iteracoes: int, rng: np.random.Generator, mlflow_url: str) -> Dict[str, Dict]:
+    from src.services.log import Log
+
+    log = Log(mlflow_url=mlflow_url)
+    sims = rng.random((iteracoes + 3, 50)).tolist()
+    resultado = {"log.log": medir(lambda i: log.log(12.5, sims[i], k=50), iteracoes)}
+    # drena a fila para o stub antes de ele ser encerrado (o atexit do Log chegaria tarde)
+    log.flusher.close()
+    resultado["log.log"]["fila"] = log.queue_stats()
+    return resultado
+
+
+def bench_io(dim: int, iteracoes: int) -> Dict[str, Dict]:
+    from scripts.export_data import export_collection_jsonl, export_collection_npy
+    from scripts.import_data import import_collection_jsonl, import_collection_npy
+
+    resultado = {}
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        jsonl = os.path.join(tmp, "bench.jsonl")
+        prefixo = os.path.join(tmp, "bench")
+        resultado["export.jsonl"] = medir(lambda i: export_collection_jsonl(dim, jsonl), iteracoes, aquecimento=1)
+        resultado["export.npy"] = medir(lambda i: export_collection_npy(dim, prefixo), iteracoes, aquecimento=1)
+        resultado["import.jsonl"] = medir(
+            lambda i: import_collection_jsonl(dim, jsonl, batch=1000, skip_if_present=False), iteracoes, aquecimento=1)
+        resultado["import.npy"] = medir(
+            lambda i: import_collection_npy(dim, prefixo, batch=1000, skip_if_present=False), iteracoes, aquecimento=1)
+    return resultado
+
+
+# ---------- comparação ----------
+def comparar(atual: Dict[str, Dict], baseline: Dict[str, Dict], tolerancia: float) -> List[str]:
+    """Regressões de `atual` contra `baseline`: piora relativa > tolerancia e acima da folga absoluta."""
+    regressoes = []
+    for nome, r in atual.items():
+        b = baseline.get(nome)
+        if not b:
+            continue
+        for metrica, folga in _COMPARADAS.items():
+            if metrica not in r or metrica not in b:
+                continue
+            if r[metrica] > b[metrica] * (1 + tolerancia) and r[metrica] - b[metrica] > folga:
+                regressoes.append(f"{nome}.{metrica}: {b[metrica]} -> {r[metrica]}")
+    return regressoes
+
+
+def run(
+    n: int = 2000,
+    dim: int = 768,
+    iteracoes: int = 200,
+    iteracoes_io: int = 5,
+    only: Optional[List[str]] = None,
+    seed: int = 0,
+) -> Dict:
+    redis_backend = stubs.use_local_redis()
+    stubs.use_memory_chroma()
+    rng = np.random.default_rng(seed)
+
+    def ativo(prefixo: str) -> bool:
+        return not only or any(prefixo.startswith(o) or o.startswith(prefixo) for o in only)
+
+    resultados: Dict[str, Dict] = {}
+    with stubs.MLflowStub() as mlflow:
+        if ativo("data"):
+            resultados.update(bench_data(n, iteracoes, rng))
+        if ativo("chroma") or ativo("export") or ativo("import"):
+            resultados.update(bench_chroma(n, dim, iteracoes, rng))
+        if ativo("log"):
+            resultados.update(bench_log(iteracoes, rng, mlflow.url))
+        if ativo("export") or ativo("import"):
+            resultados.update(bench_io(dim, iteracoes_io))
+        mlflow_stats = mlflow.stats()
+
+    if only:
+        resultados = {k: v for k, v in resultados.items() if any(k.startswith(o) for o in only)}
+    return {
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "maquina": platform.machine(),
+            "redis": redis_backend,
+            "chroma": "memory",
+            "n": n,
+            "dim": dim,
+            "seed": seed,
+        },
+        "resultados": resultados,
+        "mlflow_stub": mlflow_stats,
+    }
+
+
+if __name__ == "__main__":
+    only = [o.strip() for o in os.getenv("BENCH_ONLY", "").split(",") if o.strip()]
+    relatorio = run(
+        n=int(os.getenv("BENCH_N", 2000)),
+        dim=int(os.getenv("BENCH_DIM", 768)),
+        iteracoes=int(os.getenv("BENCH_ITER", 200)),
+        iteracoes_io=int(os.getenv("BENCH_ITER_IO", 5)),
+        only=only or None,
+    )
+
+    baseline_path = os.getenv("BENCH_BASELINE")
+    regressoes = []
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        tolerancia = float(os.getenv("BENCH_TOLERANCE", 0.25))
+        regressoes = comparar(relatorio["resultados"], baseline.get("resultados", {}), tolerancia)
+        relatorio["baseline"] = {"arquivo": baseline_path, "tolerancia": tolerancia, "regressoes": regressoes}
+
+    out_path = os.getenv("BENCH_OUT", "benchmarks/results.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    for nome, r in relatorio["resultados"].items():
+        print(f"{nome:36s} p50={r['p50_ms']:.3f}ms p95={r['p95_ms']:.3f}ms pico={r['pico_kb']:.1f}KB")
+    for linha in regressoes:
+        print(f"[REGRESSÃO] {linha}")
+    sys.exit(1 if regressoes else 0)
@@ -0,0 +1,119 @@
+# Substitutos locais dos serviços externos para os benchmarks:
+# - MLflow: servidor HTTP em thread que responde aos endpoints usados por src/services/log.py
+# - Redis: BENCH_REDIS_URL (Redis local de verdade) ou fakeredis em memória
+# - ChromaDB: cliente em memória (CHROMA_URL=memory://)
+import json
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import redis
+
+
+class _MLflowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o MLflow atrás do pool de conexões do Log
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, obj: dict) -> None:
+        corpo = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        rota = urlparse(self.path).path
+        self.server.chamadas[rota] += 1
+        if rota.endswith("/experiments/get-by-name"):
+            return self._responder({"experiment": {"experiment_id": "1"}})
+        if rota.endswith("/metrics/get-history"):
+            return self._responder({"metrics": []})
+        self._responder({})
+
+    def do_POST(self):
+        rota = urlparse(self.path).path
+        tamanho = int(self.headers.get("Content-Length", 0))
+        corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        self.server.chamadas[rota] += 1
+        if rota.endswith("/experiments/create"):
+            return self._responder({"experiment_id": "1"})
+        if rota.endswith("/runs/create"):
+            self.server.runs += 1
+            return self._responder({"run": {"info": {"run_id": f"run-{self.server.runs}"}}})
+        if rota.endswith("/runs/log-batch"):
+            self.server.metricas += len(corpo.get("metrics", []))
+            return self._responder({})
+        if rota.endswith("/experiments/search"):
+            return self._responder({"experiments": [{"experiment_id": "1", "name": corpo.get("filter", "")}]})
+        if rota.endswith("/runs/search"):
+            return self._responder({"runs": []})
+        self._responder({})
+
+
+class MLflowStub:
+    """
+    Servidor HTTP mínimo com a API REST do MLflow usada pelo Log (127.0.0.1, porta livre).
+    Conta as chamadas por rota e as métricas recebidas em runs/log-batch.
+    """
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _MLflowHandler)
+        self._server.daemon_threads = True
+        self._server.chamadas = Counter()
+        self._server.runs = 0
+        self._server.metricas = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mlflow-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> Dict[str, int]:
+        return {"metricas": self._server.metricas, "runs": self._server.runs, **self._server.chamadas}
+
+    def __enter__(self) -> "MLflowStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def use_local_redis(url: Optional[str] = None, dbs: int = 5) -> str:
+    """
+    Aponta REDIS_URL_0..REDIS_URL_{dbs-1} para um Redis local.
+    Com BENCH_REDIS_URL (ex.: redis://localhost:6379) usa o servidor informado, um DB por
+    variável; sem ele, troca redis.from_url por clientes fakeredis que compartilham um
+    servidor em memória. Retorna "redis" ou "fakeredis".
+    """
+    url = (url or os.getenv("BENCH_REDIS_URL", "")).rstrip("/")
+    if url:
+        for db in range(dbs):
+            os.environ[f"REDIS_URL_{db}"] = f"{url}/{db}"
+        return "redis"
+
+    import fakeredis  # dependência só dos benchmarks
+
+    servidor = fakeredis.FakeServer()
+
+    def from_url(u, **kwargs):
+        db = int(urlparse(u).path.lstrip("/") or 0)
+        return fakeredis.FakeRedis(server=servidor, db=db, decode_responses=kwargs.get("decode_responses", False))
+
+    redis.from_url = from_url
+    for db in range(dbs):
+        os.environ[f"REDIS_URL_{db}"] = f"redis://fakeredis/{db}"
+    return "fakeredis"
+
+
+def use_memory_chroma() -> None:
+    """ChromaDB em memória, no próprio processo (ver ChromaDB._make_http_client)."""
+    os.environ["CHROMA_URL"] = "memory://"
@@ -0,0 +1,193 @@
+# Gera uma base sintética na escala pedida, nos mesmos formatos da base real:
+#   - <dir>/vagas.json             {"<id>": {"informacoes_basicas": {...}, "perfil_vaga": {...}}}
+#   - <dir>/applicants.json        {"<id>": {"infos_basicas": {...}, "informacoes_pessoais": {...},
+#                                            "informacoes_profissionais": {...}, "cv_pt": "..."}}
+#   - <dir>/candidates_dim<D>.npy  snapshot de embeddings no formato do export_data.export_collection_npy
+#                                  (+ .meta.jsonl com as flags de área e, com int8, .scale.npy)
+#
+# Os textos combinam um vocabulário por área de atuação e os vetores são agrupados em torno
+# de um centróide por área (mais ruído), para que a busca tenha vizinhos "de verdade" em vez
+# de ruído uniforme. Tudo é escrito em streaming/memmap: 1M de candidatos não passa pela memória.
+#
+# Uso:  python -m benchmarks.synthetic
+#
+# Variáveis de ambiente:
+#   - SYNTH_DIR (padrão database/synthetic)
+#   - SYNTH_CANDIDATOS (padrão 100000), SYNTH_VAGAS (padrão 1000)
+#   - SYNTH_DIM (padrão LOCAL_EMBED_DIM ou 3072): dimensão dos embeddings
+#   - VECTOR_PRECISION: precisão do snapshot (float32, float16 ou int8)
+#   - SYNTH_SEED (padrão 0)
+import json
+import os
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from src.services.candidate_meta import metadados_vetor
+from src.services.quantization import get_precision, quantize
+
+BLOCK = 10_000
+
+AREAS = {
+    "TI - Desenvolvimento/Programação": "python java javascript react node api microsserviços docker kubernetes git testes",
+    "TI - Dados": "sql python spark airflow etl modelagem dados power bi estatística machine learning",
+    "TI - Infraestrutura": "linux redes servidores aws azure monitoramento backup firewall suporte vmware",
+    "TI - SAP": "sap abap fi co mm sd hana módulos implantação consultoria funcional",
+    "TI - Projetos": "gestão projetos scrum kanban pmo cronograma stakeholders riscos orçamento jira",
+    "Administrativa": "rotinas administrativas faturamento contas relatórios excel atendimento arquivo compras",
+    "Financeira/Controladoria": "contábil fiscal conciliação balanço orçamento custos auditoria impostos tesouraria",
+    "Comercial": "vendas prospecção clientes negociação metas crm carteira propostas relacionamento",
+}
+COMUNS = ("experiência conhecimento atuação empresa equipe cliente desenvolvimento análise processos "
+          "inglês espanhol comunicação liderança sênior pleno júnior certificação graduação").split()
+NOMES = "Ana Bruno Carla Daniel Eduarda Felipe Gabriela Henrique Isabela João Larissa Marcos Natália Paulo Renata Tiago".split()
+NIVEIS = ("Júnior", "Pleno", "Sênior", "Especialista")
+LOCAIS = ("São Paulo, São Paulo", "Rio de Janeiro, Rio de Janeiro", "Belo Horizonte, Minas Gerais", "Curitiba, Paraná")
+SOBRENOMES = "Silva Souza Oliveira Santos Lima Pereira Costa Ferreira Almeida Ribeiro Carvalho Gomes Martins Rocha".split()
+
+
+def _texto(rng: np.random.Generator, area: str, n: int) -> str:
+    vocab = AREAS[area].split()
+    palavras = np.where(rng.random(n) < 0.6, rng.choice(vocab, size=n), rng.choice(COMUNS, size=n))
+    return " ".join(palavras)
+
+
+def _escrever_objeto(path: str, itens: Iterator[Tuple[str, Dict]]) -> int:
+    """Escreve um objeto JSON {"id": {...}, ...} item a item (mesmo formato lido por iter_json_object)."""
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for chave, valor in itens:
+            f.write(("," if n else "") + "\n" + json.dumps(chave) + ": " + json.dumps(valor, ensure_ascii=False))
+            n += 1
+        f.write("\n}\n")
+    return n
+
+
+def gerar_vagas(path: str, n: int, rng: np.random.Generator) -> int:
+    areas = list(AREAS)
+
+    def itens():
+        for i in range(n):
+            area = areas[i % len(areas)]
+            yield str(100000 + i), {
+                "informacoes_basicas": {"titulo_vaga": f"{area} {i}", "cliente": f"Cliente {i % 97}"},
+                "perfil_vaga": {
+                    "areas_atuacao": f"{area}-",  # formato da base real: áreas coladas por "-"
+                    "nivel profissional": ["Júnior", "Pleno", "Sênior"][i % 3],
+                    "principais_atividades": _texto(rng, area, 60),
+                    "competencia_tecnicas_e_comportamentais": _texto(rng, area, 40),
+                },
+            }
+
+    return _escrever_objeto(path, itens())
+
+
+def gerar_applicants(path: str, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Escreve os candidatos e devolve a área (índice em AREAS) de cada um, na ordem dos ids."""
+    areas = list(AREAS)
+    area_idx = rng.integers(0, len(areas), size=n)
+
+    def itens():
+        for i in range(n):
+            nome = f"{NOMES[i % len(NOMES)]} {SOBRENOMES[(i // len(NOMES)) % len(SOBRENOMES)]}"
+            yield str(i), {
+                "infos_basicas": {"codigo_profissional": str(i), "nome": nome, "local": LOCAIS[i % len(LOCAIS)]},
+                "informacoes_pessoais": {"nome": nome},
+                "informacoes_profissionais": {
+                    "area_atuacao": areas[area_idx[i]],
+                    "nivel_profissional": NIVEIS[i % len(NIVEIS)],
+                },
+                "cv_pt": _texto(rng, areas[area_idx[i]], 120),
+            }
+
+    _escrever_objeto(path, itens())
+    return area_idx
+
+
+def _metadados(i: int, area: int) -> Dict:
+    """Os mesmos metadados que o generate_embeddings grava a partir do perfil do candidato."""
+    return metadados_vetor(str(i), {"areas": [list(AREAS)[area]], "nivel": NIVEIS[i % len(NIVEIS)],
+                                    "local": LOCAIS[i % len(LOCAIS)]})
+
+
+def gerar_embeddings(prefix: str, area_idx: np.ndarray, dim: int, rng: np.random.Generator,
+                     precision: Optional[str] = None, spread: float = 0.8) -> int:
+    """
+    Snapshot [N, dim] no formato do export_collection_npy, escrito em blocos de BLOCK linhas.
+    Cada vetor é o centróide da área do candidato mais ruído gaussiano (`spread`), normalizado.
+    """
+    precision = get_precision(precision)
+    n = len(area_idx)
+    centroides = rng.standard_normal((len(AREAS), dim)).astype(np.float32)
+    centroides /= np.linalg.norm(centroides, axis=1, keepdims=True)
+
+    mat = np.lib.format.open_memmap(f"{prefix}.npy", mode="w+", dtype=np.dtype(precision), shape=(n, dim))
+    escala = None
+    if precision == "int8":
+        escala = np.lib.format.open_memmap(f"{prefix}.scale.npy", mode="w+", dtype=np.float32, shape=(n,))
+    with open(f"{prefix}.meta.jsonl", "w", encoding="utf-8") as f:
+        for a in range(0, n, BLOCK):
+            b = min(n, a + BLOCK)
+            bloco = centroides[area_idx[a:b]] + rng.standard_normal((b - a, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+            bloco /= np.linalg.norm(bloco, axis=1, keepdims=True)
+            codigos, esc = quantize(bloco, precision)
+            mat[a:b] = codigos
+            if escala is not None:
+                escala[a:b] = esc
+            f.writelines(json.dumps({"id": str(i), "metadata": _metadados(i, area_idx[i])}, ensure_ascii=False) + "\n"
+                         for i in range(a, b))
+    mat.flush()
+    del mat
+    if escala is not None:
+        escala.flush()
+        del escala
+    return n
+
+
+def generate(
+    out_dir: str = "database/synthetic",
+    n_candidatos: int = 100_000,
+    n_vagas: int = 1000,
+    dim: int = 3072,
+    precision: Optional[str] = None,
+    seed: int = 0,
+) -> Dict:
+    """Gera vagas.json, applicants.json e o snapshot de embeddings em `out_dir`. Retorna os caminhos e tempos."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    t0 = time.monotonic()
+
+    vagas = os.path.join(out_dir, "vagas.json")
+    applicants = os.path.join(out_dir, "applicants.json")
+    prefix = os.path.join(out_dir, f"candidates_dim{dim}")
+
+    gerar_vagas(vagas, n_vagas, rng)
+    area_idx = gerar_applicants(applicants, n_candidatos, rng)
+    t1 = time.monotonic()
+    gerar_embeddings(prefix, area_idx, dim, rng, precision)
+    t2 = time.monotonic()
+
+    return {
+        "vagas": vagas,
+        "applicants": applicants,
+        "snapshot": prefix,
+        "n_vagas": n_vagas,
+        "n_candidatos": n_candidatos,
+        "dim": dim,
+        "precision": get_precision(precision),
+        "segundos_json": round(t1 - t0, 1),
+        "segundos_embeddings": round(t2 - t1, 1),
+    }
+
+
+if __name__ == "__main__":
+    resumo = generate(
+        out_dir=os.getenv("SYNTH_DIR", "database/synthetic"),
+        n_candidatos=int(os.getenv("SYNTH_CANDIDATOS", 100_000)),
+        n_vagas=int(os.getenv("SYNTH_VAGAS", 1000)),
+        dim=int(os.getenv("SYNTH_DIM") or os.getenv("LOCAL_EMBED_DIM", 3072)),
+        seed=int(os.getenv("SYNTH_SEED", 0)),
+    )
+    print(json.dumps(resumo, ensure_ascii=False, indent=2))
@@ -19,6 +19,57 @@ else
 fi
 echo "[entrypoint] import: terminado $(date -Iseconds)"
 
+# Índice de perfis de candidatos (Redis DB 3) usado pelo /predict
+if command -v poetry >/dev/null 2>&1; then
+  PYTHONPATH=. poetry run python3 -u "$APP_DIR/scripts/load_applicants.py"
+else
+  PYTHONPATH=. python3 -u "$APP_DIR/scripts/load_applicants.py"
+fi
+echo "[entrypoint] perfis de candidatos: ok $(date -Iseconds)"
+
+# Índice léxico BM25 (cv_pt) do modo híbrido do /predict; incremental se já existir
+if command -v poetry >/dev/null 2>&1; then
+  PYTHONPATH=. poetry run python3 -u "$APP_DIR/scripts/build_lexical_index.py"
+else
+  PYTHONPATH=. python3 -u "$APP_DIR/scripts/build_lexical_index.py"
+fi
+echo "[entrypoint] índice léxico: ok $(date -Iseconds)"
+
+# Índice vetorial local (memory-mapped), só quando VECTOR_BACKEND=local|ivfpq
+case "${VECTOR_BACKEND:-chroma}" in
+  local) INDEX_SCRIPT="build_local_index.py" ;;
+  ivfpq) INDEX_SCRIPT="build_ivfpq_index.py" ;;
+  *)     INDEX_SCRIPT="" ;;
+esac
+if [ -n "$INDEX_SCRIPT" ]; then
+  if command -v poetry >/dev/null 2>&1; then
+    PYTHONPATH=. poetry run python3 -u "$APP_DIR/scripts/$INDEX_SCRIPT"
+  else
+    PYTHONPATH=. python3 -u "$APP_DIR/scripts/$INDEX_SCRIPT"
+  fi
+  echo "[entrypoint] índice local ($VECTOR_BACKEND): ok $(date -Iseconds)"
+fi
+
+# Coleção truncada da busca em dois estágios, só quando RETRIEVAL_MODE=two_stage
+if [ "${RETRIEVAL_MODE:-single}" = "two_stage" ]; then
+  if command -v poetry >/dev/null 2>&1; then
+    PYTHONPATH=. poetry run python3 -u "$APP_DIR/scripts/build_truncated_collection.py"
+  else
+    PYTHONPATH=. python3 -u "$APP_DIR/scripts/build_truncated_collection.py"
+  fi
+  echo "[entrypoint] coleção truncada: ok $(date -Iseconds)"
+fi
+
+# Rankings vaga x candidato pré-computados (Redis DB 4), só quando MATCH_PRECOMPUTE=true
+if [ "${MATCH_PRECOMPUTE:-false}" = "true" ]; then
+  if command -v poetry >/dev/null 2>&1; then
+    PYTHONPATH=. poetry run python3 -u "$APP_DIR/scripts/build_match_matrix.py"
+  else
+    PYTHONPATH=. python3 -u "$APP_DIR/scripts/build_match_matrix.py"
+  fi
+  echo "[entrypoint] matriz de rankings: ok $(date -Iseconds)"
+fi
+
 echo "[entrypoint] executando CMD: $*"
 
 
@@ -0,0 +1,93 @@
+# Grava os metadados dos candidatos (área, nível, local) nos vetores já indexados, sem reembedar:
+# perfis do Redis (DB 3) -> metadados das coleções do ChromaDB e bitmap de áreas do índice local
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.services.Data import Data
+from src.services.candidate_meta import metadados_vetor
+from src.services.local_index import LocalVectorIndex
+from src.services.retrieve_data import ChromaDB
+
+
+def _dim_variante(nome: str, prefix: str) -> Optional[Tuple[int, str]]:
+    """(dim, variante) de um nome de coleção como candidates_dim3072 ou candidates_pca_dim256."""
+    m = re.fullmatch(rf"{re.escape(prefix)}_(?:(.+)_)?dim(\d+)", nome)
+    return (int(m.group(2)), m.group(1) or "") if m else None
+
+
+def _metadados(dados: Data, ids: List[str]) -> List[Dict]:
+    return [metadados_vetor(i, meta) for i, meta in zip(ids, dados.get_metadados(ids))]
+
+
+def backfill_chroma(dados: Data, batch: int = 1000) -> Dict[str, int]:
+    """Atualiza os metadados de todas as coleções de candidatos do ChromaDB (todas as dimensões/variantes)."""
+    chroma = ChromaDB()
+    feitos = {}
+    for c in chroma._client.list_collections():
+        alvo = _dim_variante(c.name, chroma._prefix)
+        if alvo is None:
+            continue
+        dim, variant = alvo
+        col = chroma._get_or_create_collection(dim, variant)
+        total = col.count()
+        for offset in range(0, total, batch):
+            ids = list(col.get(limit=batch, offset=offset, include=[]).get("ids") or [])
+            if not ids:
+                break
+            chroma.update_metadatas(ids, _metadados(dados, ids), dim, variant)
+        feitos[c.name] = total
+        print(f"[CHROMA] {c.name}: {total} vetores atualizados.")
+    return feitos
+
+
+def backfill_local(dados: Data, batch: int = 1000) -> Dict[str, int]:
+    """Regrava o bitmap de áreas de cada índice local em LOCAL_INDEX_DIR."""
+    index = LocalVectorIndex()
+    feitos = {}
+    for dim, variant in index.indices():
+        nome = os.path.basename(index.path(dim, variant, sufixo=""))
+        snap = index.snapshot(dim, variant)
+        ids = snap.ids
+
+        def metas() -> Iterator[Dict]:
+            for i in range(0, len(ids), batch):
+                yield from _metadados(dados, ids[i:i + batch].tolist())
+
+        n_areas = index.write_area_bitmap(dim, metas(), variant, geracao=snap.geracao)
+        feitos[nome] = n_areas
+        print(f"[LOCAL] {nome}: {len(ids)} linhas, {n_areas} áreas no bitmap.")
+    return feitos
+
+
+def backfill_metadata(
+    applicants_path: str = "database/applicants.json",
+    targets: str = "chroma,local",
+    reload_applicants: bool = True,
+    batch: int = 1000,
+) -> Dict[str, Dict[str, int]]:
+    """
+    1) Recarrega o applicants.json no Redis (os perfis do DB 3 passam a ter areas/nivel/local)
+    2) Propaga os metadados para os backends de `targets` ("chroma" e/ou "local")
+    """
+    dados = Data()
+    if reload_applicants and os.path.exists(applicants_path):
+        print(f"[APPLICANTS] Reindexando perfis a partir de '{applicants_path}' ...")
+        with open(applicants_path, "rb") as f:
+            dados.load_applicants(f)
+
+    alvos = {t.strip().lower() for t in targets.split(",") if t.strip()}
+    resumo = {}
+    if "chroma" in alvos:
+        resumo["chroma"] = backfill_chroma(dados, batch)
+    if "local" in alvos:
+        resumo["local"] = backfill_local(dados, batch)
+    return resumo
+
+
+if __name__ == "__main__":
+    backfill_metadata(
+        applicants_path="database/applicants.json",
+        targets=os.getenv("METADATA_BACKFILL_TARGETS", "chroma,local"),
+        reload_applicants=os.getenv("METADATA_BACKFILL_RELOAD", "true").lower() != "false",
+    )
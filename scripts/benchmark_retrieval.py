@@ -0,0 +1,112 @@
+# Relatório de recall@k x latência das buscas aproximadas contra a busca exata (LocalVectorIndex)
+# - ivfpq: IVF-PQ com rerank exato, para vários nprobe
+# - two_stage: shortlist em TRUNCATE_DIM dimensões + rerank em dimensão cheia, para vários SHORTLIST_SIZE
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.services.ivfpq_index import IVFPQIndex
+from src.services.local_index import LocalVectorIndex
+from src.services.vector_store import TwoStageRetriever
+
+
+def _queries(exact: LocalVectorIndex, dim: int, n: int, noise: float, seed: int) -> np.ndarray:
+    """Consultas sintéticas: linhas do índice com ruído gaussiano (perto, mas fora da base)."""
+    rng = np.random.default_rng(seed)
+    snap = exact.snapshot(dim)
+    rows = snap.vetores(np.sort(rng.choice(snap.n, size=min(n, snap.n), replace=False)))
+    return (rows + rng.normal(scale=noise / np.sqrt(dim), size=rows.shape)).astype(np.float32)
+
+
+def _percentis(lat_ms: Sequence[float]) -> Dict[str, float]:
+    a = np.asarray(lat_ms)
+    return {
+        "p50_ms": round(float(np.percentile(a, 50)), 3),
+        "p95_ms": round(float(np.percentile(a, 95)), 3),
+        "media_ms": round(float(a.mean()), 3),
+    }
+
+
+def _medir(fn, queries: np.ndarray, k: int):
+    ids, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        r = fn(q, k)
+        lat.append((time.perf_counter() - t0) * 1000)
+        ids.append(r["ids"][0])
+    return ids, lat
+
+
+def _recall(aprox: List[List[str]], exato: List[List[str]], k: int) -> float:
+    return float(np.mean([len(set(a[:k]) & set(e[:k])) / max(1, len(e[:k])) for a, e in zip(aprox, exato)]))
+
+
+def benchmark_retrieval(
+    dim: int = 3072,
+    n_queries: int = 200,
+    ks: Sequence[int] = (5, 10, 50),
+    nprobes: Sequence[int] = (1, 4, 16, 64),
+    coarse_dim: int = 768,
+    shortlists: Sequence[int] = (50, 100, 200, 500, 1000),
+    noise: float = 0.3,
+    out_path: Optional[str] = "retrieval_report.json",
+    seed: int = 0,
+) -> Dict:
+    exact = LocalVectorIndex()
+    n_vetores = exact.snapshot(dim).n
+    queries = _queries(exact, dim, n_queries, noise, seed)
+    k_max = max(ks)
+
+    exato_ids, exato_lat = _medir(lambda q, k: exact.query_similar_by_embedding(q, top_k=k), queries, k_max)
+    relatorio = {
+        "dim": dim,
+        "n_vetores": int(n_vetores),
+        "n_consultas": int(len(queries)),
+        "exato": _percentis(exato_lat),
+        "ivfpq": [],
+        "two_stage": [],
+    }
+
+    ivf = IVFPQIndex()
+    try:
+        ivf.query_similar_by_embeddings(queries[:1], top_k=1)
+    except FileNotFoundError as e:
+        relatorio["ivfpq_erro"] = str(e)
+    else:
+        for nprobe in nprobes:
+            fn = lambda q, k: ivf.query_similar_by_embeddings(q.reshape(1, -1), top_k=k, nprobe=nprobe)
+            ids, lat = _medir(fn, queries, k_max)
+            linha = {"nprobe": nprobe, "rerank": ivf.rerank, **_percentis(lat)}
+            linha.update({f"recall@{k}": round(_recall(ids, exato_ids, k), 4) for k in ks})
+            relatorio["ivfpq"].append(linha)
+
+    two = TwoStageRetriever(exact, coarse_dim=coarse_dim)
+    try:
+        exact.snapshot(coarse_dim)
+    except FileNotFoundError as e:
+        relatorio["two_stage_erro"] = str(e)
+    else:
+        for shortlist in shortlists:
+            fn = lambda q, k: two.query_similar_by_embeddings(q.reshape(1, -1), top_k=k, shortlist=shortlist)
+            ids, lat = _medir(fn, queries, k_max)
+            linha = {"coarse_dim": coarse_dim, "shortlist": shortlist, **_percentis(lat)}
+            linha.update({f"recall@{k}": round(_recall(ids, exato_ids, k), 4) for k in ks})
+            relatorio["two_stage"].append(linha)
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return relatorio
+
+
+if __name__ == "__main__":
+    rel = benchmark_retrieval(
+        dim=int(os.getenv("EMBED_DIM", 3072)),
+        n_queries=int(os.getenv("BENCH_QUERIES", 200)),
+        coarse_dim=int(os.getenv("TRUNCATE_DIM", 768)),
+        out_path=os.getenv("BENCH_OUT", "retrieval_report.json"),
+    )
+    print(json.dumps(rel, ensure_ascii=False, indent=2))
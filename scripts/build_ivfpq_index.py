@@ -0,0 +1,35 @@
+# Gera o índice aproximado IVF-PQ usado quando VECTOR_BACKEND=ivfpq
+import json
+import os
+
+from scripts.build_local_index import build_local_index
+from src.services.ivfpq_index import IVFPQIndex
+
+
+def build_ivfpq_index(dim: int = 3072, memory_mb: float = 512, rebuild: bool = False) -> None:
+    """
+    Treina o IVF-PQ sobre a matriz do índice local (gerada antes, se preciso).
+    - `memory_mb`: orçamento para códigos + listas + centróides; define quantos
+      bytes por candidato o PQ usa.
+    - `rebuild`: se True, regera também o índice local; se False, só treina de novo quando
+      o IVF-PQ não existe ou foi gerado sobre outra versão do índice local.
+    """
+    build_local_index(dim=dim, rebuild=rebuild)
+    index = IVFPQIndex()
+    path = index.path(dim)
+
+    if not rebuild and index.em_dia(dim):
+        print(f"[SKIP] Índice IVF-PQ já existe em '{path}'.")
+        return
+
+    print(f"[IVF-PQ] Treinando (dim={dim}, orçamento={memory_mb} MB) ...")
+    resumo = index.build(dim, memory_mb=memory_mb)
+    print(f"[DONE] {json.dumps(resumo)} -> '{path}'")
+
+
+if __name__ == "__main__":
+    build_ivfpq_index(
+        dim=int(os.getenv("EMBED_DIM", 3072)),
+        memory_mb=float(os.getenv("IVFPQ_MEMORY_MB", 512)),
+        rebuild=os.getenv("LOCAL_INDEX_REBUILD", "false").lower() == "true",
+    )
@@ -0,0 +1,82 @@
+# Gera/atualiza o índice léxico BM25 (cv_pt dos candidatos) usado no modo híbrido do /predict
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import redis
+
+from scripts.generate_embeddings import iter_candidate_pages
+from src.services.Data import Data
+from src.services.lexical_index import BM25Index
+
+
+def _docs(dados: Data, pares: Sequence[Tuple[str, str]]) -> List[Tuple[str, str, List[str]]]:
+    """(id, cv_pt) -> (id, cv_pt, áreas do perfil no DB 3)."""
+    metas = dados.get_metadados([i for i, _ in pares])
+    return [(i, texto, (meta or {}).get("areas") or []) for (i, texto), meta in zip(pares, metas)]
+
+
+def _iter_docs(dados: Data, r: redis.Redis, scan_count: int) -> Iterator[Tuple[str, str, List[str]]]:
+    for _, pares in iter_candidate_pages(r, scan_count=scan_count):
+        yield from _docs(dados, pares)
+
+
+def update_lexical_index(ids: List[str], batch: int = 1000) -> Dict[str, int]:
+    """
+    Atualização incremental para candidatos novos/alterados (ex.: `alterados` do load_applicants):
+    lê o cv_pt e as áreas dos perfis (DB 3); ids sem perfil ou com cv_pt vazio saem do índice.
+    """
+    dados = Data()
+    docs: List[Tuple[str, str, List[str]]] = []
+    removidos: List[str] = []
+    for i in range(0, len(ids), batch):
+        lote = [str(x) for x in ids[i:i + batch]]
+        perfis = {p["id"]: p["cv_pt"] for p in dados.get_perfis(lote)}
+        metas = dados.get_metadados(lote)
+        for cid, meta in zip(lote, metas):
+            texto = (perfis.get(cid) or "").strip()
+            if texto:
+                docs.append((cid, texto, (meta or {}).get("areas") or []))
+            else:
+                removidos.append(cid)
+    return BM25Index().update(docs=docs, removed=removidos)
+
+
+def build_lexical_index(rebuild: bool = False, scan_count: int = 1000) -> None:
+    """
+    Percorre o DB 2 (cv_pt) do Redis e grava o índice em LEXICAL_INDEX_DIR.
+    - Sem índice (ou `rebuild`): constrói do zero, em um segmento
+    - Com índice: sincroniza de forma incremental, adicionando os candidatos que faltam
+      e removendo os que não estão mais no DB 2 (alterações de cv_pt chegam pelo
+      load_applicants, via `update_lexical_index`)
+    """
+    index = BM25Index()
+    dados = Data()
+    r = redis.from_url(os.getenv("REDIS_URL_2"), decode_responses=True)
+
+    if rebuild or not index.exists():
+        print(f"[LEXICAL-INDEX] Gerando a partir do Redis (DB 2) em '{index._dir}' ...")
+        resumo = index.rebuild(_iter_docs(dados, r, scan_count))
+        print(f"[DONE] {resumo['documentos']} documentos indexados.")
+        return
+
+    indexados = set(index.live_ids())
+    vistos = set()
+    novos: List[Tuple[str, str, List[str]]] = []
+    for _, pares in iter_candidate_pages(r, scan_count=scan_count):
+        vistos.update(i for i, _ in pares)
+        faltando = [(i, texto) for i, texto in pares if i not in indexados]
+        if faltando:
+            novos.extend(_docs(dados, faltando))
+    removidos = indexados - vistos
+    if not novos and not removidos:
+        print(f"[SKIP] Índice léxico em '{index._dir}' já está sincronizado com o Redis.")
+        return
+    resumo = index.update(docs=novos, removed=removidos)
+    print(f"[DONE] Índice léxico sincronizado: {len(novos)} adicionados, {len(removidos)} removidos, "
+          f"{resumo['segmentos']} segmentos.")
+
+
+if __name__ == "__main__":
+    build_lexical_index(
+        rebuild=os.getenv("LEXICAL_INDEX_REBUILD", "false").lower() == "true",
+    )
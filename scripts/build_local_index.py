@@ -0,0 +1,32 @@
+# Gera o índice local (matriz float32 normalizada + ids) usado quando VECTOR_BACKEND=local
+import os
+
+from src.services.local_index import LocalVectorIndex
+
+
+def build_local_index(dim: int = 3072, snapshot_prefix: str = "database/candidates_dim3072", rebuild: bool = False) -> None:
+    """
+    Prefere o snapshot binário (.npy + .meta.jsonl) e cai para a coleção do ChromaDB.
+    - `rebuild`: se False e o índice já existir, não regera.
+    """
+    index = LocalVectorIndex()
+    path = index.path(dim)
+
+    if not rebuild and index.exists(dim):
+        print(f"[SKIP] Índice local já existe em '{path}'.")
+        return
+
+    if os.path.exists(f"{snapshot_prefix}.npy") and os.path.exists(f"{snapshot_prefix}.meta.jsonl"):
+        print(f"[LOCAL-INDEX] Gerando a partir do snapshot '{snapshot_prefix}.npy' ...")
+        n = index.build_from_snapshot(snapshot_prefix)
+    else:
+        print(f"[LOCAL-INDEX] Gerando a partir do ChromaDB (dim={dim}) ...")
+        n = index.build_from_chroma(dim)
+    print(f"[DONE] {n} vetores gravados em '{path}'.")
+
+
+if __name__ == "__main__":
+    build_local_index(
+        dim=int(os.getenv("EMBED_DIM", 3072)),
+        rebuild=os.getenv("LOCAL_INDEX_REBUILD", "false").lower() == "true",
+    )
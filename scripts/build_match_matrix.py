@@ -0,0 +1,54 @@
+# Pré-computa no Redis (DB 4) os rankings vaga x candidato de todas as vagas carregadas
+import json
+import os
+import time
+
+from scripts.build_ivfpq_index import build_ivfpq_index
+from scripts.build_local_index import build_local_index
+from src.services.Data import Data
+from src.services.gemini_api import Model
+from src.services.local_index import LocalVectorIndex
+from src.services.match_matrix import MatchMatrix
+
+
+def build_match_matrix(dim: int = 3072, scan_count: int = 1000) -> None:
+    """
+    Embeda as vagas do DB 1 (pelo cache de embeddings) e atualiza os rankings de forma
+    incremental: só vagas novas/alteradas e a diferença de candidatos desde a última
+    execução são recalculadas. Os candidatos vêm da matriz do índice local (gerada antes,
+    se preciso); se houve escritas na coleção do ChromaDB depois do build, o índice local é
+    regerado a partir dela (e o IVF-PQ treinado de novo, com VECTOR_BACKEND=ivfpq) antes do
+    cálculo.
+    """
+    matriz = MatchMatrix()
+    if matriz.redis is None:
+        print("[SKIP] Matriz de rankings desligada (MATCH_PRECOMPUTE != true, REDIS_URL_4 ausente ou MATCH_DEPTH=0).")
+        return
+
+    build_local_index(dim=dim)
+    index = LocalVectorIndex()
+    if not index.sincronizado(dim):
+        print(f"[MATCH] Índice local atrás da coleção do ChromaDB (dim={dim}); regerando ...")
+        index.build_from_chroma(dim)
+        if os.getenv("VECTOR_BACKEND", "chroma").strip().lower() == "ivfpq":
+            build_ivfpq_index(dim=dim, memory_mb=float(os.getenv("IVFPQ_MEMORY_MB", 512)))
+    vagas = [par for pagina in Data().iter_vagas_descricoes(scan_count) for par in pagina]
+    if not vagas:
+        print("[SKIP] Nenhuma vaga carregada no Redis (DB 1).")
+        return
+
+    model = Model()
+    t0 = time.monotonic()
+    print(f"[MATCH] Atualizando rankings de {len(vagas)} vagas (profundidade {matriz.depth}) ...")
+    resumo = matriz.atualizar(index, dim, vagas, model.embed_many, model.model_name)
+    print(f"[DONE] {json.dumps(resumo)} em {time.monotonic() - t0:.1f}s.")
+
+
+if __name__ == "__main__":
+    # MATCH_INTERVAL_S > 0: roda em laço, como etapa agendada; 0 (padrão): uma execução
+    intervalo = float(os.getenv("MATCH_INTERVAL_S", 0))
+    while True:
+        build_match_matrix(dim=int(os.getenv("EMBED_DIM", 3072)))
+        if intervalo <= 0:
+            break
+        time.sleep(intervalo)
@@ -0,0 +1,53 @@
+# Deriva a coleção truncada (ex.: candidates_dim768) usada pelo RETRIEVAL_MODE=two_stage
+import os
+
+from src.services.local_index import LocalVectorIndex
+from src.services.retrieve_data import ChromaDB
+from src.services.vector_store import truncar
+
+
+def build_truncated_collection(src_dim: int = 3072, dim: int = 768, batch: int = 1000, rebuild: bool = False) -> int:
+    """
+    Copia cada vetor de `src_dim` para a coleção de `dim` dimensões (prefixo + renormalização),
+    sem chamar a API de embeddings de novo.
+    - No ChromaDB: lê a coleção de origem em lotes e faz upsert na coleção truncada
+    - Com VECTOR_BACKEND=local|ivfpq: também gera o índice local truncado
+    - `rebuild`: se False e a coleção truncada já tiver o mesmo tamanho, não refaz.
+    """
+    chroma = ChromaDB()
+    src = chroma._get_or_create_collection(src_dim)
+    dst = chroma._get_or_create_collection(dim)
+    total = src.count()
+
+    if not rebuild and total and dst.count() == total:
+        print(f"[SKIP] Coleção '{chroma._collection_name(dim)}' já tem {total} vetores.")
+    else:
+        print(f"[TRUNCATE] {chroma._collection_name(src_dim)} -> {chroma._collection_name(dim)} ({total} vetores) ...")
+        for offset in range(0, total, batch):
+            res = src.get(limit=batch, offset=offset, include=["embeddings", "metadatas"])
+            if not res.get("ids"):
+                break
+            chroma.upsert_embeddings(
+                embeddings=truncar(res["embeddings"], dim),
+                ids=res["ids"],
+                metadatas=res.get("metadatas"),
+                dim=dim,
+            )
+        print(f"[DONE] {total} vetores na coleção truncada.")
+
+    if os.getenv("VECTOR_BACKEND", "chroma").strip().lower() in ("local", "ivfpq"):
+        index = LocalVectorIndex()
+        if not rebuild and index.exists(dim):
+            print(f"[SKIP] Índice local truncado já existe (dim={dim}).")
+        else:
+            n = index.build_truncated(src_dim, dim)
+            print(f"[DONE] índice local truncado: {n} vetores (dim={dim}).")
+    return total
+
+
+if __name__ == "__main__":
+    build_truncated_collection(
+        src_dim=int(os.getenv("EMBED_DIM", 3072)),
+        dim=int(os.getenv("TRUNCATE_DIM", 768)),
+        rebuild=os.getenv("LOCAL_INDEX_REBUILD", "false").lower() == "true",
+    )
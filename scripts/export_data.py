@@ -1,54 +1,112 @@
-import json
-import numpy as np
-from src.services.retrieve_data import ChromaDB
-
-def _to_jsonable(x):
-    """Converte recursivamente objetos para tipos serializáveis em JSON."""
-    # numpy arrays -> list
-    if isinstance(x, np.ndarray):
-        return x.tolist()
-    # numpy escalares -> python escalares
-    if isinstance(x, (np.floating, np.integer)):
-        return x.item()
-    # containers
-    if isinstance(x, dict):
-        return {str(k): _to_jsonable(v) for k, v in x.items()}
-    if isinstance(x, (list, tuple, set)):
-        return [_to_jsonable(v) for v in x]
-    # tipos comuns já ok: str, int, float, bool, None
-    return x
-
-
-def export_collection_jsonl(dim: int, out_path: str, batch: int = 1000):
-    chroma = ChromaDB()
-    col = chroma._get_or_create_collection(dim)
-    total = col.count()
-    with open(out_path, "w", encoding="utf-8") as f:
-        for offset in range(0, total, batch):
-            res = col.get(limit=batch, offset=offset, include=["metadatas", "embeddings"])
-            ids = res.get("ids", [])
-            embs = res.get("embeddings", [])
-            metas = res.get("metadatas", [{}] * len(ids))
-
-            for i, _id in enumerate(ids):
-                embedding = embs[i]
-                # garante list de floats
-                if isinstance(embedding, np.ndarray):
-                    embedding = embedding.astype(float).tolist()
-                elif not isinstance(embedding, list):
-                    embedding = list(embedding)
-
-                obj = {
-                    "id": str(_id),
-                    "embedding": embedding,
-                    "metadata": _to_jsonable(metas[i]),
-                }
-                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-
-
-#export_collection_jsonl(
-#        dim=3072,
-#        out_path="candidates_dim3072.jsonl",
-#        batch=10000,
-#)
-
+import base64
+import json
+from typing import Optional
+import numpy as np
+from src.services.quantization import get_precision, pack, quantize
+from src.services.retrieve_data import ChromaDB
+
+def _to_jsonable(x):
+    """Converte recursivamente objetos para tipos serializáveis em JSON."""
+    # numpy arrays -> list
+    if isinstance(x, np.ndarray):
+        return x.tolist()
+    # numpy escalares -> python escalares
+    if isinstance(x, (np.floating, np.integer)):
+        return x.item()
+    # containers
+    if isinstance(x, dict):
+        return {str(k): _to_jsonable(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple, set)):
+        return [_to_jsonable(v) for v in x]
+    # tipos comuns já ok: str, int, float, bool, None
+    return x
+
+
+def export_collection_jsonl(dim: int, out_path: str, batch: int = 1000, precision: Optional[str] = None):
+    """
+    Exporta a coleção `dim` em JSONL, um registro por linha:
+      {"id": ..., "embedding_b64": ..., "precision": ..., "metadata": {...}}
+    O vetor vai em bytes (base64) na precisão de VECTOR_PRECISION (float32, float16
+    ou int8 com escala por vetor) em vez de texto decimal.
+    """
+    precision = get_precision(precision)
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+    total = col.count()
+    with open(out_path, "w", encoding="utf-8") as f:
+        for offset in range(0, total, batch):
+            res = col.get(limit=batch, offset=offset, include=["metadatas", "embeddings"])
+            ids = res.get("ids", [])
+            embs = res.get("embeddings", [])
+            metas = res.get("metadatas", [{}] * len(ids))
+
+            for i, _id in enumerate(ids):
+                obj = {
+                    "id": str(_id),
+                    "embedding_b64": base64.b64encode(pack(embs[i], precision)).decode("ascii"),
+                    "precision": precision,
+                    "metadata": _to_jsonable(metas[i]),
+                }
+                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+
+def export_collection_npy(dim: int, out_prefix: str, batch: int = 1000, precision: Optional[str] = None) -> int:
+    """
+    Exporta a coleção `dim` em formato binário, pronto para memory-map:
+      - <out_prefix>.npy        matriz [N, dim] na precisão de VECTOR_PRECISION (float32, float16 ou int8)
+      - <out_prefix>.scale.npy  escala float32 por linha (só para int8)
+      - <out_prefix>.meta.jsonl uma linha por linha da matriz: {"id": ..., "metadata": {...}}
+
+    Os vetores são gravados direto no arquivo (np.lib.format.open_memmap), sem
+    montar a matriz inteira em memória. Retorna o número de linhas exportadas.
+    """
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+    total = col.count()
+
+    precision = get_precision(precision)
+    mat = np.lib.format.open_memmap(f"{out_prefix}.npy", mode="w+", dtype=np.dtype(precision), shape=(total, dim))
+    escala = None
+    if precision == "int8":
+        escala = np.lib.format.open_memmap(f"{out_prefix}.scale.npy", mode="w+", dtype=np.float32, shape=(total,))
+    n = 0
+    with open(f"{out_prefix}.meta.jsonl", "w", encoding="utf-8") as f:
+        for offset in range(0, total, batch):
+            res = col.get(limit=batch, offset=offset, include=["metadatas", "embeddings"])
+            ids = res.get("ids", [])
+            embs = res.get("embeddings", [])
+            metas = res.get("metadatas", [{}] * len(ids))
+            if not ids:
+                break
+
+            codigos, esc = quantize(embs, precision)
+            mat[n:n + len(ids)] = codigos
+            if escala is not None:
+                escala[n:n + len(ids)] = esc
+            for i, _id in enumerate(ids):
+                obj = {"id": str(_id), "metadata": _to_jsonable(metas[i])}
+                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            n += len(ids)
+
+    mat.flush()
+    del mat
+    if escala is not None:
+        escala.flush()
+        del escala
+    if n != total:
+        raise RuntimeError(f"Coleção mudou durante o export: esperado {total}, exportado {n}.")
+    return n
+
+
+#export_collection_jsonl(
+#        dim=3072,
+#        out_path="candidates_dim3072.jsonl",
+#        batch=10000,
+#)
+
+#export_collection_npy(
+#        dim=3072,
+#        out_prefix="database/candidates_dim3072",
+#        batch=10000,
+#)
+
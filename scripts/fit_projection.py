@@ -0,0 +1,144 @@
+# Ajusta a projeção PCA sobre os embeddings dos candidatos e grava a coleção reduzida (RETRIEVAL_MODE=pca)
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.local_index import LocalVectorIndex
+from src.services.projection import VARIANT, Projection
+from src.services.retrieve_data import ChromaDB
+
+
+def _blocos(dim: int, batch: int, use_local: bool) -> Iterator[Tuple[List[str], np.ndarray, Optional[list]]]:
+    """(ids, vetores float32, metadatas) em blocos, do índice local ou da coleção do Chroma."""
+    if use_local:
+        snap = LocalVectorIndex().snapshot(dim)  # ids, vetores e áreas da mesma geração
+        for i in range(0, snap.n, batch):
+            linhas = slice(i, i + batch)
+            bloco_ids = snap.ids[linhas].tolist()
+            areas = snap.metadados_areas(linhas)  # flags de área do bitmap, se houver
+            metas = None if areas is None else [{"candidate_id": _id, **md} for _id, md in zip(bloco_ids, areas)]
+            yield bloco_ids, snap.vetores(linhas), metas
+        return
+
+    col = ChromaDB()._get_or_create_collection(dim)
+    total = col.count()
+    for offset in range(0, total, batch):
+        res = col.get(limit=batch, offset=offset, include=["embeddings", "metadatas"])
+        if not res.get("ids"):
+            return
+        yield list(res["ids"]), np.asarray(res["embeddings"], dtype=np.float32), res.get("metadatas")
+
+
+def _normalizar(X: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(X, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return X / normas
+
+
+def _merge_topk(best_s: np.ndarray, best_i: np.ndarray, sims: np.ndarray, offset: int, k: int):
+    """Junta o top-k acumulado [Q, k] com as similaridades de um bloco [Q, B]."""
+    s = np.concatenate([best_s, sims], axis=1)
+    i = np.concatenate([best_i, np.arange(offset, offset + sims.shape[1])[None, :].repeat(len(sims), 0)], axis=1)
+    kk = min(k, s.shape[1])
+    top = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+    return np.take_along_axis(s, top, 1), np.take_along_axis(i, top, 1)
+
+
+def fit_projection(
+    dim: int = 3072,
+    n_components: int = 256,
+    whiten: bool = False,
+    train_size: int = 20_000,
+    out_path: str = "database/index/projection_pca.npz",
+    batch: int = 1000,
+    n_eval: int = 200,
+    k: int = 10,
+    seed: int = 0,
+) -> Dict:
+    """
+    1) Amostra `train_size` vetores e ajusta a PCA (sklearn) com `n_components` dimensões;
+       as `n_eval` consultas do recall check são sorteadas fora dessa amostra
+    2) Projeta todos os vetores e grava a coleção reduzida (candidates_pca_dim<N>) no
+       ChromaDB e, com VECTOR_BACKEND=local/ivfpq, no índice local
+    3) Só então salva a projeção em `out_path` (troca atômica): o Model.predict com
+       RETRIEVAL_MODE=pca recarrega o arquivo pelo mtime e nunca vê a projeção nova antes
+       dos vetores projetados com ela
+    4) Mede recall@k da busca reduzida contra a busca com os vetores completos e grava
+       o relatório ao lado da projeção (.report.json)
+    """
+    # o ivfpq também lê os vetores completos da matriz do índice local
+    use_local = os.getenv("VECTOR_BACKEND", "chroma").strip().lower() in ("local", "ivfpq")
+    rng = np.random.default_rng(seed)
+
+    # 1) Amostragem em uma passada (probabilidade fixa por vetor); as linhas das consultas
+    #    do recall check ficam fora da amostra de treino
+    total = sum(len(ids) for ids, _, _ in _blocos(dim, batch, use_local))
+    if total == 0:
+        raise ValueError(f"Nenhum vetor de dimensão {dim} para ajustar a projeção.")
+    n_eval = min(n_eval, total // 2)
+    linhas_eval = np.sort(rng.choice(total, size=n_eval, replace=False))
+    p = min(1.0, train_size / max(total - n_eval, 1))
+    partes, consultas, offset = [], [], 0
+    for _, X, _ in _blocos(dim, batch, use_local):
+        fora = np.zeros(len(X), dtype=bool)
+        fora[linhas_eval[(linhas_eval >= offset) & (linhas_eval < offset + len(X))] - offset] = True
+        consultas.append(X[fora])
+        partes.append(X[~fora & (rng.random(len(X)) < p)])
+        offset += len(X)
+    amostra = np.concatenate(partes)
+    print(f"[PCA] Ajustando {n_components} componentes em {len(amostra)} de {total} vetores ...")
+
+    # Ajuste (a projeção só é salva depois das coleções reduzidas)
+    proj = Projection.fit(amostra, n_components=n_components, whiten=whiten, seed=seed)
+
+    # Consultas do recall check: vetores fora da amostra de treino, com ruído
+    q = np.concatenate(consultas)
+    q = _normalizar(q + rng.normal(scale=0.3 / np.sqrt(dim), size=q.shape).astype(np.float32))
+    q_proj = proj.transform(q)
+    vazio = lambda: (np.empty((len(q), 0), np.float32), np.empty((len(q), 0), np.int64))
+    (full_s, full_i), (red_s, red_i) = vazio(), vazio()
+
+    # 2) Coleção reduzida + top-k exato nas duas representações (recall check), bloco a bloco
+    chroma = ChromaDB()
+    offset = 0
+    for ids, X, metas in _blocos(dim, batch, use_local):
+        Z = proj.transform(X)
+        chroma.upsert_embeddings(embeddings=Z, ids=ids, metadatas=metas, dim=proj.dim, variant=VARIANT)
+        full_s, full_i = _merge_topk(full_s, full_i, q @ _normalizar(X).T, offset, k)
+        red_s, red_i = _merge_topk(red_s, red_i, q_proj @ Z.T, offset, k)
+        offset += len(ids)
+
+    if use_local:
+        reduzidos = ((ids, proj.transform(X), metas) for ids, X, metas in _blocos(dim, batch, use_local))
+        LocalVectorIndex().write(proj.dim, total, reduzidos, variant=VARIANT)
+
+    # 3) Projeção publicada por último
+    proj.save(out_path)
+
+    # 4) Relatório
+    recall = float(np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(full_i.tolist(), red_i.tolist())]))
+    relatorio = {
+        "dim_original": int(dim),
+        "dim_reduzida": proj.dim,
+        "whiten": bool(whiten),
+        "variancia_explicada": round(proj.explained_variance_ratio, 4),
+        "n_vetores": int(total),
+        "n_consultas": int(len(q)),
+        f"recall@{k}": round(recall, 4),
+        "reducao_memoria": round(dim / proj.dim, 2),
+    }
+    with open(os.path.splitext(out_path)[0] + ".report.json", "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"[DONE] {json.dumps(relatorio, ensure_ascii=False)}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    fit_projection(
+        dim=int(os.getenv("EMBED_DIM", 3072)),
+        n_components=int(os.getenv("PROJECTION_DIM", 256)),
+        whiten=os.getenv("PROJECTION_WHITEN", "false").lower() == "true",
+        out_path=os.getenv("PROJECTION_PATH", "database/index/projection_pca.npz"),
+    )
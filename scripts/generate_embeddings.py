@@ -1,119 +1,275 @@
-import os
-from typing import List, Tuple
-import redis
-from google import genai
-from google.genai import types
-import numpy as np
-from src.services.retrieve_data import ChromaDB
-from time import sleep
-
-
-def chunk_candidates_from_redis(
-    env_var: str = "REDIS_URL_2",
-    chunk_size: int = 1000,
-    scan_count: int = 1000,
-    match: str = "*",
-) -> List[List[Tuple[str, str]]]:
-    """
-    Lê todas as chaves do Redis (id do candidato) e seus valores (texto do currículo)
-    e retorna uma lista de listas, em que cada sublista contém até `chunk_size`
-    tuplas (id, texto).
-
-    Parâmetros:
-        env_var: nome da variável de ambiente com a URL do Redis (já no DB 2).
-        chunk_size: tamanho máximo de cada sublista (padrão: 1000).
-        scan_count: hint de tamanho do lote para o SCAN/MGET (padrão: 1000).
-        match: padrão de chaves para filtrar (padrão: "*").
-
-    Observações:
-        - Usa decode_responses=True para retornar strings.
-        - Chaves removidas entre SCAN e GET são ignoradas (valor None).
-        - A ordem das chaves não é garantida (SCAN é incremental). Se precisar
-          de ordem determinística, será necessário ordenar (custo extra).
-    """
-    url = os.getenv(env_var)
-    if not url:
-        raise ValueError(f"Variável de ambiente {env_var} não definida.")
-
-    r = redis.from_url(url, decode_responses=True)  # garante str em vez de bytes
-
-    chunks: List[List[Tuple[str, str]]] = []
-    atual: List[Tuple[str, str]] = []
-
-    pipe = r.pipeline()
-    buffer_keys: List[str] = []
-
-    # Itera as chaves com SCAN e busca os valores em lotes com MGET via pipeline
-    for key in r.scan_iter(match=match, count=scan_count):
-        buffer_keys.append(key)
-        if len(buffer_keys) >= scan_count:
-            pipe.mget(buffer_keys)
-            values = pipe.execute()[0]  # resultado do MGET
-            for k, v in zip(buffer_keys, values):
-                if v is None:
-                    continue
-                atual.append((k, v))
-                if len(atual) == chunk_size:
-                    chunks.append(atual)
-                    atual = []
-            buffer_keys.clear()
-
-    # Flush do último lote de chaves (se existir)
-    if buffer_keys:
-        pipe.mget(buffer_keys)
-        values = pipe.execute()[0]
-        for k, v in zip(buffer_keys, values):
-            if v is None:
-                continue
-            atual.append((k, v))
-            if len(atual) == chunk_size:
-                chunks.append(atual)
-                atual = []
-
-    # Última sublista (parcial)
-    if atual:
-        chunks.append(atual)
-
-    return chunks
-
-
-candidatos = chunk_candidates_from_redis(chunk_size=100)
-client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-contador = 0
-for chunk in candidatos:
-    ids = []
-    curriculos = []
-    for curriculo in chunk:
-        ids.append(curriculo[0]) # id
-        curriculos.append(curriculo[1]) # texto do currículo
-
-    texts = curriculos
-
-    result = [
-        np.array(e.values) for e in client.models.embed_content(
-            model=os.getenv('MODEL', 'gemini-embedding-001'),
-            contents=texts,
-            config=types.EmbedContentConfig(task_type="SEMANTIC_SIMILARITY")).embeddings
-    ]
-
-    embeddings_matrix = np.array(result)
-    #embeddings_matrix = np.array([e.values for e in result], dtype=np.float32)
-    chroma = ChromaDB()
-    chroma.upsert_embeddings(embeddings=embeddings_matrix, ids=ids)
-    contador += 100
-    print('tudo certo!', contador)
-    sleep(20)
-
-
-#client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-#texts = [
-#    r'   \n\n\ncontato\ndomingos de morais, 1368 - aptº\nluciano bessegato\n1404 - vila mariana - são paulo /sp consultor de ti na finality consultores associados\n\n- analista responsável do projeto de implantação da suíte oracle\nprincipais competências primavera p6 eppm nas empresas angloamerican, alcoa,\nmicrosoft office bradesco, braskem, ems, vale e valefértil, csn.\npython\ntecnologia da informação - administração dos produtos pfsense, zabbix, administração\nde office e sharepoint 365 e serviços de rede windows e linux\ncertifications redhat.\noracle primavera cloud solution\nengineer specialist - participação em projetos na implantação do oracle unifier.\nprimavera unifier solution engineer - trabalho analítico com o microsoft power bi, conectando os dados\nspecialist\ndo p6 a partir do azure.\nprimavera p6 eppm solution\nengineer specialist\nitil foundation certificate in it - desenvolvimento de sistema financeiro java orientado à\nservice management webcom adoção da tecnologia javaserver faces (jsf), facelets\ndesegurança, adoção de ferramentas como hibernate/jpa.\n\n\n- desenvolvimento do projeto de artigos de tecnologia, utilizando\nnodejs, javascript, vuejs, html5, css3, em base de dados\nmongodb e postgree.- conhecimento em plataformas de\ndesenvolvimento: python, java, javascript, nodejs, php, angular9,\nhtml5 e css3 -conhecimento em framework: jquery, angular,\nreact, vue,express e bootstrap.\n\n- conhecimento em base de dados: sql server, oracle database,\npostgree, mongodb e mysql.\n\n\n\nexperiência\nfinality consultores associados\nconsultor de ti\nsetembro de 2020 - present (1 ano 9 meses)\nsão paulo, são paulo, brasil\n\n- participação na migração dos dados para oracle unifier em itapu.\n\n\n  page 1 of 4\n   \n\n\n- administração do servidor\n- participação no projeto de implantação do oracle unifier para irani papel e\nembalagens\n- analista responsável na implantação do oracle primavera p6 eppm na\nusiminas.\n- analista responsável na atualização do oracle primavera p6 eppm - csn\n(engenharia).\n- analista responsável na instalação e configuração do oracle primavera\np6 eppm (águas azuis), configurando a autenticação ldap, e utilizando a\nnavegação via ssl\n\n\nverano engenharia de sistemas\nanalista de ti\nmarço de 1999 - agosto de 2020 (21 anos 6 meses)\nsão paulo, são paulo, brasil\n\nsoftware microsoft project: 2003 a server\n• banco de dados :sql server-oracle database, mysql, postgree e\nmongodb\n• elaboração do lay-out físico da empresa proporcionando maior flexibilidade e\notimização nas mudanças internas;\n• elaboração do lay-out da rede de telefonia favorecendo a manutenção e\ncontrole das ocorrências;\n• migração das versões do windows 2003 para windows 2008 r2;\n• migração do exchange 2007 para exchange 2010 windows 2008 r2;\n• participação no projeto de atualização do primavera na vale corporativo;\n• participação no projeto de instalação do primavera no bradesco corporativo;\n• manutenção e administração em base de dados sql server 2005 e oracle;\n• responsável pela instalação/configuração do primavera p6 eppm,\ncontemplando a suíte também foi instalado configurado o oracle universal\ncontent management 12g e oracle bi publisher12g.\n- administração de servidores dhcp e dns em linux- administração de\nservidores apache2 e confguração com nginx\n- instalação, configuração e administração do proxy com squid.\n- instalação, configuração e administração de servidores de arquivos com\nsamba.\n- instalação, configuração e administração de servidores firewall com\niptables.\n- instalação, configuração e administração openldap.\n\n\n\n  page 2 of 4\n   \n\n\n- analista responsável em atualizar a suíte primavera na ems, onde foi\ninstalada e configurada as últimas versões do oracle primavera, oracle\nbusiness inteligence enterprise, oracle web content, sendo executados em\nred hat 7.3.\n- instalação, configuração e administração do pfsense.- instalação,\nconfiguração e adminitração do zabbix.\n- administração do office e sharepoint 365\n- sistema financeiro java orientado à web com adoção da\ntecnologiajavaserver faces (jsf), facelets de segurança, adoção de\nferramentascomo hibernate/jpa.\n- projeto de artigos de tecnologia, nodejs, javascript, vuejs, html5, css3,\nem base de dados mongodb e postgree.\n\n\ncamera municipal de getulina\nanalista de sistema\nagosto de 1996 - janeiro de 1997 (6 meses)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de consulta de leis.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\n\nsanta casa de misericórdia de getulina - sp\n1 ano 6 meses\n\nanalista de sistema\njaneiro de 1996 - junho de 1996 (6 meses)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de prontuários médicos.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\nanalista de sistema\njaneiro de 1995 - dezembro de 1995 (1 ano)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de controle da farmácia.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\n\nmicrocamp tecnologia\nprofessor\njaneiro de 1994 - dezembro de 1994 (1 ano)\npiracicaba, são paulo, brazil\n\n  page 3 of 4\n   \n\n\nministrava aula de sistema operacional\n\n\n\n\nformação acadêmica\nunilins - centro universitário de lins\npós-graduação lato sensu - especialização, análise de sistemas de\ncomputação · (dezembro de 1997)\n\n\nunilins - centro universitário de lins\ntecnólogo em processamento de dados, tecnologia da\ninformação · (dezembro de 1993)\n\n\n\n\n  page 4 of 4\n'
-#]
-#result = [
-#    np.array(e.values) for e in client.models.embed_content(
-#        model="gemini-embedding-001",
-#        contents=texts,
-#        config=types.EmbedContentConfig(task_type="SEMANTIC_SIMILARITY")).embeddings
-#]
-#
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+import redis
+import numpy as np
+from src.services.candidate_meta import metadados_vetor
+from src.services.embedding_provider import get_provider
+from src.services.retrieve_data import ChromaDB
+from src.services.embedding_scheduler import EmbeddingScheduler
+from src.services.projection import VARIANT as PROJECTION_VARIANT, get_projection
+from src.services.vector_store import truncar
+
+
+def iter_candidate_pages(
+    r: redis.Redis,
+    cursor: int = 0,
+    scan_count: int = 1000,
+    match: str = "*",
+) -> Iterator[Tuple[int, List[Tuple[str, str]]]]:
+    """
+    Percorre o DB 2 do Redis (id do candidato -> texto do currículo) página a página,
+    sem materializar a base: para cada página do SCAN, faz um MGET e gera
+    (cursor_seguinte, [(id, texto), ...]).
+
+    Parâmetros:
+        r: cliente Redis do DB 2 (com decode_responses=True).
+        cursor: cursor do SCAN de onde começar (0 = início; usado para retomar).
+        scan_count: hint de tamanho da página do SCAN/MGET (padrão: 1000).
+        match: padrão de chaves para filtrar (padrão: "*").
+
+    Observações:
+        - Chaves removidas entre SCAN e GET são ignoradas (valor None).
+        - A ordem das chaves não é garantida (SCAN é incremental), mas o cursor
+          é estável: retomar a partir dele cobre as chaves que ainda não vieram.
+    """
+    while True:
+        cursor, keys = r.scan(cursor=cursor, match=match, count=scan_count)
+        pares = []
+        if keys:
+            values = r.mget(keys)
+            pares = [(k, v) for k, v in zip(keys, values) if v is not None]
+        yield cursor, pares
+        if cursor == 0:
+            return
+
+
+def content_hash(model: str, texto: str) -> str:
+    """Hash do conteúdo embedado: muda se o currículo ou o modelo mudarem."""
+    return hashlib.sha256(f"{model}\x00SEMANTIC_SIMILARITY\x00{texto}".encode("utf-8")).hexdigest()
+
+
+def meta_hash(metadados: Dict) -> str:
+    """Hash dos metadados gravados junto do vetor (área, nível, local): não exigem reembedar."""
+    return hashlib.sha256(json.dumps(metadados, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class Progresso:
+    """
+    Estado incremental/retomável da geração de embeddings, salvo no Redis (DB 4):
+      - embed:hash:<modelo>        hash id -> content_hash já embedado e salvo no Chroma
+      - embed:checkpoint:<modelo>  cursor do SCAN até onde tudo já foi salvo
+      - embed:meta:<modelo>        hash id -> meta_hash dos metadados gravados com o vetor
+
+    Uma página do SCAN só conta como concluída quando todos os seus candidatos
+    pendentes foram salvos; o checkpoint avança apenas sobre páginas concluídas
+    em ordem, então uma interrupção nunca pula candidatos.
+    """
+
+    def __init__(self, meta: redis.Redis, model: str):
+        self.meta = meta
+        self.hash_key = f"embed:hash:{model}"
+        self.checkpoint_key = f"embed:checkpoint:{model}"
+        self.meta_key = f"embed:meta:{model}"
+        self._lock = threading.RLock()
+        self._paginas: "OrderedDict[int, Tuple[int, set]]" = OrderedDict()  # n -> (cursor, ids pendentes)
+        self._pagina_de: Dict[str, int] = {}
+        self._hash_de: Dict[str, str] = {}
+
+    def cursor_inicial(self) -> int:
+        raw = self.meta.get(self.checkpoint_key)
+        return int(raw) if raw is not None else 0
+
+    def hashes(self, ids: List[str]) -> List[Optional[str]]:
+        if not ids:
+            return []
+        return [h.decode() if h is not None else None for h in self.meta.hmget(self.hash_key, ids)]
+
+    def meta_hashes(self, ids: List[str]) -> List[Optional[str]]:
+        if not ids:
+            return []
+        return [h.decode() if h is not None else None for h in self.meta.hmget(self.meta_key, ids)]
+
+    def gravar_meta(self, hashes: Dict[str, str]) -> None:
+        if hashes:
+            self.meta.hset(self.meta_key, mapping=hashes)
+
+    def registrar_pagina(self, n: int, cursor: int, pendentes: Dict[str, str]) -> Dict[str, str]:
+        """
+        `pendentes`: id -> content_hash dos candidatos desta página que serão embedados.
+        Retorna os que de fato foram registrados (o SCAN pode repetir chaves já em andamento).
+        """
+        with self._lock:
+            novos = {i: h for i, h in pendentes.items() if i not in self._pagina_de}
+            self._paginas[n] = (cursor, set(novos))
+            for _id, h in novos.items():
+                self._pagina_de[_id] = n
+                self._hash_de[_id] = h
+            self._avancar()
+            return novos
+
+    def concluir(self, ids: List[str]) -> None:
+        """Chamado após o upsert no Chroma: grava os hashes e libera as páginas."""
+        with self._lock:
+            self.meta.hset(self.hash_key, mapping={i: self._hash_de.pop(i) for i in ids})
+            for _id in ids:
+                self._paginas[self._pagina_de.pop(_id)][1].discard(_id)
+            self._avancar()
+
+    def _avancar(self) -> None:
+        """Salva o cursor da última página concluída em sequência."""
+        cursor = None
+        while self._paginas:
+            n, (c, pendentes) = next(iter(self._paginas.items()))
+            if pendentes:
+                break
+            self._paginas.popitem(last=False)
+            cursor = c
+        if cursor is None:
+            return
+        if cursor == 0:
+            self.meta.delete(self.checkpoint_key)  # varredura completa: próxima execução recomeça
+        else:
+            self.meta.set(self.checkpoint_key, cursor)
+
+
+def main():
+    """
+    Gera os embeddings dos currículos do Redis (DB 2) e salva no ChromaDB, de forma
+    incremental e retomável:
+      - candidatos cujo currículo e modelo não mudaram (mesmo content_hash) e que já
+        estão na coleção são pulados
+      - as chaves são lidas em streaming (página a página do SCAN)
+      - o progresso é salvo em checkpoint; uma execução interrompida continua de
+        onde parou (EMBED_RESUME=false força recomeçar a varredura)
+
+    O ritmo é controlado pelo EmbeddingScheduler em vez de lotes fixos + sleep:
+      - EMBED_RPM / EMBED_TPM: cotas de requisições e tokens por minuto
+      - EMBED_CONCURRENCY: requisições simultâneas em voo
+      - EMBED_BATCH_SIZE / EMBED_MAX_TOKENS_PER_REQUEST: tamanho máximo de cada requisição
+
+    Com REDIS_URL_3 definido, os metadados do candidato (área, nível, local, gravados pelo
+    load_applicants) vão junto de cada vetor: é o que permite filtrar a busca por área.
+    Candidatos com o currículo igual mas metadados diferentes dos já gravados (meta_hash)
+    não são reembedados: só os metadados das coleções são atualizados.
+    """
+    for env_var in ("REDIS_URL_2", "REDIS_URL_4"):
+        if not os.getenv(env_var):
+            raise ValueError(f"Variável de ambiente {env_var} não definida.")
+
+    provider = get_provider()  # EMBEDDING_PROVIDER: gemini (padrão) ou local
+    model = provider.model_name
+    dim = int(os.getenv('EMBED_DIM', 3072))
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+
+    r = redis.from_url(os.getenv("REDIS_URL_2"), decode_responses=True)  # garante str em vez de bytes
+    progresso = Progresso(redis.from_url(os.getenv("REDIS_URL_4")), model)
+    perfis = redis.from_url(os.getenv("REDIS_URL_3"), decode_responses=True) if os.getenv("REDIS_URL_3") else None
+
+    cursor = progresso.cursor_inicial() if os.getenv('EMBED_RESUME', 'true').lower() != 'false' else 0
+    if cursor:
+        print(f'[RESUME] retomando a partir do cursor {cursor}')
+
+    def embed(textos: List[str]) -> List[np.ndarray]:
+        return provider.embed(textos, "SEMANTIC_SIMILARITY")
+
+    two_stage = os.getenv('RETRIEVAL_MODE', 'single').lower() == 'two_stage'
+    truncate_dim = int(os.getenv('TRUNCATE_DIM', 768))
+    projecao = get_projection()
+
+    def metadados(ids: List[str]) -> Optional[List[Dict]]:
+        if perfis is None:
+            return None  # upsert_embeddings usa só {"candidate_id": id}
+        return [metadados_vetor(i, json.loads(p) if p else None) for i, p in zip(ids, perfis.mget(ids))]
+
+    def atualizar_metadados(ids: List[str], metas: List[Dict]) -> None:
+        chroma.update_metadatas(ids, metas, dim)
+        if two_stage:
+            chroma.update_metadatas(ids, metas, truncate_dim)
+        if projecao is not None:
+            chroma.update_metadatas(ids, metas, projecao.dim, PROJECTION_VARIANT)
+
+    def upsert(ids: List[str], embeddings_matrix: np.ndarray) -> None:
+        metas = metadados(ids)
+        chroma.upsert_embeddings(embeddings=embeddings_matrix, ids=ids, metadatas=metas)
+        if two_stage:
+            # mantém a coleção truncada da busca em dois estágios em dia
+            chroma.upsert_embeddings(embeddings=truncar(embeddings_matrix, truncate_dim), ids=ids, metadatas=metas)
+        if projecao is not None:
+            # idem para a coleção reduzida por PCA
+            chroma.upsert_embeddings(
+                embeddings=projecao.transform(embeddings_matrix), ids=ids, metadatas=metas, variant=PROJECTION_VARIANT
+            )
+        progresso.concluir(ids)
+        if metas is not None:
+            progresso.gravar_meta({i: meta_hash(md) for i, md in zip(ids, metas)})
+        print('tudo certo!', len(ids))
+
+    pulados = 0
+    metadados_atualizados = 0
+
+    def pendentes():
+        """Gera só os (id, texto) que precisam ser (re)embedados."""
+        nonlocal pulados, metadados_atualizados
+        for n, (proximo, pares) in enumerate(iter_candidate_pages(r, cursor=cursor)):
+            ids = [i for i, _ in pares]
+            novos = {i: content_hash(model, t) for i, t in pares}
+            iguais = [i for i, h in zip(ids, progresso.hashes(ids)) if h == novos[i]]
+            if iguais:
+                # hash igual só basta se o vetor ainda estiver na coleção
+                presentes = list(col.get(ids=iguais, include=[]).get("ids", []))
+                for i in presentes:
+                    del novos[i]
+                pulados += len(presentes)
+
+                metas = metadados(presentes) if presentes else None
+                if metas is not None:
+                    # currículo igual, metadados (área/nível/local) alterados: sem reembedar
+                    mudaram = [(i, md) for i, md, h in zip(presentes, metas, progresso.meta_hashes(presentes))
+                               if h != meta_hash(md)]
+                    if mudaram:
+                        atualizar_metadados([i for i, _ in mudaram], [md for _, md in mudaram])
+                        progresso.gravar_meta({i: meta_hash(md) for i, md in mudaram})
+                        metadados_atualizados += len(mudaram)
+
+            novos = progresso.registrar_pagina(n, proximo, novos)
+            for _id, texto in pares:
+                if _id in novos:
+                    yield _id, texto
+
+    scheduler = EmbeddingScheduler(
+        embed_fn=embed,
+        upsert_fn=upsert,
+        rpm=float(os.getenv('EMBED_RPM', 100)),
+        tpm=float(os.getenv('EMBED_TPM', 300_000)),
+        concorrencia=int(os.getenv('EMBED_CONCURRENCY', 4)),
+        max_itens=int(os.getenv('EMBED_BATCH_SIZE', 100)),
+        max_tokens=int(os.getenv('EMBED_MAX_TOKENS_PER_REQUEST', 100_000)),
+    )
+
+    stats = scheduler.run(pendentes())
+    stats["pulados"] = pulados
+    stats["metadados_atualizados"] = metadados_atualizados
+    print('[DONE]', stats)
+
+
+if __name__ == "__main__":
+    main()
+
+
+#client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+#texts = [
+#    r'   \n\n\ncontato\ndomingos de morais, 1368 - aptº\nluciano bessegato\n1404 - vila mariana - são paulo /sp consultor de ti na finality consultores associados\n\n- analista responsável do projeto de implantação da suíte oracle\nprincipais competências primavera p6 eppm nas empresas angloamerican, alcoa,\nmicrosoft office bradesco, braskem, ems, vale e valefértil, csn.\npython\ntecnologia da informação - administração dos produtos pfsense, zabbix, administração\nde office e sharepoint 365 e serviços de rede windows e linux\ncertifications redhat.\noracle primavera cloud solution\nengineer specialist - participação em projetos na implantação do oracle unifier.\nprimavera unifier solution engineer - trabalho analítico com o microsoft power bi, conectando os dados\nspecialist\ndo p6 a partir do azure.\nprimavera p6 eppm solution\nengineer specialist\nitil foundation certificate in it - desenvolvimento de sistema financeiro java orientado à\nservice management webcom adoção da tecnologia javaserver faces (jsf), facelets\ndesegurança, adoção de ferramentas como hibernate/jpa.\n\n\n- desenvolvimento do projeto de artigos de tecnologia, utilizando\nnodejs, javascript, vuejs, html5, css3, em base de dados\nmongodb e postgree.- conhecimento em plataformas de\ndesenvolvimento: python, java, javascript, nodejs, php, angular9,\nhtml5 e css3 -conhecimento em framework: jquery, angular,\nreact, vue,express e bootstrap.\n\n- conhecimento em base de dados: sql server, oracle database,\npostgree, mongodb e mysql.\n\n\n\nexperiência\nfinality consultores associados\nconsultor de ti\nsetembro de 2020 - present (1 ano 9 meses)\nsão paulo, são paulo, brasil\n\n- participação na migração dos dados para oracle unifier em itapu.\n\n\n  page 1 of 4\n   \n\n\n- administração do servidor\n- participação no projeto de implantação do oracle unifier para irani papel e\nembalagens\n- analista responsável na implantação do oracle primavera p6 eppm na\nusiminas.\n- analista responsável na atualização do oracle primavera p6 eppm - csn\n(engenharia).\n- analista responsável na instalação e configuração do oracle primavera\np6 eppm (águas azuis), configurando a autenticação ldap, e utilizando a\nnavegação via ssl\n\n\nverano engenharia de sistemas\nanalista de ti\nmarço de 1999 - agosto de 2020 (21 anos 6 meses)\nsão paulo, são paulo, brasil\n\nsoftware microsoft project: 2003 a server\n• banco de dados :sql server-oracle database, mysql, postgree e\nmongodb\n• elaboração do lay-out físico da empresa proporcionando maior flexibilidade e\notimização nas mudanças internas;\n• elaboração do lay-out da rede de telefonia favorecendo a manutenção e\ncontrole das ocorrências;\n• migração das versões do windows 2003 para windows 2008 r2;\n• migração do exchange 2007 para exchange 2010 windows 2008 r2;\n• participação no projeto de atualização do primavera na vale corporativo;\n• participação no projeto de instalação do primavera no bradesco corporativo;\n• manutenção e administração em base de dados sql server 2005 e oracle;\n• responsável pela instalação/configuração do primavera p6 eppm,\ncontemplando a suíte também foi instalado configurado o oracle universal\ncontent management 12g e oracle bi publisher12g.\n- administração de servidores dhcp e dns em linux- administração de\nservidores apache2 e confguração com nginx\n- instalação, configuração e administração do proxy com squid.\n- instalação, configuração e administração de servidores de arquivos com\nsamba.\n- instalação, configuração e administração de servidores firewall com\niptables.\n- instalação, configuração e administração openldap.\n\n\n\n  page 2 of 4\n   \n\n\n- analista responsável em atualizar a suíte primavera na ems, onde foi\ninstalada e configurada as últimas versões do oracle primavera, oracle\nbusiness inteligence enterprise, oracle web content, sendo executados em\nred hat 7.3.\n- instalação, configuração e administração do pfsense.- instalação,\nconfiguração e adminitração do zabbix.\n- administração do office e sharepoint 365\n- sistema financeiro java orientado à web com adoção da\ntecnologiajavaserver faces (jsf), facelets de segurança, adoção de\nferramentascomo hibernate/jpa.\n- projeto de artigos de tecnologia, nodejs, javascript, vuejs, html5, css3,\nem base de dados mongodb e postgree.\n\n\ncamera municipal de getulina\nanalista de sistema\nagosto de 1996 - janeiro de 1997 (6 meses)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de consulta de leis.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\n\nsanta casa de misericórdia de getulina - sp\n1 ano 6 meses\n\nanalista de sistema\njaneiro de 1996 - junho de 1996 (6 meses)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de prontuários médicos.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\nanalista de sistema\njaneiro de 1995 - dezembro de 1995 (1 ano)\ngetulina, são paulo, brazil\n\ndesenvolvimento e implantação do sistema de controle da farmácia.\nutilizando a linguagem clipper para a implantação do sistema, e realizando\ntoda documentação da análise realizada.\n\n\nmicrocamp tecnologia\nprofessor\njaneiro de 1994 - dezembro de 1994 (1 ano)\npiracicaba, são paulo, brazil\n\n  page 3 of 4\n   \n\n\nministrava aula de sistema operacional\n\n\n\n\nformação acadêmica\nunilins - centro universitário de lins\npós-graduação lato sensu - especialização, análise de sistemas de\ncomputação · (dezembro de 1997)\n\n\nunilins - centro universitário de lins\ntecnólogo em processamento de dados, tecnologia da\ninformação · (dezembro de 1993)\n\n\n\n\n  page 4 of 4\n'
+#]
+#result = [
+#    np.array(e.values) for e in client.models.embed_content(
+#        model="gemini-embedding-001",
+#        contents=texts,
+#        config=types.EmbedContentConfig(task_type="SEMANTIC_SIMILARITY")).embeddings
+#]
+#
 #print(result)
\ No newline at end of file
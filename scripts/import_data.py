@@ -1,121 +1,206 @@
-# import_chroma_safe.py (ou no mesmo arquivo onde você já tem o import)
-import json
-from typing import List
-from src.services.retrieve_data import ChromaDB
-
-def _safe_upsert(col, ids: List[str], embs: List[list], metas: List[dict]):
-    """Upsert com fallback: se 413 (payload muito grande), divide o lote recursivamente."""
-    if not ids:
-        return
-    try:
-        col.upsert(ids=ids, embeddings=embs, metadatas=metas)
-    except Exception as e:
-        msg = str(e).lower()
-        if "payload too large" in msg or "413" in msg:
-            if len(ids) == 1:
-                raise
-            mid = len(ids) // 2
-            _safe_upsert(col, ids[:mid], embs[:mid], metas[:mid])
-            _safe_upsert(col, ids[mid:], embs[mid:], metas[mid:])
-        else:
-            raise
-
-def should_skip_import(dim: int, in_path: str, sample: int = 10, require_all: bool = True) -> bool:
-    """
-    Retorna True se devemos pular o import.
-    Estratégia:
-      1) Se a coleção está vazia (count==0) -> NÃO pula.
-      2) Se a coleção tem itens, lê até `sample` linhas do arquivo, pega os IDs e
-         verifica se eles já existem. Se todos (require_all=True) existirem -> pula.
-         Caso contrário -> importa (upsert atualizará o que já existe).
-    """
-    chroma = ChromaDB()
-    col = chroma._get_or_create_collection(dim)
-    total = col.count()
-    if total == 0:
-        return False  # não tem nada, precisamos importar
-
-    # Coleta amostra de IDs do arquivo (sem carregar tudo)
-    sample_ids = []
-    with open(in_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                rec = json.loads(line)
-                sample_ids.append(str(rec["id"]))
-                if len(sample_ids) >= sample:
-                    break
-            except Exception:
-                # linha inválida/ruim -> ignora
-                continue
-
-    if not sample_ids:
-        # arquivo vazio ou ilegível -> não há o que importar
-        return True
-
-    got = col.get(ids=sample_ids)  # retorna somente os que existirem
-    existing_ids = set(got.get("ids", []))
-
-    if require_all:
-        # só pula se TODOS da amostra já existem
-        return all(i in existing_ids for i in sample_ids)
-    else:
-        # pula se >=80% da amostra já existe
-        return len(existing_ids.intersection(sample_ids)) / len(sample_ids) >= 0.8
-
-def import_collection_jsonl(
-    dim: int,
-    in_path: str,
-    batch: int = 200,
-    skip_if_present: bool = True,
-    sample_check: int = 10,
-    require_all_sample: bool = True,
-):
-    """
-    Importa JSONL para a coleção `dim`.
-    - `skip_if_present`: se True, verifica se já existem dados e dá skip.
-    - `sample_check`: tamanho da amostra de IDs usada na verificação.
-    - `require_all_sample`: se True, só dá skip se TODOS IDs da amostra existirem.
-    """
-    chroma = ChromaDB()
-    col = chroma._get_or_create_collection(dim)
-    col_name = chroma._collection_name(dim)
-
-    if skip_if_present and should_skip_import(dim, in_path, sample=sample_check, require_all=require_all_sample):
-        print(f"[SKIP] Import ignorado: coleção '{col_name}' já possui dados compatíveis com '{in_path}'.")
-        return
-
-    print(f"[IMPORT] Iniciando import para coleção '{col_name}' a partir de '{in_path}' ...")
-    ids, embs, metas = [], [], []
-    total_lines = 0
-    with open(in_path, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            rec = json.loads(line)
-            ids.append(str(rec["id"]))
-            embs.append(rec["embedding"])          # lista de floats vinda do JSONL
-            metas.append(rec.get("metadata", {}))
-            total_lines += 1
-
-            if len(ids) >= batch:
-                _safe_upsert(col, ids, embs, metas)
-                print(f"[IMPORT] Upsert de {len(ids)} itens (parcial).")
-                ids, embs, metas = [], [], []
-
-    if ids:
-        _safe_upsert(col, ids, embs, metas)
-        print(f"[IMPORT] Upsert final de {len(ids)} itens.")
-
-    print(f"[DONE] Import concluído para '{col_name}'. Registros lidos: {total_lines}.")
-
-
-import_collection_jsonl(
-        dim=3072,
-        in_path="database/candidates_dim3072.jsonl",
-        batch=1000,                 # ajuste conforme memória/rede
-        skip_if_present=True,      # <- evita reimportar
-        sample_check=10,           # lê 10 IDs do arquivo
-        require_all_sample=True,   # só pula se os 10 já existirem
-    )
+# import_chroma_safe.py (ou no mesmo arquivo onde você já tem o import)
+import os
+import base64
+import json
+from typing import List
+import numpy as np
+from src.services.quantization import dequantize, unpack
+from src.services.retrieve_data import ChromaDB
+
+def _safe_upsert(col, ids: List[str], embs: List[list], metas: List[dict]):
+    """Upsert com fallback: se 413 (payload muito grande), divide o lote recursivamente."""
+    if not ids:
+        return
+    try:
+        col.upsert(ids=ids, embeddings=embs, metadatas=metas)
+    except Exception as e:
+        msg = str(e).lower()
+        if "payload too large" in msg or "413" in msg:
+            if len(ids) == 1:
+                raise
+            mid = len(ids) // 2
+            _safe_upsert(col, ids[:mid], embs[:mid], metas[:mid])
+            _safe_upsert(col, ids[mid:], embs[mid:], metas[mid:])
+        else:
+            raise
+
+def _embedding(rec: dict) -> np.ndarray:
+    """Vetor float32 de um registro JSONL: bytes em base64 (embedding_b64) ou lista de floats (formato antigo)."""
+    if "embedding_b64" in rec:
+        return unpack(base64.b64decode(rec["embedding_b64"]), rec.get("precision", "float32"))
+    return np.asarray(rec["embedding"], dtype=np.float32)
+
+def should_skip_import(dim: int, in_path: str, sample: int = 10, require_all: bool = True) -> bool:
+    """
+    Retorna True se devemos pular o import.
+    Estratégia:
+      1) Se a coleção está vazia (count==0) -> NÃO pula.
+      2) Se a coleção tem itens, lê até `sample` linhas do arquivo, pega os IDs e
+         verifica se eles já existem. Se todos (require_all=True) existirem -> pula.
+         Caso contrário -> importa (upsert atualizará o que já existe).
+    """
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+    total = col.count()
+    if total == 0:
+        return False  # não tem nada, precisamos importar
+
+    # Snapshot binário: os IDs ficam no sidecar .meta.jsonl
+    if in_path.endswith(".npy"):
+        in_path = in_path[:-len(".npy")] + ".meta.jsonl"
+
+    # Coleta amostra de IDs do arquivo (sem carregar tudo)
+    sample_ids = []
+    with open(in_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                sample_ids.append(str(rec["id"]))
+                if len(sample_ids) >= sample:
+                    break
+            except Exception:
+                # linha inválida/ruim -> ignora
+                continue
+
+    if not sample_ids:
+        # arquivo vazio ou ilegível -> não há o que importar
+        return True
+
+    got = col.get(ids=sample_ids)  # retorna somente os que existirem
+    existing_ids = set(got.get("ids", []))
+
+    if require_all:
+        # só pula se TODOS da amostra já existem
+        return all(i in existing_ids for i in sample_ids)
+    else:
+        # pula se >=80% da amostra já existe
+        return len(existing_ids.intersection(sample_ids)) / len(sample_ids) >= 0.8
+
+def import_collection_jsonl(
+    dim: int,
+    in_path: str,
+    batch: int = 200,
+    skip_if_present: bool = True,
+    sample_check: int = 10,
+    require_all_sample: bool = True,
+):
+    """
+    Importa JSONL para a coleção `dim`.
+    - `skip_if_present`: se True, verifica se já existem dados e dá skip.
+    - `sample_check`: tamanho da amostra de IDs usada na verificação.
+    - `require_all_sample`: se True, só dá skip se TODOS IDs da amostra existirem.
+    """
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+    col_name = chroma._collection_name(dim)
+
+    if skip_if_present and should_skip_import(dim, in_path, sample=sample_check, require_all=require_all_sample):
+        print(f"[SKIP] Import ignorado: coleção '{col_name}' já possui dados compatíveis com '{in_path}'.")
+        return
+
+    print(f"[IMPORT] Iniciando import para coleção '{col_name}' a partir de '{in_path}' ...")
+    ids, embs, metas = [], [], []
+    total_lines = 0
+    with open(in_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            ids.append(str(rec["id"]))
+            embs.append(_embedding(rec))
+            metas.append(rec.get("metadata", {}))
+            total_lines += 1
+
+            if len(ids) >= batch:
+                _safe_upsert(col, ids, embs, metas)
+                print(f"[IMPORT] Upsert de {len(ids)} itens (parcial).")
+                ids, embs, metas = [], [], []
+
+    if ids:
+        _safe_upsert(col, ids, embs, metas)
+        print(f"[IMPORT] Upsert final de {len(ids)} itens.")
+
+    print(f"[DONE] Import concluído para '{col_name}'. Registros lidos: {total_lines}.")
+
+
+def import_collection_npy(
+    dim: int,
+    in_prefix: str,
+    batch: int = 1000,
+    skip_if_present: bool = True,
+    sample_check: int = 10,
+    require_all_sample: bool = True,
+):
+    """
+    Importa um snapshot binário (ver export_data.export_collection_npy) para a coleção `dim`.
+    - <in_prefix>.npy é aberto com memory-map: só as fatias do lote corrente são lidas do disco
+    - <in_prefix>.meta.jsonl traz id e metadata de cada linha, na mesma ordem
+    Os parâmetros de skip funcionam como em `import_collection_jsonl`.
+    """
+    chroma = ChromaDB()
+    col = chroma._get_or_create_collection(dim)
+    col_name = chroma._collection_name(dim)
+    npy_path = f"{in_prefix}.npy"
+
+    if skip_if_present and should_skip_import(dim, npy_path, sample=sample_check, require_all=require_all_sample):
+        print(f"[SKIP] Import ignorado: coleção '{col_name}' já possui dados compatíveis com '{npy_path}'.")
+        return
+
+    mat = np.load(npy_path, mmap_mode="r")
+    if mat.ndim != 2 or mat.shape[1] != int(dim):
+        raise ValueError(f"Snapshot '{npy_path}' tem shape {mat.shape}, esperado [N, {dim}].")
+    # Snapshots float16/int8 (VECTOR_PRECISION no export) voltam para float32 lote a lote
+    escala = np.load(f"{in_prefix}.scale.npy", mmap_mode="r") if mat.dtype == np.int8 else None
+
+    def fatia(a: int, b: int) -> np.ndarray:
+        return dequantize(mat[a:b], None if escala is None else escala[a:b])
+
+    print(f"[IMPORT] Iniciando import para coleção '{col_name}' a partir de '{npy_path}' ({mat.shape[0]} linhas) ...")
+    ids, metas = [], []
+    row = 0
+    with open(f"{in_prefix}.meta.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            ids.append(str(rec["id"]))
+            metas.append(rec.get("metadata") or {})
+
+            if len(ids) >= batch:
+                _safe_upsert(col, ids, fatia(row, row + len(ids)), metas)
+                print(f"[IMPORT] Upsert de {len(ids)} itens (parcial).")
+                row += len(ids)
+                ids, metas = [], []
+
+    if ids:
+        _safe_upsert(col, ids, fatia(row, row + len(ids)), metas)
+        print(f"[IMPORT] Upsert final de {len(ids)} itens.")
+        row += len(ids)
+
+    if row != mat.shape[0]:
+        raise ValueError(f"Sidecar com {row} linhas, mas a matriz tem {mat.shape[0]}.")
+    print(f"[DONE] Import concluído para '{col_name}'. Registros lidos: {row}.")
+
+
+if __name__ == "__main__":
+    # Prefere o snapshot binário (memory-map, sem parse de texto); o JSONL fica como intercâmbio
+    if os.path.exists("database/candidates_dim3072.npy"):
+        import_collection_npy(
+            dim=3072,
+            in_prefix="database/candidates_dim3072",
+            batch=1000,
+            skip_if_present=True,
+            sample_check=10,
+            require_all_sample=True,
+        )
+    else:
+        import_collection_jsonl(
+            dim=3072,
+            in_path="database/candidates_dim3072.jsonl",
+            batch=1000,                 # ajuste conforme memória/rede
+            skip_if_present=True,      # <- evita reimportar
+            sample_check=10,           # lê 10 IDs do arquivo
+            require_all_sample=True,   # só pula se os 10 já existirem
+        )
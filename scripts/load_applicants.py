@@ -0,0 +1,36 @@
+# Carrega database/applicants.json no Redis (cv_pt no DB 2 e perfis indexados no DB 3)
+# e propaga os candidatos novos/alterados para o índice léxico, se ele existir
+from scripts.build_lexical_index import update_lexical_index
+from src.services.Data import Data
+from src.services.lexical_index import BM25Index
+
+
+def load_applicants_json(in_path: str, skip_if_present: bool = True) -> None:
+    """
+    Constrói o índice de perfis de candidatos usado pelo /predict.
+    - `skip_if_present`: se True e o DB 3 já tiver perfis, não recarrega o arquivo.
+    Se o índice léxico já existir, os candidatos novos/alterados são atualizados nele.
+    """
+    dados = Data()
+
+    if skip_if_present and dados.perfis_carregados():
+        print("[SKIP] Perfis de candidatos já indexados no Redis (DB 3).")
+        return
+
+    print(f"[APPLICANTS] Indexando perfis a partir de '{in_path}' ...")
+    with open(in_path, "rb") as f:  # leitura em streaming (binário, UTF-8)
+        resumo = dados.load_applicants(f)
+    print(f"[DONE] {resumo['total']} perfis indexados em {resumo['lotes']} lotes, "
+          f"{resumo['segundos']}s ({resumo['por_segundo']} registros/s).")
+
+    if resumo["alterados"] and BM25Index().exists():
+        lexico = update_lexical_index(resumo["alterados"])
+        print(f"[LEXICAL-INDEX] {len(resumo['alterados'])} candidatos novos/alterados atualizados "
+              f"({lexico['segmentos']} segmentos).")
+
+
+if __name__ == "__main__":
+    load_applicants_json(
+        in_path="database/applicants.json",
+        skip_if_present=True,   # <- evita reindexar a cada boot
+    )
@@ -1,2 +1,84 @@
-# src/extensions.py
-# Este arquivo ficará para futuras extensões (ex: ChromaDB, cache, etc.)
\ No newline at end of file
+# src/extensions.py
+# Serviços com escopo de aplicação: criados uma vez por worker e reaproveitados entre requisições.
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import redis
+from flask import Flask, current_app
+
+from src.services.Data import Data
+from src.services.gemini_api import Model
+from src.services.lexical_index import BM25Index
+from src.services.log import Log
+from src.services.match_matrix import MatchMatrix
+from src.services.result_cache import ResultCache
+from src.services.retrieve_data import ChromaDB
+
+
+class Services:
+    """
+    Objetos de serviço compartilhados pelas rotas de um worker:
+      - data: Data (clientes Redis sobre os pools por processo de redis_pool)
+      - model: Model (provedor de embeddings/cliente Gemini e cache de embeddings)
+      - log: Log (fila + sessão HTTP com pool para o MLflow)
+      - results: ResultCache (rankings do /predict no Redis)
+      - lexical: BM25Index (índice léxico memory-mapped do modo híbrido)
+      - matches: MatchMatrix (rankings vaga x candidato pré-computados no Redis)
+
+    Todos são seguros para uso concorrente entre threads (não guardam estado por requisição).
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.data = Data()
+        self.model = Model()
+        self.log = Log()
+        self.results = ResultCache()
+        self.lexical = BM25Index()
+        self.matches = MatchMatrix()
+
+    def health(self) -> Dict[str, Any]:
+        """
+        PING em cada DB do Redis (pelos pools compartilhados) e heartbeat do ChromaDB quando
+        ele é o backend vetorial. O MLflow não entra: o log é assíncrono e não afeta o /predict.
+        """
+        checks: Dict[str, Any] = {}
+        clientes = {f"redis_db{i}": getattr(self.data, f"redis_db{i}") for i in range(4)}
+        if self.model.cache.redis is not None:
+            clientes["redis_cache"] = self.model.cache.redis
+        for nome, cliente in clientes.items():
+            try:
+                checks[nome] = "ok" if cliente.ping() else "fail"
+            except redis.RedisError as e:
+                checks[nome] = f"fail: {e}"
+
+        if os.getenv("VECTOR_BACKEND", "chroma").strip().lower() == "chroma":
+            try:
+                ChromaDB()._client.heartbeat()
+                checks["chroma"] = "ok"
+            except Exception as e:
+                checks["chroma"] = f"fail: {e}"
+
+        ok = all(v == "ok" for v in checks.values())
+        return {"status": "ok" if ok else "degraded", "pid": self.pid, "checks": checks}
+
+
+_lock = threading.Lock()
+
+
+def get_services(app: Optional[Flask] = None) -> Services:
+    """
+    Serviços do worker atual, criados na primeira chamada e registrados em
+    `app.extensions["services"]`: o create_app não abre conexões (Redis, Gemini, MLflow).
+    Se o processo mudou desde a criação (ex.: uso no master com `gunicorn --preload`),
+    recria no worker: clientes de rede não atravessam o fork.
+    """
+    app = app or current_app._get_current_object()
+    services = app.extensions.get("services")
+    if services is None or services.pid != os.getpid():
+        with _lock:
+            services = app.extensions.get("services")
+            if services is None or services.pid != os.getpid():
+                services = app.extensions["services"] = Services()
+    return services
@@ -1,103 +1,419 @@
-from flask import Blueprint, render_template, request, jsonify, Response
-from src.services.Data import Data
-from src.services.gemini_api import Model
-from src.services.log import Log
-import requests
-
-# cria um blueprint chamado "main"
-bp = Blueprint("main", __name__)
-
-@bp.route("/")
-def index():
-    return render_template("index.html")
-
-
-@bp.route("/upload", methods=["POST"])
-def upload_files():
-    # Verifica se os arquivos estão presentes na requisição
-    if "vagas" not in request.files:
-        return jsonify({"error": "O arquivo de vaga e obrigatorio."}), 400
-
-    vagas_file = request.files["vagas"]
-    # Verifica se os arquivos têm extensão .json
-    if not vagas_file.filename.endswith(".json"):
-        return jsonify({"error": "O arquivo deve ser no formato .json."}), 400
-    
-    try:
-        loader = Data()
-
-        # Carrega vagas e candidados no Redis
-        loader.load_vagas(vagas_file)
-
-        return jsonify({
-            "message": "Arquivo recebido e vagas salvas no Redis com sucesso!",
-            "vagas_filename": vagas_file.filename,
-        }), 200
-    
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-
-@bp.route("/predict", methods=["POST"])
-def predict():
-    # Garantir que o body é JSON
-    if not request.is_json:
-        return jsonify({"error": "O corpo da requisicao deve ser um JSON."}), 400
-
-    data = request.get_json(silent=True)
-
-    if data is None:
-        return jsonify({"error": "JSON invalido."}), 400
-
-    # Extrair campos
-    vaga_id = data.get("job_id")
-    k = data.get("k")
-
-    # Validações
-    if not vaga_id or not isinstance(vaga_id, str):
-        return jsonify({"error": "Campo 'job_id' e obrigatorio e deve ser uma string."}), 400
-
-    if k is None:
-        return jsonify({"error": "Campo 'k' é obrigatorio."}), 400
-
-    try:
-        k = int(k)
-        if k <= 0:
-            return jsonify({"error": "Campo 'k' deve ser um inteiro positivo."}), 400
-    except (ValueError, TypeError):
-        return jsonify({"error": "Campo 'k' deve ser um numero inteiro."}), 400
-
-
-    dados = Data()
-    model = Model()
-    log = Log()
-    t0 = log.timed()
-
-    descricao_vaga = dados.get_vaga_descricao(vaga_id)
-    output_model = model.predict(descricao_vaga, k)
-    similaridades = output_model['similarities'][0]
-    candidatos_id = output_model['ids'][0]
-
-    candidatos_json = dados.get_candidatos(candidatos_id)
-
-    log.log(duration_ms=log.timed()-t0, similarities=similaridades, k=k)
-    return Response(candidatos_json, status=200, mimetype="application/json")
-
-
-@bp.route("/metrics", methods=["GET"])
-def metrics():
-    try:
-        include_history = (request.args.get("history", "true").lower() != "false")
-        cap = int(request.args.get("cap", 1000))
-    except Exception:
-        include_history, cap = True, 1000
-
-    try:
-        data = Log.fetch_all(include_history=include_history, cap_history=cap)
-        return jsonify(data), 200
-    except requests.RequestException as e:
-        # MLflow fora do ar, timeout, etc.
-        return jsonify({"error": "mlflow_unreachable", "detail": str(e)}), 503
-    except Exception as e:
-        return jsonify({"error": "unexpected", "detail": str(e)}), 500
-
+from flask import Blueprint, render_template, request, jsonify, Response
+from src.extensions import get_services
+from src.services.candidate_meta import slugs
+from src.services.lexical_index import rrf
+from src.services.local_index import LocalVectorIndex
+from src.services.log import Log
+from src.services.tracing import get_tracer
+import requests
+import base64
+import json
+import os
+
+# cria um blueprint chamado "main"
+bp = Blueprint("main", __name__)
+
+@bp.route("/")
+def index():
+    return render_template("index.html")
+
+
+@bp.route("/upload", methods=["POST"])
+def upload_files():
+    # Verifica se os arquivos estão presentes na requisição
+    if "vagas" not in request.files:
+        return jsonify({"error": "O arquivo de vaga e obrigatorio."}), 400
+
+    vagas_file = request.files["vagas"]
+    # Verifica se os arquivos têm extensão .json
+    if not vagas_file.filename.endswith(".json"):
+        return jsonify({"error": "O arquivo deve ser no formato .json."}), 400
+    
+    # Pré-cálculo dos embeddings das vagas (opcional): form/query "embed=true|false"
+    embed = (request.form.get("embed") or request.args.get("embed")
+             or os.getenv("PRECOMPUTE_JOB_EMBEDDINGS", "true"))
+    embed = embed.lower() != "false"
+
+    try:
+        services = get_services()
+        loader = services.data
+
+        # Carrega vagas e candidados no Redis
+        resumo = loader.load_vagas(vagas_file)
+
+        # Embeddings das vagas novas/alteradas em background: o /predict só faz a busca vetorial.
+        # Com a matriz de rankings ligada, a mesma thread também recalcula os rankings dessas vagas
+        if embed and resumo["alteradas"]:
+            descricoes = loader.get_vagas_descricoes(resumo["alteradas"])
+            if services.matches.enabled:
+                vagas = [(v, d) for v, d in zip(resumo["alteradas"], descricoes) if d is not None]
+                services.matches.atualizar_em_background(
+                    LocalVectorIndex(), services.matches.dim, vagas, services.model
+                )
+            else:
+                services.model.precompute_in_background(descricoes)
+
+        return jsonify({
+            "message": "Arquivo recebido e vagas salvas no Redis com sucesso!",
+            "vagas_filename": vagas_file.filename,
+            "vagas_total": resumo["total"],
+            "vagas_alteradas": len(resumo["alteradas"]),
+            "ingest_segundos": resumo["segundos"],
+            "ingest_por_segundo": resumo["por_segundo"],
+            "embeddings_em_background": bool(embed and resumo["alteradas"]),
+        }), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _validar_k(k):
+    """Retorna (k, None) se `k` for um inteiro positivo, senão (None, mensagem de erro)."""
+    if k is None:
+        return None, "Campo 'k' é obrigatorio."
+
+    try:
+        k = int(k)
+        if k <= 0:
+            return None, "Campo 'k' deve ser um inteiro positivo."
+    except (ValueError, TypeError):
+        return None, "Campo 'k' deve ser um numero inteiro."
+    return k, None
+
+
+# Campos que o /predict pode devolver por candidato (`fields`); "score" é a similaridade
+CAMPOS_CANDIDATO = ("id", "nome", "cv_pt", "score")
+CAMPOS_PADRAO = ("id", "nome", "cv_pt")
+
+
+def _codificar_cursor(offset: int) -> str:
+    """Cursor opaco para a próxima página do ranking (posição na lista ordenada)."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor) -> int:
+    """Posição codificada em `cursor`; ValueError se o cursor for inválido."""
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["o"])
+    except Exception:
+        raise ValueError("Campo 'cursor' invalido.")
+    if offset < 0:
+        raise ValueError("Campo 'cursor' invalido.")
+    return offset
+
+
+def _validar_saida(data):
+    """
+    Lê as opções de saída do /predict: `page_size`, `cursor`, `fields` e `format`.
+    Retorna (opcoes, None) ou (None, mensagem de erro).
+    """
+    formato = data.get("format", "json")
+    if formato not in ("json", "ndjson"):
+        return None, "Campo 'format' deve ser 'json' ou 'ndjson'."
+
+    page_size = data.get("page_size")
+    if page_size is not None:
+        page_size, erro = _validar_k(page_size)
+        if erro:
+            return None, erro.replace("'k'", "'page_size'")
+
+    cursor = data.get("cursor")
+    offset = 0
+    if cursor is not None:
+        if not isinstance(cursor, str):
+            return None, "Campo 'cursor' invalido."
+        try:
+            offset = _decodificar_cursor(cursor)
+        except ValueError as e:
+            return None, str(e)
+
+    fields = data.get("fields", CAMPOS_PADRAO)
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    if not isinstance(fields, (list, tuple)) or not fields or not all(isinstance(f, str) for f in fields):
+        return None, "Campo 'fields' deve ser uma lista de campos."
+    desconhecidos = [f for f in fields if f not in CAMPOS_CANDIDATO]
+    if desconhecidos:
+        return None, f"Campo 'fields' aceita apenas {list(CAMPOS_CANDIDATO)}; invalidos: {desconhecidos}."
+
+    return {
+        "format": formato,
+        "page_size": page_size,
+        "offset": offset,
+        "paginado": page_size is not None or cursor is not None,
+        "fields": list(dict.fromkeys(fields)),
+    }, None
+
+
+def _validar_filtro_area(data):
+    """
+    Lê `filter_area` do /predict: true (áreas da própria vaga, DB 0), false ou uma lista
+    de nomes de área. Sem o campo vale PREDICT_FILTER_AREA (padrão false).
+    Retorna (True | False | [áreas], None) ou (None, mensagem de erro).
+    """
+    filtro = data.get("filter_area")
+    if filtro is None:
+        return os.getenv("PREDICT_FILTER_AREA", "false").lower() == "true", None
+    if isinstance(filtro, bool):
+        return filtro, None
+    if isinstance(filtro, list) and filtro and all(isinstance(a, str) and a.strip() for a in filtro):
+        return filtro, None
+    return None, "Campo 'filter_area' deve ser booleano ou uma lista de areas."
+
+
+MODOS = ("vector", "hybrid")
+
+
+def _validar_modo(data):
+    """
+    Lê `mode` do /predict: "vector" (só a busca por embeddings) ou "hybrid" (embeddings + BM25
+    sobre o cv_pt, fundidos por RRF). Sem o campo vale PREDICT_MODE (padrão "vector").
+    """
+    modo = data.get("mode")
+    if modo is None:
+        modo = os.getenv("PREDICT_MODE", "vector").strip().lower()
+        return (modo if modo in MODOS else "vector"), None
+    if isinstance(modo, str) and modo.strip().lower() in MODOS:
+        return modo.strip().lower(), None
+    return None, "Campo 'mode' deve ser 'vector' ou 'hybrid'."
+
+
+@bp.route("/predict", methods=["POST"])
+def predict():
+    # Garantir que o body é JSON
+    if not request.is_json:
+        return jsonify({"error": "O corpo da requisicao deve ser um JSON."}), 400
+
+    data = request.get_json(silent=True)
+
+    if data is None:
+        return jsonify({"error": "JSON invalido."}), 400
+
+    # Extrair campos
+    vaga_id = data.get("job_id")
+    k = data.get("k")
+
+    # Validações
+    if not vaga_id or not isinstance(vaga_id, str):
+        return jsonify({"error": "Campo 'job_id' e obrigatorio e deve ser uma string."}), 400
+
+    k, erro = _validar_k(k)
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    opcoes, erro = _validar_saida(data)
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    filtro_area, erro = _validar_filtro_area(data)
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    modo, erro = _validar_modo(data)
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    services = get_services()
+    if modo == "hybrid" and not services.lexical.exists():
+        return jsonify({"error": "Modo 'hybrid' indisponivel: indice lexico nao gerado (scripts/build_lexical_index.py)."}), 503
+    dados, model, log = services.data, services.model, services.log
+    tracer = get_tracer()
+    t0 = log.timed()
+
+    with tracer.request() as etapas:
+        with tracer.span("descricao"):
+            descricao_vaga = dados.get_vaga_descricao(vaga_id)
+            # Filtro por área: a busca vetorial só considera candidatos dessas áreas (vaga sem áreas = sem filtro)
+            areas = dados.get_vaga_areas(vaga_id) if filtro_area is True else (filtro_area or [])
+        filtro = ";".join(
+            ([f"areas={','.join(slugs(areas))}"] if areas else []) + (["mode=hybrid"] if modo == "hybrid" else [])
+        )
+
+        # Ranking pré-computado da vaga (build_match_matrix.py): uma leitura de chave, sem embedding nem busca.
+        # Só vale para a busca vetorial sem filtro, que é o que a matriz guarda
+        ranking = None
+        if not filtro:
+            with tracer.span("matriz"):
+                ranking = services.matches.get(vaga_id, descricao_vaga, model.model_name, k)
+
+        # Ranking em cache (mesma vaga/descrição/modelo/filtro/versão das coleções) dispensa embedding e busca
+        if ranking is None:
+            with tracer.span("cache"):
+                ranking, versao = services.results.get(vaga_id, descricao_vaga, model.model_name, k, filtro)
+        if ranking is None:
+            profundidade = services.results.query_depth(k)
+            try:
+                output_model = model.predict(descricao_vaga, profundidade, areas=areas or None)  # spans "embedding" e "busca_vetorial"
+            except FileNotFoundError as e:
+                # backend local/ivfpq sem o bitmap de áreas (filter_area) ou sem o índice: falta gerar, não é erro do pedido
+                return jsonify({"error": str(e)}), 503
+            ranking = {"ids": output_model['ids'][0], "similarities": output_model['similarities'][0]}
+            if modo == "hybrid":
+                # BM25 pega nomes exatos (ex.: "primavera p6", "sap fi"); o score vira o da fusão RRF
+                with tracer.span("busca_lexica"):
+                    lexico = services.lexical.search(descricao_vaga, profundidade, areas=areas or None)
+                ranking = rrf([ranking["ids"], lexico["ids"]], profundidade, k=int(os.getenv("HYBRID_RRF_K", 60)))
+            services.results.set(vaga_id, descricao_vaga, model.model_name, versao,
+                                 ranking["ids"], ranking["similarities"], profundidade, filtro)
+        similaridades = ranking["similarities"][:k]
+        candidatos_id = ranking["ids"][:k]
+
+        # Página do ranking: só ela é hidratada e serializada (custo ~ page_size, não k)
+        inicio = opcoes["offset"]
+        fim = len(candidatos_id) if opcoes["page_size"] is None else min(len(candidatos_id), inicio + opcoes["page_size"])
+        pagina = [str(cid) for cid in candidatos_id[inicio:fim]]
+        scores = dict(zip(pagina, similaridades[inicio:fim]))
+        next_cursor = _codificar_cursor(fim) if fim < len(candidatos_id) else None
+        fields = opcoes["fields"]
+
+        def candidatos():
+            # Sem nome/cv_pt no `fields` o Redis nem é consultado (só ids e scores do ranking)
+            if {"nome", "cv_pt"} & set(fields):
+                perfis = dados.iter_perfis(pagina, chunk=int(os.getenv("PREDICT_HYDRATE_CHUNK", 200)),
+                                           cv_pt="cv_pt" in fields)
+            else:
+                perfis = ({"id": cid} for cid in pagina)
+            for perfil in perfis:
+                yield {f: (float(scores[perfil["id"]]) if f == "score" else perfil[f]) for f in fields}
+
+        if opcoes["format"] == "json":
+            with tracer.span("hidratacao"):
+                corpo = {"candidatos": list(candidatos())}
+                if opcoes["paginado"]:
+                    corpo["next_cursor"] = next_cursor
+                candidatos_json = json.dumps(corpo, ensure_ascii=False)
+
+        # "Carregar mais" (cursor) repete a mesma inferência: só a primeira página vai ao MLflow
+        if inicio == 0:
+            with tracer.span("log"):
+                log.log(duration_ms=log.timed()-t0, similarities=similaridades, k=k,
+                        stages=etapas if tracer.forward_mlflow else None)
+
+    if opcoes["format"] == "ndjson":
+        # Um candidato por linha, hidratado em blocos enquanto a resposta é enviada
+        def linhas():
+            for c in candidatos():
+                yield json.dumps(c, ensure_ascii=False) + "\n"
+
+        resposta = Response(linhas(), status=200, mimetype="application/x-ndjson")
+        if next_cursor:
+            resposta.headers["X-Next-Cursor"] = next_cursor
+        return resposta
+    return Response(candidatos_json, status=200, mimetype="application/json")
+
+
+@bp.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Top-K para várias vagas em uma chamada. Body: {"jobs": [{"job_id": "...", "k": 5}, ...]}
+    Descrições via um MGET, embeddings em lote e uma única consulta multi-linha ao Chroma.
+    """
+    if not request.is_json:
+        return jsonify({"error": "O corpo da requisicao deve ser um JSON."}), 400
+
+    data = request.get_json(silent=True)
+
+    if data is None:
+        return jsonify({"error": "JSON invalido."}), 400
+
+    jobs = data.get("jobs")
+    max_jobs = int(os.getenv("PREDICT_BATCH_MAX", 1000))
+    if not isinstance(jobs, list) or not jobs:
+        return jsonify({"error": "Campo 'jobs' e obrigatorio e deve ser uma lista nao vazia."}), 400
+    if len(jobs) > max_jobs:
+        return jsonify({"error": f"Campo 'jobs' aceita no maximo {max_jobs} itens."}), 400
+
+    consultas = []
+    for i, job in enumerate(jobs):
+        vaga_id = job.get("job_id") if isinstance(job, dict) else None
+        if not vaga_id or not isinstance(vaga_id, str):
+            return jsonify({"error": f"jobs[{i}]: campo 'job_id' e obrigatorio e deve ser uma string."}), 400
+        k, erro = _validar_k(job.get("k"))
+        if erro:
+            return jsonify({"error": f"jobs[{i}]: {erro}"}), 400
+        consultas.append((vaga_id, k))
+
+    services = get_services()
+    dados, model, log = services.data, services.model, services.log
+    tracer = get_tracer()
+    t0 = log.timed()
+
+    with tracer.span("descricao"):
+        descricoes = dados.get_vagas_descricoes([vaga_id for vaga_id, _ in consultas])
+    validas = [i for i, d in enumerate(descricoes) if d is not None]
+
+    resultados = [{"job_id": vaga_id, "error": f"Vaga com id '{vaga_id}' não encontrada."}
+                  for vaga_id, _ in consultas]
+
+    if validas:
+        k_max = max(consultas[i][1] for i in validas)
+        output_model = model.predict_many([descricoes[i] for i in validas], k_max)
+
+        # Corta cada linha no k pedido e hidrata todos os candidatos com um único MGET
+        linhas = {}
+        for row, i in enumerate(validas):
+            k = consultas[i][1]
+            linhas[i] = (output_model['ids'][row][:k], output_model['similarities'][row][:k])
+
+        todos_ids = list(dict.fromkeys(cid for ids, _ in linhas.values() for cid in ids))
+        with tracer.span("hidratacao"):
+            perfis = {p["id"]: p for p in dados.get_perfis(todos_ids)}
+
+        duracao = (log.timed() - t0) / len(validas)  # latência amortizada por vaga
+        with tracer.span("log"):
+            for i, (ids, similaridades) in linhas.items():
+                vaga_id, k = consultas[i]
+                resultados[i] = {
+                    "job_id": vaga_id,
+                    "k": k,
+                    "candidatos": [perfis[cid] for cid in map(str, ids) if cid in perfis],
+                }
+                log.log(duration_ms=duracao, similarities=similaridades, k=k)
+
+    body = json.dumps({"resultados": resultados}, ensure_ascii=False)
+    return Response(body, status=200, mimetype="application/json")
+
+
+@bp.route("/health", methods=["GET"])
+def health():
+    """Prontidão do worker: 200 se Redis (e ChromaDB, se for o backend) respondem, senão 503."""
+    resultado = get_services().health()
+    return jsonify(resultado), 200 if resultado["status"] == "ok" else 503
+
+
+@bp.route("/metrics/stages", methods=["GET"])
+def metrics_stages():
+    """
+    Histogramas de latência por etapa do /predict deste worker (em memória, sem MLflow).
+    `?reset=true` zera os histogramas depois de ler.
+    """
+    reset = request.args.get("reset", "false").lower() == "true"
+    snapshot = get_tracer().snapshot(reset=reset)
+    snapshot["result_cache"] = get_services().results.contadores()
+    snapshot["match_matrix"] = get_services().matches.contadores()
+    return jsonify(snapshot), 200
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    try:
+        include_history = (request.args.get("history", "true").lower() != "false")
+        cap = int(request.args.get("cap", 1000))
+    except Exception:
+        include_history, cap = True, 1000
+
+    try:
+        budget = float(request.args["budget"]) if "budget" in request.args else None
+    except ValueError:
+        budget = None
+
+    try:
+        data = Log.fetch_all(include_history=include_history, cap_history=cap, budget_s=budget)
+        data["log_queue"] = get_services().log.queue_stats()  # fila de envio assíncrono deste worker
+        return jsonify(data), 200
+    except requests.RequestException as e:
+        # MLflow fora do ar, timeout, etc.
+        return jsonify({"error": "mlflow_unreachable", "detail": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": "unexpected", "detail": str(e)}), 500
+
@@ -1,128 +1,279 @@
-import json
-import redis
-import os
-
-class Data:
-    def __init__(self):
-        self.redis_url_0 = os.getenv('REDIS_URL_0')
-        self.redis_url_1 = os.getenv('REDIS_URL_1')
-        self.redis_url_2 = os.getenv('REDIS_URL_2')
-
-        if (not self.redis_url_0) or (not self.redis_url_1) or (not self.redis_url_2) :
-            raise RuntimeError("Variável de ambiente REDIS_URL_0, REDIS_URL_1 ou REDIS_URL_2 não encontrada.")
-
-        self.redis_db0 = redis.from_url(self.redis_url_0) # armazena area de atuacao
-        self.redis_db1 = redis.from_url(self.redis_url_1) # armazena principais_atividades + competencia_tecnicas_e_comportamentais 
-        self.redis_db2 = redis.from_url(self.redis_url_2) # armazena cv_pt do candidato
-
-
-    def load_vagas(self, vagas_file) -> None:
-        """
-        Processa vagas.json e salva nos DBs do Redis:
-        - DB 0: chave=id_vaga, valor=areas_atuacao
-        - DB 1: chave=id_vaga, valor=principais_atividades + ". " + competencia_tecnicas_e_comportamentais
-        """
-        try:
-            vagas_data = json.load(vagas_file)
-
-            for vaga_id, vaga_info in vagas_data.items():
-                perfil = vaga_info.get("perfil_vaga", {})
-
-                # Extrair o campo "areas_atuacao" (default vazio)
-                areas_atuacao = perfil.get("areas_atuacao", "")
-
-                # Extrair os campos para concatenação
-                principais_atividades = perfil.get("principais_atividades", "").strip()
-                competencias = perfil.get("competencia_tecnicas_e_comportamentais", "").strip()
-
-                # Monta o valor do DB1
-                concat_text = f"{principais_atividades}. {competencias}" if principais_atividades or competencias else ""
-
-                # Salva no Redis
-                self.redis_db0.set(vaga_id, areas_atuacao)
-                self.redis_db1.set(vaga_id, concat_text)
-
-        except Exception as e:
-            raise RuntimeError(f"Erro ao carregar vagas: {e}")
-
-
-    def load_applicants(self, candidatos_file) -> None:
-        """
-        Processa candidatos.json e salva no DB 2 do Redis:
-        - DB 2: chave=id_candidato, valor=cv_pt
-        """
-        try:
-            candidatos_data = json.load(candidatos_file)
-
-            for candidato_id, candidato_info in candidatos_data.items():
-                cv_pt = candidato_info.get("cv_pt", "").strip()
-
-                # Salva no Redis apenas se houver conteúdo no cv_pt
-                if cv_pt:
-                    self.redis_db2.set(candidato_id, cv_pt)
-
-        except Exception as e:
-            raise RuntimeError(f"Erro ao carregar candidatos: {e}")
-
-
-    def get_vaga_descricao(self, id: str) -> str:
-        raw = self.redis_db1.get(id)  # bytes ou None
-        if raw is None:
-            raise KeyError(f"Vaga com id '{id}' não encontrada.")
-        return raw.decode("utf-8")
-
-
-    def get_candidatos(self, id: list) -> str:
-        """
-        Lê database/applicants.json e retorna:
-        {"candidatos": [{"id": "...", "nome": "...", "cv_pt": "..."}, ...]}
-        """
-        if not isinstance(id, list):
-            raise ValueError("Parâmetro `id` deve ser uma lista.")
-
-        # Carrega o JSON do disco (simples e direto)
-        try:
-            with open("database/applicants.json", "r", encoding="utf-8") as f:
-                base = json.load(f)  # dict com chaves = ids
-        except FileNotFoundError:
-            raise FileNotFoundError("Arquivo 'database/applicants.json' não encontrado.")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"JSON inválido em 'database/applicants.json': {e}")
-
-        resultados = []
-        for cid in id:
-            cid_str = str(cid)
-            entry = base.get(cid_str)
-            if not isinstance(entry, dict):
-                # Se preferir levantar erro quando não achar, troque por:
-                # raise KeyError(f"Candidato '{cid_str}' não encontrado no JSON.")
-                continue
-
-            # `nome` pode estar em informacoes_pessoais.nome ou infos_basicas.nome
-            nome = ""
-            infos_pessoais = entry.get("informacoes_pessoais")
-            if isinstance(infos_pessoais, dict):
-                nome = infos_pessoais.get("nome") or ""
-            if not nome:
-                infos_basicas = entry.get("infos_basicas")
-                if isinstance(infos_basicas, dict):
-                    nome = infos_basicas.get("nome") or ""
-
-            cv_pt = entry.get("cv_pt", "") or ""
-
-            resultados.append({
-                "id": cid_str,
-                "nome": nome,
-                "cv_pt": cv_pt
-            })
-
-        return json.dumps({"candidatos": resultados}, ensure_ascii=False)
-
-
-
-
-
-
-
-
-
+import json
+import os
+import time
+import logging
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.services.candidate_meta import extrair_metadados, split_areas
+from src.services.json_stream import iter_json_object
+from src.services.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def _em_lotes(itens: Iterable[Tuple[str, Any]], n: int) -> Iterator[List[Tuple[str, Any]]]:
+    """Agrupa um iterável em listas de até `n` itens."""
+    it = iter(itens)
+    while True:
+        lote = list(islice(it, n))
+        if not lote:
+            return
+        yield lote
+
+
+def _resumo_ingest(nome: str, total: int, lotes: int, t0: float) -> Dict[str, Any]:
+    """Estatísticas de throughput de uma carga (também registradas no log)."""
+    segundos = time.monotonic() - t0
+    por_segundo = total / segundos if segundos > 0 else float(total)
+    logger.info("Ingestão de %s: %d registros em %d lotes, %.2fs (%.0f registros/s)",
+                nome, total, lotes, segundos, por_segundo)
+    return {"total": total, "lotes": lotes, "segundos": round(segundos, 3), "por_segundo": round(por_segundo, 1)}
+
+
+class Data:
+    def __init__(self):
+        self.redis_url_0 = os.getenv('REDIS_URL_0')
+        self.redis_url_1 = os.getenv('REDIS_URL_1')
+        self.redis_url_2 = os.getenv('REDIS_URL_2')
+        self.redis_url_3 = os.getenv('REDIS_URL_3')
+
+        if (not self.redis_url_0) or (not self.redis_url_1) or (not self.redis_url_2) or (not self.redis_url_3):
+            raise RuntimeError("Variável de ambiente REDIS_URL_0, REDIS_URL_1, REDIS_URL_2 ou REDIS_URL_3 não encontrada.")
+
+        self.redis_db0 = redis_client(self.redis_url_0) # armazena area de atuacao
+        self.redis_db1 = redis_client(self.redis_url_1) # armazena principais_atividades + competencia_tecnicas_e_comportamentais 
+        self.redis_db2 = redis_client(self.redis_url_2) # armazena cv_pt do candidato
+        self.redis_db3 = redis_client(self.redis_url_3) # armazena perfil do candidato (nome + metadados) indexado por id; o cv_pt fica só no DB 2
+
+        self.batch_size = int(os.getenv('INGEST_BATCH_SIZE', 1000)) # registros por pipeline na ingestão
+
+
+    def load_vagas(self, vagas_file) -> Dict[str, Any]:
+        """
+        Processa vagas.json e salva nos DBs do Redis:
+        - DB 0: chave=id_vaga, valor=areas_atuacao (usado no filtro por área do /predict)
+        - DB 1: chave=id_vaga, valor=principais_atividades + ". " + competencia_tecnicas_e_comportamentais
+
+        O arquivo é lido em streaming (uma vaga por vez) e gravado em pipelines de
+        `batch_size` vagas (INGEST_BATCH_SIZE, padrão 1000).
+
+        Retorna {"total", "alteradas", "lotes", "segundos", "por_segundo"}, em que
+        `alteradas` são as vagas novas ou cuja descrição (DB 1) mudou.
+        """
+        try:
+            t0 = time.monotonic()
+            total, lotes = 0, 0
+            alteradas: List[str] = []
+
+            for lote in _em_lotes(iter_json_object(vagas_file), self.batch_size):
+                # Descrições atuais do lote (um MGET) para detectar vagas novas/alteradas
+                anteriores = self.redis_db1.mget([vaga_id for vaga_id, _ in lote])
+                pipe0 = self.redis_db0.pipeline(transaction=False)
+                pipe1 = self.redis_db1.pipeline(transaction=False)
+
+                for (vaga_id, vaga_info), anterior in zip(lote, anteriores):
+                    perfil = vaga_info.get("perfil_vaga", {})
+
+                    # Extrair o campo "areas_atuacao" (default vazio)
+                    areas_atuacao = perfil.get("areas_atuacao", "")
+
+                    # Extrair os campos para concatenação
+                    principais_atividades = perfil.get("principais_atividades", "").strip()
+                    competencias = perfil.get("competencia_tecnicas_e_comportamentais", "").strip()
+
+                    # Monta o valor do DB1
+                    concat_text = f"{principais_atividades}. {competencias}" if principais_atividades or competencias else ""
+
+                    if anterior is None or anterior.decode("utf-8") != concat_text:
+                        alteradas.append(vaga_id)
+
+                    # Enfileira no pipeline
+                    pipe0.set(vaga_id, areas_atuacao)
+                    pipe1.set(vaga_id, concat_text)
+
+                pipe0.execute()
+                pipe1.execute()
+                total += len(lote)
+                lotes += 1
+
+            resumo = _resumo_ingest("vagas", total, lotes, t0)
+            resumo["alteradas"] = alteradas
+            return resumo
+
+        except Exception as e:
+            raise RuntimeError(f"Erro ao carregar vagas: {e}")
+
+
+    def load_applicants(self, candidatos_file) -> Dict[str, Any]:
+        """
+        Processa candidatos.json e salva nos DBs do Redis:
+        - DB 2: chave=id_candidato, valor=cv_pt (removida se o cv_pt ficar vazio)
+        - DB 3: chave=id_candidato, valor=JSON {"nome", "areas", "nivel", "local"}
+          (perfil usado no /predict; os metadados vão junto dos vetores para filtrar a busca).
+          O cv_pt não é repetido aqui: é o maior campo e o get_perfis o lê do DB 2
+
+        Leitura em streaming e gravação em pipelines de `batch_size` candidatos.
+        Retorna {"total", "alterados", "lotes", "segundos", "por_segundo"}, em que
+        `alterados` são os candidatos novos ou cujo cv_pt (DB 2) ou perfil (DB 3) mudou.
+        """
+        try:
+            t0 = time.monotonic()
+            total, lotes = 0, 0
+            alterados: List[str] = []
+
+            for lote in _em_lotes(iter_json_object(candidatos_file), self.batch_size):
+                # cv_pt e perfis atuais do lote (um MGET por DB) para detectar candidatos novos/alterados
+                ids_lote = [candidato_id for candidato_id, _ in lote]
+                cvs_anteriores = self.redis_db2.mget(ids_lote)
+                anteriores = self.redis_db3.mget(ids_lote)
+                pipe2 = self.redis_db2.pipeline(transaction=False)
+                pipe3 = self.redis_db3.pipeline(transaction=False)
+
+                for (candidato_id, candidato_info), cv_anterior, anterior in zip(lote, cvs_anteriores, anteriores):
+                    cv_pt = (candidato_info.get("cv_pt", "") or "").strip()
+
+                    # Salva no Redis apenas se houver conteúdo no cv_pt
+                    if cv_pt:
+                        pipe2.set(candidato_id, cv_pt)
+                    elif cv_anterior is not None:
+                        pipe2.delete(candidato_id)
+
+                    # Perfil indexado por id: evita reler o applicants.json inteiro a cada consulta
+                    perfil = {
+                        "nome": self._extrair_nome(candidato_info),
+                        **extrair_metadados(candidato_info),
+                    }
+                    perfil_json = json.dumps(perfil, ensure_ascii=False)
+                    if (anterior is None or anterior.decode("utf-8") != perfil_json
+                            or (cv_anterior.decode("utf-8") if cv_anterior is not None else "") != cv_pt):
+                        alterados.append(candidato_id)
+                    pipe3.set(candidato_id, perfil_json)
+
+                pipe2.execute()
+                pipe3.execute()
+                total += len(lote)
+                lotes += 1
+
+            resumo = _resumo_ingest("candidatos", total, lotes, t0)
+            resumo["alterados"] = alterados
+            return resumo
+
+        except Exception as e:
+            raise RuntimeError(f"Erro ao carregar candidatos: {e}")
+
+
+    @staticmethod
+    def _extrair_nome(entry: dict) -> str:
+        """`nome` pode estar em informacoes_pessoais.nome ou infos_basicas.nome"""
+        nome = ""
+        infos_pessoais = entry.get("informacoes_pessoais")
+        if isinstance(infos_pessoais, dict):
+            nome = infos_pessoais.get("nome") or ""
+        if not nome:
+            infos_basicas = entry.get("infos_basicas")
+            if isinstance(infos_basicas, dict):
+                nome = infos_basicas.get("nome") or ""
+        return nome
+
+
+    def perfis_carregados(self) -> bool:
+        """Indica se o índice de perfis (DB 3) já foi populado."""
+        return self.redis_db3.dbsize() > 0
+
+
+    def get_vaga_descricao(self, id: str) -> str:
+        raw = self.redis_db1.get(id)  # bytes ou None
+        if raw is None:
+            raise KeyError(f"Vaga com id '{id}' não encontrada.")
+        return raw.decode("utf-8")
+
+
+    def get_vaga_areas(self, id: str) -> List[str]:
+        """Nomes das áreas de atuação da vaga (DB 0); lista vazia se a vaga não tiver áreas."""
+        raw = self.redis_db0.get(id)
+        return split_areas(raw.decode("utf-8")) if raw is not None else []
+
+
+    def get_vagas_descricoes(self, ids: List[str]) -> List[Optional[str]]:
+        """Descrições de várias vagas em um único MGET (None para ids inexistentes)."""
+        if not ids:
+            return []
+        return [raw.decode("utf-8") if raw is not None else None for raw in self.redis_db1.mget(ids)]
+
+
+    def iter_vagas_descricoes(self, scan_count: int = 1000) -> Iterator[List[Tuple[str, str]]]:
+        """Todas as vagas do DB 1, em páginas de SCAN + MGET: gera listas de (id, descrição)."""
+        cursor = 0
+        while True:
+            cursor, keys = self.redis_db1.scan(cursor=cursor, count=scan_count)
+            if keys:
+                yield [(k.decode("utf-8"), v.decode("utf-8"))
+                       for k, v in zip(keys, self.redis_db1.mget(keys)) if v is not None]
+            if cursor == 0:
+                return
+
+
+    def get_perfis(self, ids: List[str], cv_pt: bool = True) -> List[Dict[str, str]]:
+        """
+        Busca os perfis no DB 3 do Redis (um único MGET, O(k)), na ordem de `ids`, com o
+        cv_pt hidratado do DB 2 (outro MGET; pulado com `cv_pt=False`, que devolve "").
+        Candidatos sem perfil indexado (ex.: não estão no applicants.json) são ignorados.
+        """
+        ids = [str(cid) for cid in ids]
+        valores = self.redis_db3.mget(ids) if ids else []
+        cvs = self.redis_db2.mget(ids) if ids and cv_pt else [None] * len(ids)
+
+        resultados = []
+        for cid_str, raw, cv in zip(ids, valores, cvs):
+            if raw is None:
+                continue
+
+            perfil = json.loads(raw)
+            resultados.append({
+                "id": cid_str,
+                "nome": perfil.get("nome", "") or "",
+                "cv_pt": cv.decode("utf-8") if cv is not None else ""
+            })
+        return resultados
+
+
+    def get_metadados(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Metadados {"areas", "nivel", "local"} dos candidatos (DB 3, um MGET), na ordem de `ids`;
+        None para ids sem perfil.
+        """
+        ids = [str(cid) for cid in ids]
+        valores = self.redis_db3.mget(ids) if ids else []
+
+        resultados: List[Optional[Dict[str, Any]]] = []
+        for raw in valores:
+            if raw is None:
+                resultados.append(None)
+                continue
+            perfil = json.loads(raw)
+            resultados.append({
+                "areas": perfil.get("areas") or [],
+                "nivel": perfil.get("nivel", "") or "",
+                "local": perfil.get("local", "") or "",
+            })
+        return resultados
+
+
+    def iter_perfis(self, ids: List[str], chunk: int = 200, cv_pt: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        Como `get_perfis`, mas em MGETs de `chunk` ids, gerando um perfil por vez:
+        a memória fica limitada ao bloco corrente, não ao total de ids.
+        """
+        for i in range(0, len(ids), chunk):
+            yield from self.get_perfis(ids[i:i + chunk], cv_pt=cv_pt)
+
+
+    def get_candidatos(self, id: list) -> str:
+        """
+        Busca os perfis dos candidatos e retorna:
+        {"candidatos": [{"id": "...", "nome": "...", "cv_pt": "..."}, ...]}
+        """
+        if not isinstance(id, list):
+            raise ValueError("Parâmetro `id` deve ser uma lista.")
+
+        return json.dumps({"candidatos": self.get_perfis(id)}, ensure_ascii=False)
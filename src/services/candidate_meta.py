@@ -0,0 +1,112 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Prefixo das flags booleanas de área nos metadados (uma chave por área: "area__ti_sap": True).
+# O Chroma não aceita listas em metadados; com flags, o filtro vira um `where` simples.
+AREA_PREFIX = "area__"
+
+# Vários valores de areas_atuacao vêm colados por "-" sem espaços (e com "-" no fim):
+# "TI - SAP-TI - Projetos-". O " - " interno ao nome de uma área é preservado.
+_SEPARADOR = re.compile(r"(?<=\S)-(?=\S)|-\s*$|,")
+
+
+def split_areas(texto: Optional[str]) -> List[str]:
+    """Nomes das áreas em `texto` (areas_atuacao da vaga ou area_atuacao do candidato), sem repetição."""
+    if not texto:
+        return []
+    partes = (p.strip() for p in _SEPARADOR.split(str(texto)))
+    return list(dict.fromkeys(p for p in partes if p))
+
+
+def slug_area(nome: str) -> str:
+    """Forma canônica de uma área: sem acentos, minúsculas, não alfanuméricos viram "_"."""
+    ascii_ = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", ascii_.lower()).strip("_")
+
+
+def slugs(areas: Iterable[str]) -> List[str]:
+    """Slugs ordenados e sem repetição (ordem estável: entra na chave do cache de resultados)."""
+    return sorted({s for s in (slug_area(a) for a in areas) if s})
+
+
+def extrair_metadados(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Metadados do candidato no applicants.json:
+      - areas: informacoes_profissionais.area_atuacao (lista de nomes)
+      - nivel: informacoes_profissionais.nivel_profissional
+      - local: infos_basicas.local
+    """
+    profissionais = entry.get("informacoes_profissionais")
+    profissionais = profissionais if isinstance(profissionais, dict) else {}
+    basicas = entry.get("infos_basicas")
+    basicas = basicas if isinstance(basicas, dict) else {}
+    return {
+        "areas": split_areas(profissionais.get("area_atuacao")),
+        "nivel": (profissionais.get("nivel_profissional") or "").strip(),
+        "local": (basicas.get("local") or "").strip(),
+    }
+
+
+def metadados_vetor(candidato_id: str, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Metadados gravados junto do vetor (ChromaDB e .meta.jsonl dos snapshots):
+    {"candidate_id", "areas", "nivel", "local", "area__<slug>": True, ...}.
+    Sem `meta` (candidato sem perfil no Redis) fica só o candidate_id.
+    """
+    md: Dict[str, Any] = {"candidate_id": str(candidato_id)}
+    if not meta:
+        return md
+    areas = meta.get("areas") or []
+    md["areas"] = ", ".join(areas)
+    md["nivel"] = meta.get("nivel") or ""
+    md["local"] = meta.get("local") or ""
+    for s in slugs(areas):
+        md[AREA_PREFIX + s] = True
+    return md
+
+
+def areas_de_metadados(md: Optional[Dict[str, Any]]) -> List[str]:
+    """Slugs das flags de área presentes em um dicionário de metadados."""
+    if not md:
+        return []
+    return [k[len(AREA_PREFIX):] for k, v in md.items() if k.startswith(AREA_PREFIX) and v]
+
+
+def filtro_chroma(areas: Optional[Iterable[str]]) -> Optional[Dict[str, Any]]:
+    """Cláusula `where` do Chroma para candidatos de qualquer uma das `areas` (None = sem filtro)."""
+    flags = [{AREA_PREFIX + s: True} for s in slugs(areas or [])]
+    if not flags:
+        return None
+    return flags[0] if len(flags) == 1 else {"$or": flags}
+
+
+# ------------------------
+# Bitmap área x linha (índices locais: vetorial e léxico)
+# ------------------------
+def gravar_bitmap(path: str, total: int, linhas_de: Dict[str, List[np.ndarray]]) -> None:
+    """Grava o bitmap área x linha em `path` (np.savez: areas, bits empacotados, n)."""
+    nomes = sorted(linhas_de)
+    bits = np.zeros((len(nomes), total), dtype=bool)
+    for a, nome in enumerate(nomes):
+        bits[a, np.concatenate(linhas_de[nome])] = True
+    with open(path, "wb") as f:
+        np.savez(f, areas=np.asarray(nomes, dtype=str), bits=np.packbits(bits, axis=1), n=np.int64(total))
+
+
+def ler_bitmap(path: str) -> Tuple[Dict[str, int], np.ndarray, int]:
+    """(área -> linha do bitmap, bits empacotados [A, ceil(N/8)], N) de um arquivo de `gravar_bitmap`."""
+    with np.load(path) as npz:
+        nomes, bits, n = npz["areas"].tolist(), npz["bits"], int(npz["n"])
+    return {nome: i for i, nome in enumerate(nomes)}, bits, n
+
+
+def mascara_bitmap(indice: Dict[str, int], bits: np.ndarray, n: int, areas: Sequence[str]) -> np.ndarray:
+    """Máscara booleana [n] das linhas marcadas em alguma das `areas`."""
+    mascara = np.zeros(n, dtype=bool)
+    for area in slugs(areas):
+        if area in indice:
+            mascara |= np.unpackbits(bits[indice[area]], count=n).astype(bool)
+    return mascara
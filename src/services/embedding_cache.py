@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import os
+from typing import Optional, Sequence, List
+
+import numpy as np
+import redis
+
+from src.services.quantization import get_precision, pack, unpack
+from src.services.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings compartilhado entre os workers (Redis), endereçado pelo conteúdo:
+      - chave = "emb:" + sha256(modelo | task_type | texto [| precisão, se não for float32])
+      - valor = vetor em bytes na precisão de VECTOR_PRECISION (float32, float16 ou
+        int8 com escala por vetor)
+
+    Como a chave depende só do texto, vagas diferentes com a mesma descrição
+    reaproveitam o mesmo embedding.
+
+    Variáveis de ambiente:
+      - REDIS_URL_4: DB do Redis usado para cache (se ausente, o cache fica desligado)
+      - EMBEDDING_CACHE_TTL: TTL em segundos das entradas (padrão: 7 dias)
+      - EMBEDDING_CACHE_PERSIST_TTL: TTL das entradas pré-computadas (`persist`, padrão: 90 dias)
+      - VECTOR_PRECISION: precisão dos vetores em cache (padrão: float32)
+
+    A expulsão por memória fica a cargo do Redis (maxmemory-policy volatile-lru),
+    que só remove chaves com TTL e nunca os dados das vagas/candidatos. Por isso toda
+    entrada tem TTL, inclusive as pré-computadas: o vetor da descrição antiga de uma vaga
+    alterada deixa de ser lido e precisa expirar.
+    """
+
+    PREFIX = "emb"
+
+    def __init__(self, redis_url: Optional[str] = None, ttl_s: Optional[int] = None, precision: Optional[str] = None):
+        url = redis_url or os.getenv("REDIS_URL_4")
+        self.ttl = int(ttl_s if ttl_s is not None else os.getenv("EMBEDDING_CACHE_TTL", 7 * 24 * 3600))
+        self.persist_ttl = int(os.getenv("EMBEDDING_CACHE_PERSIST_TTL", 90 * 24 * 3600))
+        self.precision = get_precision(precision)
+        self.redis = redis_client(url) if url else None
+
+    @classmethod
+    def chave(cls, model: str, task_type: str, texto: str, precision: str = "float32") -> str:
+        h = hashlib.sha256()
+        # float32 fica fora da chave para manter as entradas já gravadas válidas
+        partes = (model, task_type, texto) if precision == "float32" else (model, task_type, texto, precision)
+        for parte in partes:
+            h.update(parte.encode("utf-8"))
+            h.update(b"\x00")  # separador, evita colisão entre concatenações
+        return f"{cls.PREFIX}:{h.hexdigest()}"
+
+    def _encode(self, vetor: np.ndarray) -> bytes:
+        return pack(vetor, self.precision)
+
+    def _decode(self, raw: bytes) -> np.ndarray:
+        return unpack(raw, self.precision)
+
+    # ------------------------
+    # API pública
+    # ------------------------
+    def get(self, model: str, task_type: str, texto: str) -> Optional[np.ndarray]:
+        return self.get_many(model, task_type, [texto])[0]
+
+    def set(self, model: str, task_type: str, texto: str, vetor: np.ndarray, persist: bool = False) -> None:
+        self.set_many(model, task_type, [texto], [vetor], persist=persist)
+
+    def get_many(self, model: str, task_type: str, textos: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Retorna um vetor por texto (None quando não está em cache). Um único MGET."""
+        if self.redis is None or not textos:
+            return [None] * len(textos)
+        try:
+            valores = self.redis.mget([self.chave(model, task_type, t, self.precision) for t in textos])
+        except redis.RedisError as e:
+            # Cache indisponível não deve derrubar a predição
+            logger.warning("Cache de embeddings indisponível: %s", e)
+            return [None] * len(textos)
+        return [self._decode(v) if v is not None else None for v in valores]
+
+    def set_many(self,
+                 model: str,
+                 task_type: str,
+                 textos: Sequence[str],
+                 vetores: Sequence[np.ndarray],
+                 persist: bool = False) -> None:
+        """
+        Grava os vetores em um pipeline.
+        - persist: se True, grava com o TTL longo (EMBEDDING_CACHE_PERSIST_TTL), ex.: embeddings
+          pré-computados das vagas.
+        """
+        if self.redis is None or not textos:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            ttl = self.persist_ttl if persist else self.ttl
+            for texto, vetor in zip(textos, vetores):
+                pipe.set(self.chave(model, task_type, texto, self.precision), self._encode(vetor), ex=ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Falha ao gravar no cache de embeddings: %s", e)
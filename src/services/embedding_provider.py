@@ -0,0 +1,158 @@
+# embedding_provider.py
+import hashlib
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.embedding_scheduler import estimar_tokens
+
+
+class RateLimitError(Exception):
+    """Cota simulada estourada; reconhecida como 429 pelo EmbeddingScheduler (is_rate_limit)."""
+
+    code = 429
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface dos provedores de embedding usados pelo Model e pelos scripts:
+      - `model_name`: identifica o modelo (entra na chave do cache e no content_hash)
+      - `embed(textos, task_type)`: um vetor float32 por texto, em uma única requisição
+    """
+
+    model_name: str = ""
+
+    @abstractmethod
+    def embed(self, textos: Sequence[str], task_type: str = "SEMANTIC_SIMILARITY") -> List[np.ndarray]:
+        ...
+
+
+class GeminiProvider(EmbeddingProvider):
+    """Gemini API (google-genai): `embed_content` com o modelo de MODEL."""
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None, client=None):
+        from google import genai
+
+        self.model_name = model or os.getenv("MODEL", "gemini-embedding-001")
+        self.client = client or genai.Client(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+
+    def embed(self, textos: Sequence[str], task_type: str = "SEMANTIC_SIMILARITY") -> List[np.ndarray]:
+        from google.genai import types
+
+        return [
+            np.asarray(e.values, dtype=np.float32) for e in self.client.models.embed_content(
+                model=self.model_name,
+                contents=list(textos),
+                config=types.EmbedContentConfig(task_type=task_type)).embeddings
+        ]
+
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=1 << 17)
+def _hash_feature(feature: str, dim: int) -> Tuple[int, float]:
+    """Índice e sinal estáveis entre processos (blake2b, não o hash() do Python)."""
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % dim, (1.0 if (h >> 63) & 1 else -1.0)
+
+
+class HashingProvider(EmbeddingProvider):
+    """
+    Provedor local e determinístico, para benchmarks e ambientes sem a API:
+      - features = palavras + n-gramas de caracteres de cada palavra (com bordas)
+      - cada feature soma ±1 em uma coordenada escolhida por hash (feature hashing),
+        em qualquer dimensão; o vetor final é L2-normalizado
+    Textos parecidos compartilham features e ficam próximos no cosseno.
+
+    Simula também o comportamento da API remota (variáveis de ambiente):
+      - LOCAL_EMBED_DIM: dimensão dos vetores (padrão: 3072)
+      - LOCAL_EMBED_LATENCY_MS: latência fixa por requisição (padrão: 0)
+      - LOCAL_EMBED_LATENCY_PER_TEXT_MS: latência adicional por texto (padrão: 0)
+      - LOCAL_EMBED_RPM / LOCAL_EMBED_TPM: cotas por minuto; acima delas a chamada
+        levanta RateLimitError (429). 0 desliga a cota (padrão).
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        ngram: int = 3,
+        latency_ms: Optional[float] = None,
+        latency_per_text_ms: Optional[float] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+    ):
+        self.dim = int(dim or os.getenv("LOCAL_EMBED_DIM", 3072))
+        self.ngram = int(ngram)
+        self.latency_s = float(latency_ms if latency_ms is not None else os.getenv("LOCAL_EMBED_LATENCY_MS", 0)) / 1000
+        self.latency_per_text_s = float(
+            latency_per_text_ms if latency_per_text_ms is not None else os.getenv("LOCAL_EMBED_LATENCY_PER_TEXT_MS", 0)
+        ) / 1000
+        self.rpm = float(rpm if rpm is not None else os.getenv("LOCAL_EMBED_RPM", 0))
+        self.tpm = float(tpm if tpm is not None else os.getenv("LOCAL_EMBED_TPM", 0))
+        self.model_name = f"local-hash-{self.dim}"
+        self._janela: deque = deque()  # (instante, tokens) das requisições do último minuto
+        self._lock = threading.Lock()
+
+    def _features(self, texto: str) -> List[str]:
+        feats = []
+        for palavra in _TOKEN.findall(texto.lower()):
+            feats.append(palavra)
+            w = f"<{palavra}>"
+            feats.extend(w[i:i + self.ngram] for i in range(max(1, len(w) - self.ngram + 1)))
+        return feats
+
+    def _vetor(self, texto: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        feats = self._features(texto)
+        if not feats:
+            return v
+        idx, sinais = zip(*(_hash_feature(f, self.dim) for f in feats))
+        np.add.at(v, np.asarray(idx), np.asarray(sinais, dtype=np.float32))
+        norma = np.linalg.norm(v)
+        return v / norma if norma else v
+
+    def _checar_cota(self, tokens: int) -> None:
+        if not self.rpm and not self.tpm:
+            return
+        with self._lock:
+            agora = time.monotonic()
+            while self._janela and agora - self._janela[0][0] >= 60.0:
+                self._janela.popleft()
+            usados = sum(t for _, t in self._janela)
+            if (self.rpm and len(self._janela) + 1 > self.rpm) or (self.tpm and usados + tokens > self.tpm):
+                raise RateLimitError("429 RESOURCE_EXHAUSTED: cota simulada do provedor local")
+            self._janela.append((agora, tokens))
+
+    def embed(self, textos: Sequence[str], task_type: str = "SEMANTIC_SIMILARITY") -> List[np.ndarray]:
+        self._checar_cota(sum(estimar_tokens(t) for t in textos))
+        espera = self.latency_s + self.latency_per_text_s * len(textos)
+        if espera > 0:
+            time.sleep(espera)
+        return [self._vetor(t) for t in textos]
+
+
+_PROVIDERS = {"gemini": GeminiProvider, "local": HashingProvider}
+_instancias: Dict[str, EmbeddingProvider] = {}
+_instancias_lock = threading.Lock()
+
+
+def get_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Provedor selecionado por EMBEDDING_PROVIDER (gemini | local; padrão: gemini).
+    Uma instância por processo, então cotas e clientes HTTP são compartilhados.
+    """
+    name = (name or os.getenv("EMBEDDING_PROVIDER", "gemini")).strip().lower()
+    if name not in _PROVIDERS:
+        raise ValueError(f"EMBEDDING_PROVIDER inválido: '{name}'. Use um de {sorted(_PROVIDERS)}.")
+    with _instancias_lock:
+        if name not in _instancias:
+            _instancias[name] = _PROVIDERS[name]()
+        return _instancias[name]
@@ -0,0 +1,187 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Limite de tokens por texto do modelo de embedding (o excedente é truncado pela API)
+MAX_TOKENS_POR_TEXTO = 2048
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa barata (~4 caracteres por token), limitada ao máximo por texto."""
+    return max(1, min(len(texto) // 4, MAX_TOKENS_POR_TEXTO))
+
+
+def empacotar(itens: Iterable[Tuple[str, str]],
+              max_itens: int = 100,
+              max_tokens: int = 100_000) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Agrupa (id, texto) em requisições de até `max_itens` textos e `max_tokens`
+    tokens estimados. Consome `itens` de forma preguiçosa (streaming).
+    """
+    pacote: List[Tuple[str, str]] = []
+    tokens = 0
+    for _id, texto in itens:
+        t = estimar_tokens(texto)
+        if pacote and (len(pacote) >= max_itens or tokens + t > max_tokens):
+            yield pacote
+            pacote, tokens = [], 0
+        pacote.append((_id, texto))
+        tokens += t
+    if pacote:
+        yield pacote
+
+
+def is_rate_limit(e: Exception) -> bool:
+    """Detecta erro de cota (HTTP 429 / RESOURCE_EXHAUSTED) sem depender do tipo da exceção."""
+    code = getattr(e, "code", None) or getattr(e, "status_code", None)
+    msg = str(e)
+    return code == 429 or "429" in msg or "RESOURCE_EXHAUSTED" in msg
+
+
+class TokenBucket:
+    """Token bucket thread-safe com reposição contínua de `rate_per_min` tokens por minuto."""
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None):
+        self.rate = float(rate_per_min) / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_min)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0) -> None:
+        """Bloqueia até haver `n` tokens (pedidos maiores que a capacidade são limitados a ela)."""
+        n = min(float(n), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                espera = (n - self.tokens) / self.rate
+            time.sleep(espera)
+
+
+class EmbeddingScheduler:
+    """
+    Agenda a geração de embeddings respeitando cotas da API:
+      - empacota os textos por quantidade e por tokens estimados
+      - mantém até `concorrencia` requisições em voo, sob dois token buckets
+        (requisições/minuto e tokens/minuto)
+      - em 429, pausa todas as threads com backoff exponencial + jitter, que
+        diminui de novo a cada sucesso
+      - o upsert do pacote N roda em uma thread própria enquanto os pacotes
+        seguintes são embedados
+
+    `embed_fn(textos) -> vetores` e `upsert_fn(ids, matriz)` são injetados.
+    """
+
+    def __init__(self,
+                 embed_fn: Callable[[List[str]], Sequence[np.ndarray]],
+                 upsert_fn: Callable[[List[str], np.ndarray], None],
+                 rpm: float = 100,
+                 tpm: float = 300_000,
+                 concorrencia: int = 4,
+                 max_itens: int = 100,
+                 max_tokens: int = 100_000,
+                 max_tentativas: int = 8,
+                 backoff_max_s: float = 120.0):
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.concorrencia = max(1, int(concorrencia))
+        self.max_itens = int(max_itens)
+        self.max_tokens = int(min(max_tokens, tpm))  # um pacote nunca pode exceder a cota por minuto
+        self.max_tentativas = int(max_tentativas)
+        self.backoff_max_s = float(backoff_max_s)
+
+        self._backoff = 0.0
+        self._pausa_ate = 0.0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"pacotes": 0, "itens": 0, "rate_limits": 0, "falhas": 0}
+
+    # ---------- backoff adaptativo ----------
+    def _aguardar_pausa(self) -> None:
+        while True:
+            with self._lock:
+                espera = self._pausa_ate - time.monotonic()
+            if espera <= 0:
+                return
+            time.sleep(espera)
+
+    def _penalizar(self) -> None:
+        with self._lock:
+            self.stats["rate_limits"] += 1
+            self._backoff = min(self.backoff_max_s, max(1.0, self._backoff * 2))
+            self._pausa_ate = max(self._pausa_ate, time.monotonic() + self._backoff * random.uniform(0.8, 1.2))
+        logger.warning("Rate limit da API de embeddings: pausando %.1fs", self._backoff)
+
+    def _aliviar(self) -> None:
+        with self._lock:
+            self._backoff = self._backoff / 2 if self._backoff >= 1.0 else 0.0
+
+    # ---------- execução ----------
+    def _embed_pacote(self, pacote: List[Tuple[str, str]]) -> Tuple[List[str], np.ndarray]:
+        ids = [i for i, _ in pacote]
+        textos = [t for _, t in pacote]
+        tokens = sum(estimar_tokens(t) for t in textos)
+
+        for tentativa in range(1, self.max_tentativas + 1):
+            self._aguardar_pausa()
+            self.rpm.acquire(1)
+            self.tpm.acquire(tokens)
+            try:
+                vetores = self.embed_fn(textos)
+            except Exception as e:
+                if is_rate_limit(e) and tentativa < self.max_tentativas:
+                    self._penalizar()
+                    continue
+                raise
+            self._aliviar()
+            return ids, np.asarray(vetores, dtype=np.float32)
+        raise RuntimeError("Número máximo de tentativas excedido.")
+
+    def run(self, itens: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """Processa todos os (id, texto) e retorna estatísticas de throughput."""
+        t0 = time.monotonic()
+        em_voo = threading.BoundedSemaphore(self.concorrencia * 2)  # limita memória em uso
+        embed_pool = ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="embed")
+        upsert_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+
+        def _upsert(fut: Future) -> None:
+            try:
+                ids, matriz = fut.result()
+                self.upsert_fn(ids, matriz)
+                with self._lock:
+                    self.stats["pacotes"] += 1
+                    self.stats["itens"] += len(ids)
+            except Exception as e:
+                with self._lock:
+                    self.stats["falhas"] += 1
+                logger.error("Falha em pacote de embeddings: %s", e)
+            finally:
+                em_voo.release()
+
+        try:
+            for pacote in empacotar(itens, self.max_itens, self.max_tokens):
+                em_voo.acquire()
+                fut = embed_pool.submit(self._embed_pacote, pacote)
+                # ao terminar o embedding, o upsert entra na fila da thread de upsert
+                fut.add_done_callback(lambda f: upsert_pool.submit(_upsert, f))
+        finally:
+            embed_pool.shutdown(wait=True)
+            upsert_pool.shutdown(wait=True)
+
+        segundos = time.monotonic() - t0
+        self.stats["segundos"] = round(segundos, 2)
+        self.stats["itens_por_s"] = round(self.stats["itens"] / segundos, 2) if segundos > 0 else 0.0
+        return self.stats
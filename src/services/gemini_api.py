@@ -1,24 +1,109 @@
-from google import genai
-from google.genai import types
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from src.services.retrieve_data import ChromaDB
-import os
-class Model:
-    def __init__(self):
-        self.client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-
-    def predict(self, descricao_vaga: str, k: int):
-        texts = [descricao_vaga]
-
-        result = [
-            np.array(e.values) for e in self.client.models.embed_content(
-                model=os.getenv('MODEL','gemini-embedding-001'),
-                contents=texts,
-                config=types.EmbedContentConfig(task_type="SEMANTIC_SIMILARITY")).embeddings
-        ]
-
-        vaga_embedding = np.array(result)[0]
-        chroma = ChromaDB()
-        res = chroma.query_similar_by_embedding(vaga_embedding, top_k=k)
-        return res
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from src.services.embedding_provider import get_provider
+from src.services.projection import VARIANT as PROJECTION_VARIANT, get_projection
+from src.services.tracing import span
+from src.services.vector_store import get_vector_store
+from src.services.embedding_cache import EmbeddingCache
+from typing import List, Optional, Sequence
+import logging
+import threading
+import os
+
+logger = logging.getLogger(__name__)
+
+class Model:
+    TASK_TYPE = "SEMANTIC_SIMILARITY"
+
+    def __init__(self):
+        self.provider = get_provider()  # EMBEDDING_PROVIDER: gemini (padrão) ou local
+        self.model_name = self.provider.model_name
+        self.batch_size = int(os.getenv('EMBED_BATCH_SIZE', 100))  # limite de textos por chamada ao embed_content
+        self.cache = EmbeddingCache()
+
+    def _embed_api(self, textos: List[str]) -> List[np.ndarray]:
+        """Uma chamada ao provedor de embeddings para todos os `textos` (sem cache)."""
+        return self.provider.embed(textos, self.TASK_TYPE)
+
+    def embed(self, texto: str) -> np.ndarray:
+        """Embedding de um texto, consultando antes o cache compartilhado no Redis."""
+        vetor = self.cache.get(self.model_name, self.TASK_TYPE, texto)
+        if vetor is not None:
+            return vetor
+
+        vetor = self._embed_api([texto])[0]
+        self.cache.set(self.model_name, self.TASK_TYPE, texto, vetor)
+        return vetor
+
+    def embed_many(self, textos: Sequence[str]) -> List[np.ndarray]:
+        """
+        Embeddings de vários textos: um MGET no cache e, para os que faltarem
+        (sem duplicados), chamadas ao embed_content de até `batch_size` textos.
+        """
+        vetores = self.cache.get_many(self.model_name, self.TASK_TYPE, textos)
+        pendentes = list(dict.fromkeys(t for t, v in zip(textos, vetores) if v is None))
+
+        novos = {}
+        for i in range(0, len(pendentes), self.batch_size):
+            lote = pendentes[i:i + self.batch_size]
+            emb_lote = self._embed_api(lote)
+            self.cache.set_many(self.model_name, self.TASK_TYPE, lote, emb_lote)
+            novos.update(zip(lote, emb_lote))
+
+        return [v if v is not None else novos[t] for t, v in zip(textos, vetores)]
+
+    def precompute_embeddings(self, textos: Sequence[str]) -> int:
+        """
+        Gera e persiste (com o TTL longo do cache) os embeddings dos `textos` que ainda não estão em cache,
+        agrupando-os em chamadas de até `batch_size` textos.
+        Retorna quantos embeddings foram gerados.
+        """
+        unicos = list(dict.fromkeys(t for t in textos if t))  # remove vazios e duplicados
+        em_cache = self.cache.get_many(self.model_name, self.TASK_TYPE, unicos)
+        pendentes = [t for t, v in zip(unicos, em_cache) if v is None]
+
+        for i in range(0, len(pendentes), self.batch_size):
+            lote = pendentes[i:i + self.batch_size]
+            vetores = self._embed_api(lote)
+            self.cache.set_many(self.model_name, self.TASK_TYPE, lote, vetores, persist=True)
+
+        return len(pendentes)
+
+    def precompute_in_background(self, textos: Sequence[str]) -> threading.Thread:
+        """Executa `precompute_embeddings` em uma thread daemon (não bloqueia o /upload)."""
+        def _run():
+            try:
+                n = self.precompute_embeddings(textos)
+                logger.info("Embeddings de vagas pré-computados: %d", n)
+            except Exception:
+                logger.exception("Falha ao pré-computar embeddings de vagas")
+
+        t = threading.Thread(target=_run, name="job-embeddings", daemon=True)
+        t.start()
+        return t
+
+    def predict(self, descricao_vaga: str, k: int, areas: Optional[Sequence[str]] = None):
+        """Top-k candidatos para a descrição; com `areas`, a busca fica restrita a candidatos dessas áreas."""
+        with span("embedding"):
+            vaga_embedding = self.embed(descricao_vaga)
+        store = get_vector_store()
+        projecao = get_projection()
+        with span("busca_vetorial"):
+            if projecao is not None:
+                # RETRIEVAL_MODE=pca: consulta projetada na coleção reduzida
+                return store.query_similar_by_embedding(
+                    projecao.transform(vaga_embedding), top_k=k, variant=PROJECTION_VARIANT, areas=areas
+                )
+            res = store.query_similar_by_embedding(vaga_embedding, top_k=k, areas=areas)
+        return res
+
+    def predict_many(self, descricoes: Sequence[str], k: int):
+        """Top-k para várias vagas: embeddings em lote e uma única consulta multi-linha ao backend vetorial."""
+        with span("embedding"):
+            matriz = np.vstack(self.embed_many(descricoes))
+        store = get_vector_store()
+        projecao = get_projection()
+        with span("busca_vetorial"):
+            if projecao is not None:
+                return store.query_similar_by_embeddings(projecao.transform(matriz), top_k=k, variant=PROJECTION_VARIANT)
+            return store.query_similar_by_embeddings(matriz, top_k=k)
@@ -0,0 +1,336 @@
+# ivfpq_index.py
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.services.local_index import LocalVectorIndex
+from src.services.result_cache import bump_collection_version
+from src.services.retrieve_data import _Singleton
+
+
+class IVFPQIndex(metaclass=_Singleton):
+    """
+    Índice aproximado IVF-PQ (inverted file + product quantization) em numpy:
+      - Singleton
+      - `nlist` centróides grossos (MiniBatchKMeans); cada vetor vai para a lista
+        do centróide mais próximo e o resíduo é quantizado em `m` sub-vetores de
+        8 bits (256 códigos por subespaço) -> `m` bytes por candidato
+      - `m` é escolhido pelo orçamento de memória (IVFPQ_MEMORY_MB)
+      - Na consulta, só `nprobe` listas são varridas com tabelas de lookup e a
+        shortlist (`rerank`) é reordenada com os vetores exatos da matriz
+        memory-mapped do LocalVectorIndex
+
+    Arquivo: <LOCAL_INDEX_DIR>/<prefixo>_dim<D>.ivfpq.npz
+    (gerado por scripts/build_ivfpq_index.py a partir do índice local)
+
+    Os códigos e listas guardam posições de linha da matriz do índice local: o arquivo
+    registra a geração (e o N) do índice local usado no treino e só responde consultas
+    enquanto essa for a geração atual. Depois de regerar o índice local, o IVF-PQ precisa
+    ser regerado também.
+    """
+
+    KSUB = 256
+    ENCODE_BLOCK = 10_000
+
+    def __init__(
+        self,
+        nprobe: Optional[int] = None,
+        rerank: Optional[int] = None,
+        exact: Optional[LocalVectorIndex] = None,
+    ):
+        self.nprobe = int(nprobe or os.getenv("IVFPQ_NPROBE", 16))
+        self.rerank = int(rerank or os.getenv("IVFPQ_RERANK", 200))
+        self._exact_index = exact
+        self._cache: Dict[int, Tuple[float, Dict[str, np.ndarray]]] = {}  # dim -> (mtime, arrays)
+        self._lock = threading.RLock()
+
+    @property
+    def _exact(self) -> LocalVectorIndex:
+        # Resolvido sob demanda: instanciar outro singleton dentro do __init__
+        # travaria no lock da metaclasse
+        if self._exact_index is None:
+            self._exact_index = LocalVectorIndex()
+        return self._exact_index
+
+    # ------------------------
+    # Arquivos
+    # ------------------------
+    def path(self, dim: int) -> str:
+        return self._exact.path(dim, sufixo=".ivfpq.npz")
+
+    def exists(self, dim: int) -> bool:
+        """True se o IVF-PQ da dimensão já foi gerado."""
+        return os.path.exists(self.path(dim))
+
+    def em_dia(self, dim: int) -> bool:
+        """True se o IVF-PQ existe e foi treinado sobre a geração atual do índice local."""
+        if not self.exists(dim) or not self._exact.exists(dim):
+            return False
+        try:
+            idx = self._load(dim)
+        except FileNotFoundError:
+            return False
+        return str(idx["geracao"]) == self._exact.snapshot(dim).geracao
+
+    def _load(self, dim: int) -> Dict[str, np.ndarray]:
+        path = self.path(dim)
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Índice IVF-PQ '{path}' não encontrado. Gere com scripts/build_ivfpq_index.py.")
+        with self._lock:
+            cached = self._cache.get(dim)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with np.load(path) as z:
+                arrays = {name: z[name] for name in z.files}
+            if "geracao" not in arrays:
+                raise FileNotFoundError(
+                    f"Índice IVF-PQ '{path}' sem a geração do índice local. Gere de novo com scripts/build_ivfpq_index.py."
+                )
+            self._cache[dim] = (mtime, arrays)
+            return arrays
+
+    # ------------------------
+    # Build
+    # ------------------------
+    @classmethod
+    def escolher_m(cls, n: int, d: int, nlist: int, memory_mb: float) -> int:
+        """
+        Maior número de sub-quantizadores `m` (divisor de D) que cabe no orçamento:
+        códigos (n*m bytes) + posições (n*4) + centróides e codebooks em float32.
+        """
+        orcamento = memory_mb * 1024 * 1024
+        fixo = n * 4 + nlist * d * 4 + cls.KSUB * d * 4
+        candidatos = [m for m in range(1, min(d, 512) + 1) if d % m == 0]
+        cabem = [m for m in candidatos if fixo + n * m <= orcamento]
+        if not cabem:
+            raise ValueError(
+                f"Orçamento de {memory_mb} MB insuficiente para {n} vetores de dimensão {d} "
+                f"(mínimo ~{(fixo + n) / 1024 / 1024:.1f} MB)."
+            )
+        return max(cabem)
+
+    def build(
+        self,
+        dim: int,
+        memory_mb: Optional[float] = None,
+        nlist: Optional[int] = None,
+        train_size: Optional[int] = None,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Treina e codifica o IVF-PQ a partir da matriz normalizada do índice local.
+        Retorna um resumo com os parâmetros escolhidos e o tamanho em memória.
+        """
+        from sklearn.cluster import MiniBatchKMeans
+
+        snap = self._exact.snapshot(dim)
+        n, d = snap.mat.shape
+        memory_mb = float(memory_mb or os.getenv("IVFPQ_MEMORY_MB", 512))
+        nlist = int(nlist or os.getenv("IVFPQ_NLIST", 0) or max(1, min(4096, int(4 * np.sqrt(n)))))
+        nlist = min(nlist, n)
+        train_size = int(train_size or os.getenv("IVFPQ_TRAIN_SIZE", 50_000))
+        m = self.escolher_m(n, d, nlist, memory_mb)
+        dsub = d // m
+
+        rng = np.random.default_rng(seed)
+        amostra = np.sort(rng.choice(n, size=min(n, train_size), replace=False))
+        xt = snap.vetores(amostra)
+
+        # Quantizador grosso
+        coarse = MiniBatchKMeans(n_clusters=nlist, random_state=seed, n_init=3, batch_size=4096).fit(xt)
+        centroids = coarse.cluster_centers_.astype(np.float32)
+
+        # Codebooks dos resíduos, um por subespaço (amostra menor basta para 256 códigos)
+        resid = xt - centroids[self._assign(xt, centroids)]
+        resid = resid[: self.KSUB * 64]
+        ksub = min(self.KSUB, len(resid))
+        codebooks = np.zeros((m, self.KSUB, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = resid[:, j * dsub:(j + 1) * dsub]
+            km = MiniBatchKMeans(n_clusters=ksub, random_state=seed, n_init=1, batch_size=4096, max_iter=20).fit(sub)
+            codebooks[j, :ksub] = km.cluster_centers_
+            if ksub < self.KSUB:
+                codebooks[j, ksub:] = km.cluster_centers_[0]  # poucos dados: códigos repetidos nunca vencem o argmin
+
+        # Codificação em blocos (a matriz completa nunca é carregada)
+        listas = np.empty(n, dtype=np.int32)
+        codes = np.empty((n, m), dtype=np.uint8)
+        for i in range(0, n, self.ENCODE_BLOCK):
+            x = snap.vetores(slice(i, i + self.ENCODE_BLOCK))
+            a = self._assign(x, centroids)
+            listas[i:i + len(x)] = a
+            codes[i:i + len(x)] = self._encode(x - centroids[a], codebooks)
+
+        # Listas invertidas: posições ordenadas por lista + offsets
+        order = np.argsort(listas, kind="stable").astype(np.int32)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(listas, minlength=nlist), out=offsets[1:])
+
+        path = self.path(dim)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            centroids=centroids,
+            codebooks=codebooks,
+            codes=codes[order],
+            order=order,
+            offsets=offsets,
+            geracao=np.asarray(snap.geracao),
+            n=np.int64(n),
+        )
+        os.replace(tmp, path)
+        bump_collection_version()
+
+        bytes_ = codes.nbytes + order.nbytes + offsets.nbytes + centroids.nbytes + codebooks.nbytes
+        return {
+            "n": int(n),
+            "dim": int(d),
+            "nlist": int(nlist),
+            "m": int(m),
+            "bytes_por_vetor": int(m),
+            "memoria_mb": round(bytes_ / 1024 / 1024, 2),
+            "orcamento_mb": memory_mb,
+        }
+
+    @staticmethod
+    def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ||x - c||² = argmax (x·c - ||c||²/2)
+        return np.argmax(x @ centroids.T - 0.5 * np.einsum("ij,ij->i", centroids, centroids), axis=1)
+
+    @staticmethod
+    def _encode(resid: np.ndarray, codebooks: np.ndarray) -> np.ndarray:
+        m, _, dsub = codebooks.shape
+        out = np.empty((resid.shape[0], m), dtype=np.uint8)
+        for j in range(m):
+            sub = resid[:, j * dsub:(j + 1) * dsub]
+            cb = codebooks[j]
+            dist = -2.0 * sub @ cb.T + np.einsum("ij,ij->i", cb, cb)  # ||sub||² é constante por linha
+            out[:, j] = np.argmin(dist, axis=1)
+        return out
+
+    # ------------------------
+    # API pública (mesmo contrato do ChromaDB)
+    # ------------------------
+    def get_embeddings(self, ids: List[str], dim: int) -> Tuple[List[str], np.ndarray]:
+        """Vetores exatos de `ids`, lidos da matriz do índice local."""
+        return self._exact.get_embeddings(ids, dim)
+
+    def query_similar_by_embedding(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """Top-k aproximado (IVF-PQ + rerank exato) para um único embedding [D] ou [1, D]."""
+        q = np.asarray(query_embedding, dtype=np.float32)
+        if q.ndim == 1:
+            q = q.reshape(1, -1)
+        if q.ndim != 2 or q.shape[0] != 1:
+            raise ValueError("`query_embedding` deve ter shape [D] ou [1, D].")
+
+        return self.query_similar_by_embeddings(
+            q, top_k=top_k, dim=dim, include_embeddings=include_embeddings, areas=areas
+        )
+
+    def query_similar_by_embeddings(
+        self,
+        query_embeddings: Union[List[List[float]], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        nprobe: Optional[int] = None,
+        rerank: Optional[int] = None,
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Variante em lote: matriz de consultas [N, D], uma linha de resultado por consulta.
+        Com `areas`, as listas invertidas são filtradas pelo bitmap de áreas do índice exato
+        antes do cálculo das distâncias aproximadas (só candidatos das áreas entram na shortlist).
+        """
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if q.ndim != 2 or q.shape[0] == 0:
+            raise ValueError("`query_embeddings` deve ser uma matriz 2D (shape [N, D]).")
+
+        d = q.shape[1]
+        if dim is not None and int(dim) != d:
+            raise ValueError(f"Dimensão informada ({dim}) não bate com o embedding de consulta ({d}).")
+
+        idx = self._load(d)
+        snap = self._exact.snapshot(d)  # uma geração para ids, máscara e rerank
+        if str(idx["geracao"]) != snap.geracao or int(idx["n"]) != snap.n:
+            raise FileNotFoundError(
+                f"Índice IVF-PQ '{self.path(d)}' gerado sobre outra versão do índice local. "
+                "Gere de novo com scripts/build_ivfpq_index.py."
+            )
+        mascara = snap.mascara_areas(areas)
+        centroids, codebooks = idx["centroids"], idx["codebooks"]
+        codes, order, offsets = idx["codes"], idx["order"], idx["offsets"]
+        m, _, dsub = codebooks.shape
+        nprobe = max(1, min(int(nprobe or self.nprobe), len(centroids)))
+        k = max(0, int(top_k))
+        shortlist = max(k, int(rerank or self.rerank))
+
+        normas = np.linalg.norm(q, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        q = q / normas
+
+        res: Dict[str, Any] = {"ids": [], "distances": [], "similarities": [], "metadatas": []}
+        if include_embeddings:
+            res["embeddings"] = []
+
+        coarse = q @ centroids.T  # [N, nlist]
+        for qi, qv in enumerate(q):
+            # <q, c + r> = <q, c> + Σ_j <q_j, codebook_j[code_j]>
+            lut = np.einsum("jd,jkd->jk", qv.reshape(m, dsub), codebooks)  # [m, 256]
+            if mascara is None:
+                listas = np.argpartition(-coarse[qi], nprobe - 1)[:nprobe]
+            else:
+                # Com filtro, listas sem candidatos das áreas não contam no nprobe: segue pelas
+                # listas mais próximas até visitar `nprobe` listas com candidatos filtrados
+                listas = np.argsort(-coarse[qi])
+            pos, aprox = [], []
+            visitadas = 0
+            for l in listas:
+                if visitadas >= nprobe:
+                    break
+                a, b = offsets[l], offsets[l + 1]
+                membros, cods = order[a:b], codes[a:b]
+                if mascara is not None:
+                    sel = mascara[membros]
+                    membros, cods = membros[sel], cods[sel]
+                if len(membros) == 0:
+                    continue
+                visitadas += 1
+                pos.append(membros)
+                aprox.append(coarse[qi, l] + lut[np.arange(m), cods].sum(axis=1))
+            if pos:
+                pos = np.concatenate(pos)
+                aprox = np.concatenate(aprox)
+                if len(pos) > shortlist:
+                    pos = pos[np.argpartition(-aprox, shortlist - 1)[:shortlist]]
+            else:
+                pos = np.empty(0, dtype=np.int32)
+
+            # Rerank exato com os vetores da matriz memory-mapped
+            pos = np.sort(pos)  # leitura sequencial no mmap
+            exatos = snap.vetores(pos)
+            sims = exatos @ qv
+            top = np.argsort(-sims, kind="stable")[:k]
+            s = sims[top].astype(float)
+            row_ids = snap.ids[pos[top]].tolist()
+            res["ids"].append(row_ids)
+            res["similarities"].append(s.tolist())
+            res["distances"].append((1.0 - s).tolist())
+            res["metadatas"].append([{"candidate_id": _id} for _id in row_ids])
+            if include_embeddings:
+                res["embeddings"].append(exatos[top])
+
+        return res
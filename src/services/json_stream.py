@@ -0,0 +1,91 @@
+import codecs
+import json
+from typing import Any, IO, Iterator, Tuple
+
+_WS = " \t\n\r"
+
+
+class _Reader:
+    """Buffer de texto sobre um arquivo (texto ou binário) lido em blocos."""
+
+    def __init__(self, fp: IO, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        """Lê mais um bloco; retorna False se o arquivo acabou."""
+        if self.eof:
+            return False
+        chunk = self.fp.read(size)
+        if not chunk:
+            self.eof = True
+            self.buf += self.decoder.decode(b"", final=True)
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self.decoder.decode(chunk)
+        # descarta o que já foi consumido para o buffer não crescer com o arquivo
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Próximo caractere não-branco (sem consumir); "" no fim do arquivo."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill(self.chunk_size):
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"JSON inválido: esperado '{ch}', encontrado '{got or 'EOF'}'.")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """Decodifica o próximo valor JSON, lendo mais blocos enquanto ele estiver incompleto."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.buf, self.pos)
+                # número/literal no fim do buffer pode estar truncado: confirma lendo mais
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(size)
+            size *= 2  # valores grandes: cresce a leitura para não re-decodificar demais
+
+
+def iter_json_object(fp: IO, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Itera (chave, valor) do objeto JSON de nível superior de `fp` sem carregar o
+    documento inteiro: só o par corrente (e um bloco de leitura) fica em memória.
+    Aceita arquivos abertos em modo texto ou binário (UTF-8).
+    """
+    r = _Reader(fp, chunk_size)
+    decoder = json.JSONDecoder()
+
+    r.expect("{")
+    if r.peek() == "}":
+        return
+    while True:
+        chave = r.value(decoder)
+        if not isinstance(chave, str):
+            raise ValueError("JSON inválido: chave do objeto deve ser string.")
+        r.expect(":")
+        yield chave, r.value(decoder)
+
+        ch = r.peek()
+        if ch == "}":
+            return
+        r.expect(",")
@@ -0,0 +1,444 @@
+# lexical_index.py
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.candidate_meta import gravar_bitmap, ler_bitmap, mascara_bitmap, slugs
+from src.services.result_cache import bump_collection_version
+from src.services.retrieve_data import _Singleton
+
+STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo pelos "
+    "por que se sem sob sobre um uma umas uns and for in of on the to with".split()
+)
+MAX_TOKEN = 40
+_TOKEN = re.compile(r"[a-z0-9]+[+#]*")  # mantém c++, c#
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    """Minúsculas e sem acentos; descarta stopwords e tokens com mais de MAX_TOKEN caracteres."""
+    ascii_ = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode("ascii").lower()
+    return [t for t in _TOKEN.findall(ascii_) if len(t) <= MAX_TOKEN and t not in STOPWORDS]
+
+
+def rrf(rankings: Sequence[Sequence[Any]], limite: int, k: int = 60) -> Dict[str, List]:
+    """
+    Reciprocal rank fusion: score(d) = Σ 1 / (k + posição de d em cada ranking), posição a partir de 1.
+    Retorna {"ids", "similarities"} com os `limite` primeiros (score RRF no lugar da similaridade).
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for pos, _id in enumerate(ranking, start=1):
+            _id = str(_id)
+            scores[_id] = scores.get(_id, 0.0) + 1.0 / (k + pos)
+    ordem = sorted(scores.items(), key=lambda kv: -kv[1])[:max(0, int(limite))]
+    return {"ids": [i for i, _ in ordem], "similarities": [s for _, s in ordem]}
+
+
+class _Segmento:
+    """
+    Segmento imutável do índice, aberto com memory-map:
+      - terms.npy    vocabulário ordenado (bytes), busca por np.searchsorted
+      - offsets.npy  início da lista de postings de cada termo [T + 1]
+      - docs.npy     documento (linha do segmento) de cada posting, int32
+      - tfs.npy      frequência do termo no documento, uint16
+      - doclen.npy   tamanho (tokens) de cada documento
+      - ids.json     id do candidato de cada linha
+      - areas.npz    bitmap área x linha (opcional, para o filtro por área)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.terms = np.load(os.path.join(path, "terms.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode="r")
+        self.doclen = np.load(os.path.join(path, "doclen.npy"), mmap_mode="r")
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            self.ids = np.asarray(json.load(f), dtype=object)
+        areas_path = os.path.join(path, "areas.npz")
+        self.areas = ler_bitmap(areas_path) if os.path.exists(areas_path) else None
+
+    def postings(self, termo: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        i = int(np.searchsorted(self.terms, termo))
+        if i < len(self.terms) and self.terms[i] == termo:
+            a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+            return self.docs[a:b], self.tfs[a:b]
+        return np.empty(0, np.int32), np.empty(0, np.uint16)
+
+
+class BM25Index(metaclass=_Singleton):
+    """
+    Índice invertido BM25 em processo sobre o cv_pt dos candidatos, para a busca léxica
+    (nomes exatos de ferramentas como "primavera p6" ou "sap fi") e o modo híbrido do /predict:
+      - Singleton
+      - Segmentos imutáveis em LEXICAL_INDEX_DIR (padrão: database/index/lexical), abertos
+        com memory-map: os workers do gunicorn compartilham as páginas do page cache do SO
+      - manifest.json lista os segmentos vivos e os tombstones (deleted_<geração>.npy, uma
+        máscara booleana por segmento); leitores recarregam quando o manifest muda
+      - Atualização incremental: candidatos novos/alterados entram num segmento novo e as
+        versões anteriores viram tombstone; remoções só gravam tombstones. Com mais de
+        LEXICAL_MAX_SEGMENTS segmentos, todos são fundidos em um (descartando os tombstones)
+
+    Escritas são serializadas por flock; cada escrita troca o manifest de forma atômica e
+    incrementa a versão das coleções (o cache de resultados deixa de valer).
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, index_dir: Optional[str] = None, max_segments: Optional[int] = None):
+        self._dir = index_dir or os.environ.get("LEXICAL_INDEX_DIR", "database/index/lexical")
+        self.max_segments = int(max_segments or os.environ.get("LEXICAL_MAX_SEGMENTS", 8))
+        self._segmentos: Dict[str, _Segmento] = {}
+        self._deletados: Dict[str, np.ndarray] = {}
+        self._estado_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+
+    # ------------------------
+    # Arquivos
+    # ------------------------
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self._dir, "manifest.json")
+
+    def exists(self) -> bool:
+        return os.path.exists(self._manifest_path)
+
+    def _ler_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _gravar_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path)
+
+    def _segmento(self, nome: str) -> _Segmento:
+        with self._lock:
+            seg = self._segmentos.get(nome)
+            if seg is None:
+                seg = self._segmentos[nome] = _Segmento(os.path.join(self._dir, nome))
+            return seg
+
+    def _mascara_deletados(self, entry: Dict[str, Any]) -> Optional[np.ndarray]:
+        nome = entry.get("deleted")
+        if not nome:
+            return None
+        with self._lock:
+            mascara = self._deletados.get(nome)
+            if mascara is None:
+                mascara = self._deletados[nome] = np.load(os.path.join(self._dir, nome))
+            return mascara
+
+    def _estado(self) -> Dict[str, Any]:
+        """Segmentos vivos do manifest atual (com tombstones) e estatísticas globais do BM25."""
+        for tentativa in range(2):
+            try:
+                mtime = os.path.getmtime(self._manifest_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Índice léxico '{self._manifest_path}' não encontrado. Gere com scripts/build_lexical_index.py."
+                )
+            with self._lock:
+                if self._estado_cache and self._estado_cache[0] == mtime:
+                    return self._estado_cache[1]
+                manifest = self._ler_manifest() or {"segments": []}
+                try:
+                    segmentos = [(self._segmento(e["name"]), self._mascara_deletados(e)) for e in manifest["segments"]]
+                except FileNotFoundError:
+                    if tentativa:
+                        raise
+                    continue  # manifest trocado entre a leitura e a abertura dos arquivos
+                n = sum(int(e["live"]) for e in manifest["segments"])
+                total_len = sum(int(e["live_len"]) for e in manifest["segments"])
+                estado = {"segmentos": segmentos, "n": n, "avgdl": total_len / n if n else 0.0}
+                # segmentos/tombstones que saíram do manifest não são mais referenciados
+                nomes = {e["name"] for e in manifest["segments"]}
+                self._segmentos = {k: v for k, v in self._segmentos.items() if k in nomes}
+                deletados = {e.get("deleted") for e in manifest["segments"]}
+                self._deletados = {k: v for k, v in self._deletados.items() if k in deletados}
+                self._estado_cache = (mtime, estado)
+                return estado
+
+    @contextmanager
+    def _escrita(self) -> Iterator[Dict[str, Any]]:
+        """Lock exclusivo de escrita (entre processos) e manifest atual para alterar."""
+        os.makedirs(self._dir, exist_ok=True)
+        with open(os.path.join(self._dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self._ler_manifest() or {"generation": 0, "next_segment": 1, "segments": []}
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _limpar(self, manifest: Dict[str, Any]) -> None:
+        """Remove segmentos e tombstones fora do manifest (workers com mmap aberto seguem lendo o inode)."""
+        vivos = {e["name"] for e in manifest["segments"]}
+        deletados = {e.get("deleted") for e in manifest["segments"]}
+        for nome in os.listdir(self._dir):
+            path = os.path.join(self._dir, nome)
+            if not nome.startswith("seg_") or not os.path.isdir(path):
+                continue
+            if nome not in vivos:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            for arquivo in os.listdir(path):
+                if arquivo.startswith("deleted_") and f"{nome}/{arquivo}" not in deletados:
+                    os.remove(os.path.join(path, arquivo))
+
+    # ------------------------
+    # Build
+    # ------------------------
+    def _gravar_segmento(
+        self,
+        nome: str,
+        ids: List[str],
+        doclen: np.ndarray,
+        termos: np.ndarray,
+        termo_de: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        linhas_de: Dict[str, List[np.ndarray]],
+    ) -> Dict[str, Any]:
+        """
+        Grava um segmento a partir dos postings (termo_de[i], docs[i], tfs[i]), em que `termos`
+        é o vocabulário já ordenado e termo_de indexa nele. Troca o diretório de forma atômica.
+        """
+        ordem = np.lexsort((docs, termo_de))  # por termo e, dentro do termo, por documento
+        offsets = np.zeros(len(termos) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(termo_de, minlength=len(termos)))
+
+        final = os.path.join(self._dir, nome)
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "terms.npy"), termos)
+        np.save(os.path.join(tmp, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp, "docs.npy"), docs[ordem].astype(np.int32))
+        np.save(os.path.join(tmp, "tfs.npy"), tfs[ordem].astype(np.uint16))
+        np.save(os.path.join(tmp, "doclen.npy"), doclen.astype(np.int32))
+        with open(os.path.join(tmp, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        if linhas_de:
+            gravar_bitmap(os.path.join(tmp, "areas.npz"), len(ids), linhas_de)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return {"name": nome, "docs": len(ids), "live": len(ids), "live_len": int(doclen.sum()), "deleted": None}
+
+    def _segmento_de_docs(self, nome: str, docs: Iterable[Tuple[str, str, Sequence[str]]]) -> Optional[Dict[str, Any]]:
+        """Tokeniza (id, texto, áreas) e grava um segmento; None se nenhum documento tiver tokens."""
+        vocab: Dict[str, int] = {}
+        termo_de, doc_de, tfs = array("i"), array("i"), array("H")
+        ids: List[str] = []
+        doclen = array("i")
+        linhas_de: Dict[str, List[int]] = {}
+        for _id, texto, areas in docs:
+            tokens = tokenizar(texto)
+            if not tokens:
+                continue
+            d = len(ids)
+            ids.append(str(_id))
+            doclen.append(len(tokens))
+            for termo, n in Counter(tokens).items():
+                termo_de.append(vocab.setdefault(termo, len(vocab)))
+                doc_de.append(d)
+                tfs.append(min(n, 65535))
+            for area in slugs(areas or []):
+                linhas_de.setdefault(area, []).append(d)
+        if not ids:
+            return None
+
+        nomes = sorted(vocab)
+        posicao = np.empty(len(vocab), dtype=np.int64)
+        posicao[[vocab[t] for t in nomes]] = np.arange(len(nomes))
+        termos = np.asarray([t.encode("ascii") for t in nomes], dtype=f"S{MAX_TOKEN + 4}")
+        return self._gravar_segmento(
+            nome, ids, np.frombuffer(doclen, dtype=np.int32), termos,
+            posicao[np.frombuffer(termo_de, dtype=np.int32)], np.frombuffer(doc_de, dtype=np.int32),
+            np.frombuffer(tfs, dtype=np.uint16),
+            {a: [np.asarray(l, dtype=np.int64)] for a, l in linhas_de.items()},
+        )
+
+    def _compactar(self, manifest: Dict[str, Any]) -> None:
+        """Funde todos os segmentos em um, sem os documentos com tombstone."""
+        ids: List[str] = []
+        doclens, termos, docs, tfs = [], [], [], []
+        linhas_de: Dict[str, List[np.ndarray]] = {}
+        for entry in manifest["segments"]:
+            seg = self._segmento(entry["name"])
+            deletados = self._mascara_deletados(entry)
+            vivos = np.ones(len(seg.ids), dtype=bool) if deletados is None else ~deletados
+            nova_linha = np.cumsum(vivos) - 1 + len(ids)
+            termo_da_posting = np.repeat(np.arange(len(seg.terms)), np.diff(seg.offsets))
+            manter = vivos[seg.docs]
+            termos.append(np.asarray(seg.terms)[termo_da_posting[manter]])
+            docs.append(nova_linha[seg.docs[manter]])
+            tfs.append(np.asarray(seg.tfs)[manter])
+            doclens.append(np.asarray(seg.doclen)[vivos])
+            if seg.areas is not None:
+                indice, bits, n = seg.areas
+                for area, a in indice.items():
+                    linhas = np.flatnonzero(np.unpackbits(bits[a], count=n).astype(bool) & vivos)
+                    linhas_de.setdefault(area, []).append(nova_linha[linhas])
+            ids.extend(seg.ids[vivos].tolist())
+
+        nome = f"seg_{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        if not ids:
+            manifest["segments"] = []
+            return
+        vocab, termo_de = np.unique(np.concatenate(termos), return_inverse=True)
+        manifest["segments"] = [self._gravar_segmento(
+            nome, ids, np.concatenate(doclens), vocab, termo_de.astype(np.int64),
+            np.concatenate(docs), np.concatenate(tfs), linhas_de,
+        )]
+
+    def rebuild(self, docs: Iterable[Tuple[str, str, Sequence[str]]]) -> Dict[str, Any]:
+        """Substitui o índice inteiro por um segmento com `docs` ((id, cv_pt, áreas))."""
+        with self._escrita() as manifest:
+            nome = f"seg_{manifest['next_segment']:06d}"
+            manifest["next_segment"] += 1
+            novo = self._segmento_de_docs(nome, docs)
+            manifest["segments"] = [novo] if novo else []
+            manifest["generation"] += 1
+            self._gravar_manifest(manifest)
+            self._limpar(manifest)
+        bump_collection_version()
+        return {"documentos": novo["docs"] if novo else 0, "segmentos": len(manifest["segments"])}
+
+    def update(
+        self,
+        docs: Iterable[Tuple[str, str, Sequence[str]]] = (),
+        removed: Iterable[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Atualização incremental: `docs` ((id, cv_pt, áreas)) entram num segmento novo, e as
+        versões anteriores desses ids, assim como os ids de `removed`, viram tombstone.
+        """
+        docs = list(docs)
+        alvo = {str(d[0]) for d in docs} | {str(i) for i in removed}
+        with self._escrita() as manifest:
+            manifest["generation"] += 1
+            geracao = manifest["generation"]
+            removidos = 0
+            for entry in manifest["segments"]:
+                seg = self._segmento(entry["name"])
+                atuais = self._mascara_deletados(entry)
+                atingidos = np.fromiter((i in alvo for i in seg.ids), dtype=bool, count=len(seg.ids))
+                if atuais is not None:
+                    atingidos &= ~atuais
+                if not atingidos.any():
+                    continue
+                nome = f"{entry['name']}/deleted_{geracao:06d}.npy"
+                np.save(os.path.join(self._dir, nome), atingidos if atuais is None else (atuais | atingidos))
+                entry["deleted"] = nome
+                entry["live"] -= int(atingidos.sum())
+                entry["live_len"] -= int(np.asarray(seg.doclen)[atingidos].sum())
+                removidos += int(atingidos.sum())
+
+            nome = f"seg_{manifest['next_segment']:06d}"
+            manifest["next_segment"] += 1
+            novo = self._segmento_de_docs(nome, docs)
+            manifest["segments"] = [e for e in manifest["segments"] if e["live"] > 0] + ([novo] if novo else [])
+            if len(manifest["segments"]) > self.max_segments:
+                self._compactar(manifest)
+            self._gravar_manifest(manifest)
+            self._limpar(manifest)
+        bump_collection_version()
+        return {
+            "adicionados": novo["docs"] if novo else 0,
+            "substituidos_ou_removidos": removidos,
+            "segmentos": len(manifest["segments"]),
+        }
+
+    def live_ids(self) -> List[str]:
+        """Ids com documento vivo no índice (sem tombstone)."""
+        ids: List[str] = []
+        for seg, deletados in self._estado()["segmentos"]:
+            ids.extend(seg.ids.tolist() if deletados is None else seg.ids[~deletados].tolist())
+        return ids
+
+    # ------------------------
+    # Consulta
+    # ------------------------
+    def search(self, texto: str, top_k: int = 10, areas: Optional[Sequence[str]] = None) -> Dict[str, List]:
+        """
+        Top-k candidatos por BM25 para `texto`. Retorna {"ids", "scores"} em ordem decrescente.
+        Com `areas`, só os documentos dessas áreas são pontuados (bitmap do segmento; segmentos
+        gravados sem áreas não têm candidatos elegíveis). O df/idf usa o índice inteiro.
+        """
+        termos = [t.encode("ascii") for t in dict.fromkeys(tokenizar(texto))]
+        estado = self._estado()
+        res: Dict[str, List] = {"ids": [], "scores": []}
+        if not termos or estado["n"] == 0 or int(top_k) <= 0:
+            return res
+
+        # 1ª passada: postings vivos de cada termo em cada segmento e df global
+        df = np.zeros(len(termos), dtype=np.float64)
+        postings = []
+        for seg, deletados in estado["segmentos"]:
+            lista = []
+            for j, termo in enumerate(termos):
+                docs, tfs = seg.postings(termo)
+                if deletados is not None and len(docs):
+                    manter = ~deletados[docs]
+                    docs, tfs = docs[manter], tfs[manter]
+                df[j] += len(docs)
+                lista.append((docs, tfs))
+            postings.append(lista)
+        n, avgdl = estado["n"], estado["avgdl"]
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+        # 2ª passada: BM25 por documento, só nas linhas elegíveis
+        alvo = slugs(areas or [])
+        candidatos_s, candidatos_id = [], []
+        for (seg, _), lista in zip(estado["segmentos"], postings):
+            mascara = None
+            if alvo:
+                if seg.areas is None:
+                    continue
+                indice, bits, total = seg.areas
+                mascara = mascara_bitmap(indice, bits, total, alvo)
+            scores = np.zeros(len(seg.ids), dtype=np.float32)
+            for j, (docs, tfs) in enumerate(lista):
+                if mascara is not None and len(docs):
+                    manter = mascara[docs]
+                    docs, tfs = docs[manter], tfs[manter]
+                if not len(docs):
+                    continue
+                tf = tfs.astype(np.float32)
+                norma = self.K1 * (1.0 - self.B + self.B * np.asarray(seg.doclen)[docs] / avgdl)
+                scores[docs] += idf[j] * tf * (self.K1 + 1.0) / (tf + norma)
+            linhas = np.flatnonzero(scores)
+            candidatos_s.append(scores[linhas])
+            candidatos_id.append(seg.ids[linhas])
+
+        if not candidatos_s:
+            return res
+        s = np.concatenate(candidatos_s)
+        ids = np.concatenate(candidatos_id)
+        k = min(int(top_k), len(s))
+        if k == 0:
+            return res
+        top = np.argpartition(-s, k - 1)[:k]
+        top = top[np.argsort(-s[top], kind="stable")]
+        res["ids"] = ids[top].tolist()
+        res["scores"] = s[top].astype(float).tolist()
+        return res
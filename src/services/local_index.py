@@ -0,0 +1,540 @@
+# local_index.py
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.services.candidate_meta import AREA_PREFIX, areas_de_metadados, gravar_bitmap, ler_bitmap, mascara_bitmap, slugs
+from src.services.quantization import dequantize, get_precision, quantize
+from src.services.result_cache import bump_collection_version, chroma_version
+from src.services.retrieve_data import ChromaDB, _Singleton
+
+
+class LocalIndexSnapshot:
+    """
+    Uma geração do índice local, aberta de uma vez: matriz, ids, escala int8 e bitmap de
+    áreas vêm do mesmo manifesto. Leituras que precisam combinar ids, vetores e máscara
+    (uma consulta, um build derivado) usam o mesmo snapshot do início ao fim: uma
+    regravação concorrente só aparece no próximo `LocalVectorIndex.snapshot`.
+    """
+
+    def __init__(
+        self,
+        manifesto: Dict[str, Any],
+        mat: np.ndarray,
+        ids: np.ndarray,
+        escala: Optional[np.ndarray],
+        areas: Optional[Tuple[Dict[str, int], np.ndarray]],
+    ):
+        self.manifesto = manifesto
+        self.mat = mat
+        self.ids = ids
+        self.escala = escala
+        self._areas = areas  # (área -> linha do bitmap, bits empacotados [A, ceil(N/8)])
+        self._posicao: Optional[Dict[str, int]] = None
+
+    @property
+    def geracao(self) -> str:
+        return self.manifesto["geracao"]
+
+    @property
+    def n(self) -> int:
+        return int(self.mat.shape[0])
+
+    def vetores(self, linhas: Union[slice, np.ndarray, List[int]]) -> np.ndarray:
+        """Linhas da matriz convertidas para float32 (aplica a escala quando int8)."""
+        return dequantize(self.mat[linhas], None if self.escala is None else self.escala[linhas])
+
+    def posicao(self) -> Dict[str, int]:
+        """Mapa id -> linha da matriz, montado só quando alguém busca por id."""
+        if self._posicao is None:
+            self._posicao = {str(_id): i for i, _id in enumerate(self.ids)}
+        return self._posicao
+
+    def iter_blocos(
+        self, linhas: Optional[np.ndarray] = None, bloco: int = 8192
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Percorre a matriz (normalizada) em blocos de `bloco` linhas, sem materializá-la:
+        gera (linhas [B], vetores float32 [B, D]). Com `linhas`, só essas, na ordem dada.
+        """
+        total = self.n if linhas is None else len(linhas)
+        for j in range(0, total, bloco):
+            if linhas is None:
+                alvo = slice(j, min(j + bloco, total))
+                posicoes = np.arange(alvo.start, alvo.stop, dtype=np.int64)
+            else:
+                alvo = posicoes = np.asarray(linhas[j:j + bloco], dtype=np.int64)
+            yield posicoes, self.vetores(alvo)
+
+    def mascara_areas(self, areas: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        """Máscara booleana [N] das linhas de candidatos de alguma das `areas` (None = sem filtro)."""
+        alvo = slugs(areas or [])
+        if not alvo:
+            return None
+        if self._areas is None:
+            raise FileNotFoundError(
+                f"Índice local '{self.manifesto['nome']}' sem bitmap de áreas. Gere com scripts/backfill_metadata.py."
+            )
+        indice, bits = self._areas
+        return mascara_bitmap(indice, bits, self.n, alvo)
+
+    def metadados_areas(self, linhas: slice) -> Optional[List[Dict[str, Any]]]:
+        """Flags de área das `linhas`, lidas do bitmap (para derivar índices na mesma ordem de linhas)."""
+        if self._areas is None:
+            return None
+        indice, bits = self._areas
+        inicio, fim, _ = linhas.indices(self.n)
+        desloc = inicio % 8  # desempacota só os bytes que cobrem [inicio, fim)
+        metas: List[Dict[str, Any]] = [{} for _ in range(fim - inicio)]
+        for area, a in indice.items():
+            trecho = np.unpackbits(bits[a, inicio // 8:(fim + 7) // 8])[desloc:desloc + fim - inicio]
+            for i in np.flatnonzero(trecho):
+                metas[i][AREA_PREFIX + area] = True
+        return metas
+
+
+class LocalVectorIndex(metaclass=_Singleton):
+    """
+    Backend de busca vetorial exata, em processo, com o mesmo contrato de
+    `ChromaDB.query_similar_by_embedding(s)`:
+      - Singleton
+      - Uma matriz [N, D] por dimensão, com linhas L2-normalizadas, gravada na
+        precisão de VECTOR_PRECISION (float32, float16 ou int8) e aberta com memory-map (np.load(mmap_mode="r")): os workers do gunicorn
+        compartilham as mesmas páginas do page cache do SO
+      - Similaridade do cosseno = produto interno (matmul vetorizado) e top-k
+        com np.argpartition, sem ida e volta pela rede
+
+    Arquivos em LOCAL_INDEX_DIR (padrão: database/index), por geração <G> de cada build:
+      - <prefixo>_dim<D>.manifest.json  geração atual: nomes dos arquivos abaixo, N, precisão
+      - <prefixo>_dim<D>.<G>.npy        matriz normalizada
+      - <prefixo>_dim<D>.<G>.ids.json   ids das linhas, na mesma ordem
+      - <prefixo>_dim<D>.<G>.scale.npy  escala por linha (só para int8)
+      - <prefixo>_dim<D>.<G>[.<B>].areas.npz bitmap área x linha (np.packbits) para o filtro
+        por área; montado a partir das flags area__<slug> dos metadados no build (<B>: regravação
+        pelo backfill)
+      - variantes derivadas (ex.: PCA) usam <prefixo>_<variante>_dim<D>, como no ChromaDB
+
+    Um build grava a geração nova inteira e só então troca o manifesto (um os.replace): quem
+    lê nunca combina ids de uma geração com vetores de outra. Os arquivos são reabertos
+    automaticamente quando o manifesto muda (ex.: após rodar scripts/build_local_index.py).
+    """
+
+    # Linhas por bloco no build e consultas por bloco no matmul em lote
+    BUILD_BLOCK = 10_000
+    QUERY_BLOCK = 64
+    # Linhas convertidas para float32 por vez quando a matriz é float16/int8
+    DEQUANT_BLOCK = 8192
+    # Chaves do manifesto com nomes de arquivo da geração
+    ARQUIVOS = ("npy", "ids", "scale", "areas")
+
+    def __init__(self, index_dir: Optional[str] = None, collection_prefix: Optional[str] = None):
+        self._dir = index_dir or os.environ.get("LOCAL_INDEX_DIR", "database/index")
+        self._prefix = (collection_prefix or os.environ.get("CHROMA_COLLECTION_PREFIX", "candidates")).strip()
+        self._cache: Dict[Tuple[int, str], Tuple[Tuple[int, int], LocalIndexSnapshot]] = {}  # (dim, variante) -> (stat do manifesto, snapshot)
+        self._lock = threading.RLock()
+
+    # ------------------------
+    # Arquivos
+    # ------------------------
+    def _collection_name(self, dim: int, variant: str = "") -> str:
+        if variant:
+            return f"{self._prefix}_{variant}_dim{int(dim)}"
+        return f"{self._prefix}_dim{int(dim)}"
+
+    def path(self, dim: int, variant: str = "", sufixo: str = ".manifest.json") -> str:
+        """Caminho de um arquivo do índice em LOCAL_INDEX_DIR (padrão: o manifesto)."""
+        return os.path.join(self._dir, self._collection_name(dim, variant)) + sufixo
+
+    def _manifesto(self, dim: int, variant: str = "") -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(dim, variant), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _abrir(self, dim: int, variant: str) -> LocalIndexSnapshot:
+        manifesto = self._manifesto(dim, variant)
+        if manifesto is None:
+            raise FileNotFoundError(self.path(dim, variant))
+        arquivo = lambda chave: os.path.join(self._dir, manifesto[chave])
+        mat = np.load(arquivo("npy"), mmap_mode="r")
+        with open(arquivo("ids"), "r", encoding="utf-8") as f:
+            ids = np.asarray(json.load(f), dtype=object)
+        if mat.shape[0] != len(ids):
+            raise ValueError(f"Índice local inconsistente: {mat.shape[0]} vetores e {len(ids)} ids.")
+        escala = np.load(arquivo("scale"), mmap_mode="r") if manifesto.get("scale") else None
+        areas = None
+        if manifesto.get("areas"):
+            indice, bits, n = ler_bitmap(arquivo("areas"))
+            if n != mat.shape[0]:
+                raise ValueError(f"Bitmap de áreas desatualizado: {n} linhas e {mat.shape[0]} vetores.")
+            areas = (indice, bits)
+        return LocalIndexSnapshot(manifesto, mat, ids, escala, areas)
+
+    def snapshot(self, dim: int, variant: str = "") -> LocalIndexSnapshot:
+        """Geração atual do índice; reaberta só quando o manifesto é trocado."""
+        path = self.path(dim, variant)
+        for _ in range(3):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Índice local '{path}' não encontrado. Gere com scripts/build_local_index.py."
+                )
+            chave = (st.st_ino, st.st_mtime_ns)
+            with self._lock:
+                cached = self._cache.get((dim, variant))
+                if cached and cached[0] == chave:
+                    return cached[1]
+                try:
+                    snap = self._abrir(dim, variant)
+                except FileNotFoundError:
+                    continue  # geração trocada (e apagada) entre o stat e a abertura: relê o manifesto
+                self._cache[(dim, variant)] = (chave, snap)
+                return snap
+        raise RuntimeError(f"Índice local '{path}' regravado durante a leitura; tente de novo.")
+
+    def _trocar_manifesto(self, dim: int, variant: str, manifesto: Dict[str, Any], anterior: Optional[Dict[str, Any]]) -> None:
+        """Publica `manifesto` (os.replace) e apaga os arquivos da geração anterior que saíram de uso."""
+        path = self.path(dim, variant)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifesto, f)
+        os.replace(path + ".tmp", path)
+        em_uso = {manifesto.get(c) for c in self.ARQUIVOS}
+        for c in self.ARQUIVOS:
+            nome = (anterior or {}).get(c)
+            if nome and nome not in em_uso:
+                try:
+                    os.remove(os.path.join(self._dir, nome))
+                except OSError:
+                    pass  # quem já abriu segue com o mmap; no Windows o arquivo mapeado não sai
+
+    # ------------------------
+    # Build
+    # ------------------------
+    def write(
+        self,
+        dim: int,
+        total: int,
+        blocos: Iterator[Tuple[List[str], np.ndarray, Optional[List[Dict[str, Any]]]]],
+        variant: str = "",
+        precision: Optional[str] = None,
+        chroma_versao: Optional[int] = None,
+    ) -> int:
+        """
+        Grava uma geração nova do índice, bloco a bloco, e troca o manifesto no fim.
+        `blocos` gera (ids, vetores, metadatas); as flags de área dos metadatas (quando
+        vierem) formam o bitmap do filtro por área.
+        - chroma_versao: contador de escritas da coleção do ChromaDB lido antes da leitura
+          (build_from_chroma); fica no manifesto para `sincronizado`
+        """
+        precision = get_precision(precision)
+        os.makedirs(self._dir, exist_ok=True)
+        anterior = self._manifesto(dim, variant)
+        geracao = uuid.uuid4().hex[:12]
+        base = f"{self._collection_name(dim, variant)}.{geracao}"
+        nomes: Dict[str, Optional[str]] = {
+            "npy": base + ".npy",
+            "ids": base + ".ids.json",
+            "scale": base + ".scale.npy" if precision == "int8" else None,
+            "areas": None,
+        }
+        arquivo = lambda chave: os.path.join(self._dir, nomes[chave])
+
+        try:
+            mat = np.lib.format.open_memmap(arquivo("npy"), mode="w+", dtype=np.dtype(precision), shape=(total, int(dim)))
+            escala = None
+            if precision == "int8":
+                escala = np.lib.format.open_memmap(arquivo("scale"), mode="w+", dtype=np.float32, shape=(total,))
+            ids: List[str] = []
+            linhas_de: Dict[str, List[np.ndarray]] = {}  # área -> linhas (por bloco)
+            com_metadados = False
+            for bloco_ids, bloco, metas in blocos:
+                if metas is not None:
+                    com_metadados = True
+                    por_area: Dict[str, List[int]] = {}
+                    for i, md in enumerate(metas):
+                        for area in areas_de_metadados(md):
+                            por_area.setdefault(area, []).append(len(ids) + i)
+                    for area, linhas in por_area.items():
+                        linhas_de.setdefault(area, []).append(np.asarray(linhas, dtype=np.int64))
+                bloco = np.asarray(bloco, dtype=np.float32)
+                normas = np.linalg.norm(bloco, axis=1, keepdims=True)
+                normas[normas == 0] = 1.0
+                codigos, esc = quantize(bloco / normas, precision)
+                mat[len(ids):len(ids) + len(bloco_ids)] = codigos
+                if escala is not None:
+                    escala[len(ids):len(ids) + len(bloco_ids)] = esc
+                ids.extend(map(str, bloco_ids))
+            mat.flush()
+            del mat
+            if escala is not None:
+                escala.flush()
+                del escala
+            if len(ids) != total:
+                raise RuntimeError(f"Origem mudou durante o build: esperado {total}, lido {len(ids)}.")
+
+            with open(arquivo("ids"), "w", encoding="utf-8") as f:
+                json.dump(ids, f)
+            if com_metadados:
+                nomes["areas"] = base + ".areas.npz"
+                gravar_bitmap(arquivo("areas"), total, linhas_de)
+        except BaseException:
+            for nome in nomes.values():
+                if nome and os.path.exists(os.path.join(self._dir, nome)):
+                    os.remove(os.path.join(self._dir, nome))
+            raise
+
+        manifesto = {
+            "nome": self._collection_name(dim, variant),
+            "geracao": geracao,
+            "n": total,
+            "dim": int(dim),
+            "precision": precision,
+            "chroma_versao": chroma_versao,
+            **nomes,
+        }
+        self._trocar_manifesto(dim, variant, manifesto, anterior)
+        bump_collection_version()
+        return total
+
+    def build_from_chroma(self, dim: int, batch: int = BUILD_BLOCK) -> int:
+        """Monta o índice local a partir da coleção `dim` do ChromaDB."""
+        col = ChromaDB()._get_or_create_collection(dim)
+        versao = chroma_version(col.name)  # antes da leitura: escritas durante o build deixam o índice para trás
+        total = col.count()
+
+        def blocos():
+            for offset in range(0, total, batch):
+                res = col.get(limit=batch, offset=offset, include=["embeddings", "metadatas"])
+                if not res.get("ids"):
+                    return
+                yield list(res["ids"]), res["embeddings"], res.get("metadatas")
+
+        return self.write(dim, total, blocos(), chroma_versao=versao)
+
+    def build_from_snapshot(self, in_prefix: str, batch: int = BUILD_BLOCK) -> int:
+        """Monta o índice local a partir de um snapshot binário (.npy + .meta.jsonl)."""
+        src = np.load(f"{in_prefix}.npy", mmap_mode="r")
+        escala = np.load(f"{in_prefix}.scale.npy", mmap_mode="r") if src.dtype == np.int8 else None
+        ids: List[str] = []
+        metas: List[Dict[str, Any]] = []
+        with open(f"{in_prefix}.meta.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    ids.append(str(rec["id"]))
+                    metas.append(rec.get("metadata") or {})
+
+        def blocos():
+            for i in range(0, len(ids), batch):
+                vetores = dequantize(src[i:i + batch], None if escala is None else escala[i:i + batch])
+                yield ids[i:i + batch], vetores, metas[i:i + batch]
+
+        return self.write(src.shape[1], len(ids), blocos())
+
+    def build_truncated(self, src_dim: int, dim: int, batch: int = BUILD_BLOCK) -> int:
+        """
+        Deriva o índice de dimensão `dim` a partir do de `src_dim`, mantendo as
+        primeiras `dim` coordenadas de cada vetor (renormalizadas no _write).
+        """
+        if int(dim) >= int(src_dim):
+            raise ValueError(f"Dimensão truncada ({dim}) deve ser menor que a de origem ({src_dim}).")
+        snap = self.snapshot(src_dim)
+
+        def blocos():
+            for i in range(0, snap.n, batch):
+                linhas = slice(i, i + batch)
+                yield snap.ids[linhas].tolist(), snap.vetores(linhas)[:, :int(dim)], snap.metadados_areas(linhas)
+
+        return self.write(dim, snap.n, blocos())
+
+    # ------------------------
+    # API pública (mesmo contrato do ChromaDB)
+    # ------------------------
+    def exists(self, dim: int, variant: str = "") -> bool:
+        """True se o índice da dimensão (e variante) já foi gerado."""
+        return os.path.exists(self.path(dim, variant))
+
+    def sincronizado(self, dim: int, snap: Optional[LocalIndexSnapshot] = None) -> bool:
+        """
+        True se o índice (ou `snap`) tem todas as escritas da coleção `dim` do ChromaDB:
+        gerado do Chroma sem escritas depois, ou de um snapshot num ambiente em que o Chroma
+        nunca foi escrito. Sem Redis não há contador, e o índice é tomado como em dia.
+        """
+        atual = chroma_version(self._collection_name(dim))
+        if atual is None:
+            return True
+        registrada = (snap or self.snapshot(dim)).manifesto.get("chroma_versao")
+        return atual == (0 if registrada is None else registrada)
+
+    def indices(self) -> List[Tuple[int, str]]:
+        """(dim, variante) de cada índice gerado em LOCAL_INDEX_DIR."""
+        if not os.path.isdir(self._dir):
+            return []
+        padrao = re.compile(rf"{re.escape(self._prefix)}_(?:(.+)_)?dim(\d+)\.manifest\.json")
+        achados = [padrao.fullmatch(arquivo) for arquivo in sorted(os.listdir(self._dir))]
+        return [(int(m.group(2)), m.group(1) or "") for m in achados if m]
+
+    def ids(self, dim: int, variant: str = "") -> np.ndarray:
+        """Ids das linhas da matriz, na ordem das linhas."""
+        return self.snapshot(dim, variant).ids
+
+    def vetores(self, dim: int, linhas: Union[slice, np.ndarray, List[int]], variant: str = "") -> np.ndarray:
+        """Linhas da matriz em float32 (para várias leituras coerentes, use `snapshot`)."""
+        return self.snapshot(dim, variant).vetores(linhas)
+
+    def iter_blocos(
+        self,
+        dim: int,
+        linhas: Optional[np.ndarray] = None,
+        bloco: int = DEQUANT_BLOCK,
+        variant: str = "",
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Percorre a matriz em blocos (LocalIndexSnapshot.iter_blocos). Todos os blocos vêm da
+        mesma geração, mesmo que o índice seja regravado durante a leitura.
+        """
+        return self.snapshot(dim, variant).iter_blocos(linhas, bloco)
+
+    def write_area_bitmap(
+        self, dim: int, metadatas: Iterable[Optional[Dict[str, Any]]], variant: str = "", geracao: Optional[str] = None
+    ) -> int:
+        """
+        Regrava só o bitmap de áreas de um índice existente, a partir dos metadados de cada
+        linha (na ordem da matriz). Usado no backfill, sem reconstruir a matriz.
+        - geracao: a do snapshot cujos ids geraram os metadados; se o índice foi regravado
+          desde então (outra ordem de linhas), nada é gravado
+        """
+        snap = self.snapshot(dim, variant)
+        if geracao is not None and geracao != snap.geracao:
+            raise RuntimeError("Índice local regravado durante o backfill (outra ordem de linhas); rode de novo.")
+        por_area: Dict[str, List[int]] = {}
+        n = 0
+        for i, md in enumerate(metadatas):
+            for area in areas_de_metadados(md):
+                por_area.setdefault(area, []).append(i)
+            n += 1
+        if n != snap.n:
+            raise ValueError(f"Número de metadados ({n}) difere do número de vetores ({snap.n}).")
+        nome = f"{self._collection_name(dim, variant)}.{snap.geracao}.{uuid.uuid4().hex[:6]}.areas.npz"
+        gravar_bitmap(os.path.join(self._dir, nome), snap.n, {a: [np.asarray(l, dtype=np.int64)] for a, l in por_area.items()})
+        atual = self._manifesto(dim, variant)
+        if atual is None or atual["geracao"] != snap.geracao:
+            os.remove(os.path.join(self._dir, nome))
+            raise RuntimeError("Índice local regravado durante o backfill (outra ordem de linhas); rode de novo.")
+        self._trocar_manifesto(dim, variant, {**atual, "areas": nome}, atual)
+        bump_collection_version()
+        return len(por_area)
+
+    def get_embeddings(self, ids: List[str], dim: int, variant: str = "") -> Tuple[List[str], np.ndarray]:
+        """Vetores (normalizados) de `ids`; retorna (ids encontrados, matriz [M, D])."""
+        snap = self.snapshot(dim, variant)
+        pos = snap.posicao()
+        achados = [str(i) for i in ids if str(i) in pos]
+        linhas = np.asarray([pos[i] for i in achados], dtype=np.int64)
+        return achados, snap.vetores(linhas).reshape(len(linhas), int(dim))
+
+    def query_similar_by_embedding(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        variant: str = "",
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Busca exata pelos `top_k` vetores mais similares (cosine).
+        - query_embedding: shape [D] ou [1, D]
+        - areas: opcional; só candidatos de alguma dessas áreas (pré-filtro pelo bitmap)
+        Retorna `ids`, `distances`, `similarities` e `metadatas` no formato do Chroma.
+        """
+        q = np.asarray(query_embedding, dtype=np.float32)
+        if q.ndim == 1:
+            q = q.reshape(1, -1)
+        if q.ndim != 2 or q.shape[0] != 1:
+            raise ValueError("`query_embedding` deve ter shape [D] ou [1, D].")
+
+        return self.query_similar_by_embeddings(
+            q, top_k=top_k, dim=dim, include_embeddings=include_embeddings, variant=variant, areas=areas
+        )
+
+    def query_similar_by_embeddings(
+        self,
+        query_embeddings: Union[List[List[float]], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        variant: str = "",
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Variante em lote: matriz de consultas [N, D], uma linha de resultado por consulta.
+        Com `areas`, o bitmap seleciona as linhas antes do matmul: o custo da busca cai
+        com o tamanho do filtro (não é um pós-filtro sobre o top-k).
+        """
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if q.ndim != 2 or q.shape[0] == 0:
+            raise ValueError("`query_embeddings` deve ser uma matriz 2D (shape [N, D]).")
+
+        d = q.shape[1]
+        if dim is not None and int(dim) != d:
+            raise ValueError(f"Dimensão informada ({dim}) não bate com o embedding de consulta ({d}).")
+
+        snap = self.snapshot(d, variant)  # uma geração para ids, máscara e vetores
+        mascara = snap.mascara_areas(areas)
+        linhas = None if mascara is None else np.flatnonzero(mascara)
+        normas = np.linalg.norm(q, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        q = q / normas
+
+        k = max(0, min(int(top_k), snap.n if linhas is None else len(linhas)))
+        res: Dict[str, Any] = {"ids": [], "distances": [], "similarities": [], "metadatas": []}
+        if include_embeddings:
+            res["embeddings"] = []
+
+        for i in range(0, q.shape[0], self.QUERY_BLOCK):
+            sims = self._similaridades(q[i:i + self.QUERY_BLOCK], snap, linhas)  # [B, N] ou [B, |linhas|]
+            for row in sims:
+                if k == 0:
+                    top = np.empty(0, dtype=np.int64)
+                else:
+                    top = np.argpartition(-row, k - 1)[:k]
+                    top = top[np.argsort(-row[top], kind="stable")]
+                s = row[top].astype(float)
+                if linhas is not None:
+                    top = linhas[top]  # posição no subconjunto -> linha da matriz
+                row_ids = snap.ids[top].tolist()
+                res["ids"].append(row_ids)
+                res["similarities"].append(s.tolist())
+                res["distances"].append((1.0 - s).tolist())
+                res["metadatas"].append([{"candidate_id": _id} for _id in row_ids])
+                if include_embeddings:
+                    res["embeddings"].append(snap.vetores(top))
+
+        return res
+
+    def _similaridades(self, q: np.ndarray, snap: LocalIndexSnapshot, linhas: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        q [B, D] x matriz [N, D]; float16/int8 são convertidos em blocos de DEQUANT_BLOCK linhas.
+        Com `linhas`, só essas linhas da matriz são lidas (resultado [B, len(linhas)]).
+        """
+        if linhas is not None:
+            sims = np.empty((q.shape[0], len(linhas)), dtype=np.float32)
+            for j in range(0, len(linhas), self.DEQUANT_BLOCK):
+                sims[:, j:j + self.DEQUANT_BLOCK] = q @ snap.vetores(linhas[j:j + self.DEQUANT_BLOCK]).T
+            return sims
+        if snap.mat.dtype == np.float32:
+            return q @ snap.mat.T
+        sims = np.empty((q.shape[0], snap.n), dtype=np.float32)
+        for j in range(0, snap.n, self.DEQUANT_BLOCK):
+            sims[:, j:j + self.DEQUANT_BLOCK] = q @ snap.vetores(slice(j, j + self.DEQUANT_BLOCK)).T
+        return sims
@@ -1,246 +1,479 @@
-# src/logging_mlflow.py
-import os
-import time
-import requests
-import statistics as _st
-from typing import Sequence, Optional, List, Dict, Any
-
-class Log:
-    def __init__(self,
-                 mlflow_url: Optional[str] = None,
-                 experiment_name: str = "decision-stats",
-                 max_sim_metrics: int = 200):
-        self.mlflow = (mlflow_url or os.getenv("MLFLOW_URL", "http://mlflow:5001")).rstrip("/")
-        self.model = os.getenv("MODEL", "unknown-model")
-        self.exp_name = experiment_name
-        self.max_sim_metrics = int(max_sim_metrics)
-        self.exp_id = self._ensure_experiment(self.exp_name)
-
-    # ---------- REST helpers ----------
-    def _ensure_experiment(self, name: str) -> str:
-        r = requests.get(
-            f"{self.mlflow}/api/2.0/mlflow/experiments/get-by-name",
-            params={"experiment_name": name},
-            timeout=10,
-        )
-        if r.ok and r.json().get("experiment"):
-            return r.json()["experiment"]["experiment_id"]
-        r = requests.post(
-            f"{self.mlflow}/api/2.0/mlflow/experiments/create",
-            json={"name": name},
-            timeout=10,
-        )
-        r.raise_for_status()
-        return r.json()["experiment_id"]
-
-
-    def _create_run(self, run_name: Optional[str] = None) -> str:
-        payload: Dict[str, Any] = {"experiment_id": self.exp_id}
-        if run_name:
-            payload["run_name"] = run_name
-        r = requests.post(
-            f"{self.mlflow}/api/2.0/mlflow/runs/create",
-            json=payload,
-            timeout=10,
-        )
-        r.raise_for_status()
-        j = r.json()
-        return (j.get("run", {}) or {}).get("info", {}).get("run_id") or j.get("run_id")
-
-
-    def _log_batch(self, run_id: str,
-                   metrics: Optional[List[Dict[str, Any]]] = None,
-                   params: Optional[List[Dict[str, str]]] = None,
-                   tags: Optional[List[Dict[str, str]]] = None) -> None:
-        payload = {"run_id": run_id,
-                   "metrics": metrics or [],
-                   "params": params or [],
-                   "tags": tags or []}
-        r = requests.post(
-            f"{self.mlflow}/api/2.0/mlflow/runs/log-batch",
-            json=payload,
-            timeout=10,
-        )
-        r.raise_for_status()
-
-
-    # ---------- API pública para log ----------
-    def log(self,
-            duration_ms: float,
-            similarities: Sequence[float],
-            k: int,
-            run_name: Optional[str] = None) -> str:
-        run_id = self._create_run(run_name or f"infer-{int(time.time())}")
-        ts = int(time.time() * 1000)
-
-        sims = [float(x) for x in (similarities or [])]
-        n = len(sims)
-        metrics: List[Dict[str, Any]] = [
-            {"key": "duration_ms", "value": float(duration_ms), "timestamp": ts, "step": 0}
-        ]
-
-        if n:
-            sim_mean = sum(sims) / n
-            sim_min, sim_max = min(sims), max(sims)
-            sim_std = _st.pstdev(sims) if n > 1 else 0.0
-            metrics += [
-                {"key": "sim_mean", "value": float(sim_mean), "timestamp": ts, "step": 0},
-                {"key": "sim_min",  "value": float(sim_min),  "timestamp": ts, "step": 0},
-                {"key": "sim_max",  "value": float(sim_max),  "timestamp": ts, "step": 0},
-                {"key": "sim_std",  "value": float(sim_std),  "timestamp": ts, "step": 0},
-            ]
-            capped = sims[: self.max_sim_metrics]
-            for idx, val in enumerate(capped):
-                metrics.append({"key": "sim", "value": float(val), "timestamp": ts, "step": idx})
-
-        params = [
-            {"key": "model", "value": str(self.model)},
-            {"key": "k", "value": str(int(k))},
-            {"key": "n_sims", "value": str(n)},
-        ]
-        tags = [{"key": "source", "value": "python-rest"}]
-        if n > self.max_sim_metrics:
-            tags.append({"key": "sim_truncated",
-                         "value": f"1|logged={self.max_sim_metrics}|total={n}"})
-
-        self._log_batch(run_id, metrics=metrics, params=params, tags=tags)
-        return run_id
-
-
-    def now_ms(self) -> int:
-        return int(time.time() * 1000)
-
-
-    def timed(self) -> float:
-        return time.time() * 1000.0
-
-
-    # ---------- NOVO: exportar "todos os dados" em JSON ----------
-    @staticmethod
-    def fetch_all(mlflow_url: Optional[str] = None,
-                  include_history: bool = True,
-                  cap_history: int = 1000) -> Dict[str, Any]:
-        """
-        Consolida tudo do MLflow em JSON:
-          - experiments
-          - runs (com info)
-          - params, tags
-          - metrics_latest (últimos valores)
-          - metrics_history (histórico completo por métrica, limitado por cap_history)
-        Lê MLFLOW_URL do ambiente se mlflow_url não for passado.
-        """
-        mlflow = (mlflow_url or os.getenv("MLFLOW_URL", "http://mlflow:5001")).rstrip("/")
-
-        def search_experiments() -> List[Dict[str, Any]]:
-            items, token = [], None
-            while True:
-                body = {"max_results": 1000}
-                if token:
-                    body["page_token"] = token
-                r = requests.post(f"{mlflow}/api/2.0/mlflow/experiments/search",
-                                json=body, timeout=15)
-                r.raise_for_status()
-                j = r.json()
-                items.extend(j.get("experiments", []) or [])
-                token = j.get("next_page_token")
-                if not token:
-                    break
-            return items
-
-
-        def search_runs(exp_ids: List[str]) -> List[Dict[str, Any]]:
-            items, token = [], None
-            base = {
-                "experiment_ids": exp_ids,
-                "max_results": 1000,
-                "order_by": ["attributes.start_time DESC"],
-            }
-            while True:
-                body = dict(base)
-                if token:
-                    body["page_token"] = token
-                r = requests.post(f"{mlflow}/api/2.0/mlflow/runs/search",
-                                  json=body, timeout=30)
-                r.raise_for_status()
-                j = r.json()
-                items.extend(j.get("runs", []) or [])
-                token = j.get("next_page_token")
-                if not token:
-                    break
-            return items
-
-
-        def get_metric_history(run_id: str, key: str) -> List[Dict[str, Any]]:
-            pts, token = [], None
-            while True:
-                params = {"run_id": run_id, "metric_key": key}
-                if token:
-                    params["page_token"] = token
-                r = requests.get(f"{mlflow}/api/2.0/mlflow/metrics/get-history",
-                                 params=params, timeout=30)
-                if not r.ok:
-                    break
-                j = r.json()
-                batch = j.get("metrics", []) or []
-                for m in batch:
-                    pts.append({
-                        "timestamp": m.get("timestamp"),
-                        "step": m.get("step"),
-                        "value": m.get("value"),
-                    })
-                    if len(pts) >= cap_history:
-                        return pts
-                token = j.get("next_page_token")
-                if not token:
-                    break
-            return pts
-
-        out: Dict[str, Any] = {"mlflow_url": mlflow, "experiments": []}
-        experiments = search_experiments()
-
-        for e in experiments:
-            eid = e.get("experiment_id")
-            exp_obj = {
-                "experiment_id": eid,
-                "name": e.get("name"),
-                "lifecycle_stage": e.get("lifecycle_stage"),
-                "artifact_location": e.get("artifact_location"),
-                "runs": [],
-            }
-            for r in search_runs([eid]):
-                info = r.get("info", {}) or {}
-                data = r.get("data", {}) or {}
-                latest_metrics = {m["key"]: m["value"] for m in data.get("metrics", [])}
-                params = {p["key"]: p["value"] for p in data.get("params", [])}
-                tags = {t["key"]: t["value"] for t in data.get("tags", [])}
-
-                run_id = info.get("run_id") or r.get("run_id")
-                run_obj: Dict[str, Any] = {
-                    "run_id": run_id,
-                    "run_name": info.get("run_name"),
-                    "status": info.get("status"),
-                    "start_time": info.get("start_time"),
-                    "end_time": info.get("end_time"),
-                    "artifact_uri": info.get("artifact_uri"),
-                    "metrics_latest": latest_metrics,
-                    "params": params,
-                    "tags": tags,
-                }
-
-                if include_history and latest_metrics:
-                    hist: Dict[str, List[Dict[str, Any]]] = {}
-                    for k in latest_metrics.keys():
-                        hist[k] = get_metric_history(run_id, k)
-                    run_obj["metrics_history"] = hist
-
-                exp_obj["runs"].append(run_obj)
-
-            out["experiments"].append(exp_obj)
-
-        return out
-
-
-
-
-
-
+# src/logging_mlflow.py
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+import requests
+import statistics as _st
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Sequence, Optional, List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites do endpoint runs/log-batch do MLflow
+_MLFLOW_MAX_METRICS_PER_BATCH = 1000
+
+_sessions: Dict[Tuple[int, int], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _http_session(pool_size: int = 10) -> requests.Session:
+    """
+    Sessão HTTP com pool de conexões para o MLflow, reaproveitada por processo.
+    Falhas de conexão (MLflow reiniciando, conexão keep-alive fechada) são refeitas
+    com backoff, em até MLFLOW_RETRIES (padrão 2) tentativas; GETs também em 502/503/504.
+    """
+    key = (os.getpid(), int(pool_size))
+    with _sessions_lock:
+        s = _sessions.get(key)
+        if s is None:
+            s = requests.Session()
+            retries = int(os.getenv("MLFLOW_RETRIES", 2))
+            retry = Retry(total=retries, connect=retries, read=0, status=retries,
+                          backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(pool_size), max_retries=retry)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _sessions[key] = s
+        return s
+
+
+class _Flusher:
+    """
+    Envio assíncrono para o MLflow (uma instância por processo/experimento):
+      - `Log.log` só enfileira o registro em uma fila limitada (sem I/O no request)
+      - uma thread de fundo drena a fila em lotes; cada inferência continua sendo um
+        run próprio ("infer-<ts>", params model/k/n_sims), enviado com uma chamada
+        runs/log-batch (mais, se passar de 1000 métricas)
+      - o experiment_id é resolvido uma única vez e reaproveitado
+      - no encerramento do processo (atexit) a fila é drenada
+
+    Variáveis de ambiente:
+      - LOG_QUEUE_SIZE (padrão 10000): capacidade da fila
+      - LOG_QUEUE_POLICY (padrão "drop"): "drop" descarta o registro quando a fila
+        está cheia; "block" espera até LOG_QUEUE_TIMEOUT_MS (padrão 50) e então descarta
+      - LOG_BATCH_SIZE (padrão 200): máximo de inferências drenadas por lote
+      - LOG_FLUSH_INTERVAL_S (padrão 5): espera máxima para completar um lote
+    """
+
+    def __init__(self, mlflow_url: str, experiment_name: str, model: str):
+        self.mlflow = mlflow_url
+        self.exp_name = experiment_name
+        self.model = model
+        self.exp_id: Optional[str] = None
+
+        self.policy = os.getenv("LOG_QUEUE_POLICY", "drop").lower()
+        self.put_timeout = int(os.getenv("LOG_QUEUE_TIMEOUT_MS", 50)) / 1000.0
+        self.batch_size = int(os.getenv("LOG_BATCH_SIZE", 200))
+        self.interval = float(os.getenv("LOG_FLUSH_INTERVAL_S", 5))
+
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+        self.session = _http_session()
+        self.stats = {"enfileirados": 0, "descartados": 0, "enviados": 0, "falhas": 0}
+        self._stats_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mlflow-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _contar(self, chave: str) -> None:
+        # put() roda nas threads dos requests; o envio, na thread do flusher
+        with self._stats_lock:
+            self.stats[chave] += 1
+
+    def contadores(self) -> Dict[str, int]:
+        """Cópia consistente de `stats` (para o /metrics)."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    # ---------- produtor ----------
+    def put(self, record: Dict[str, Any]) -> bool:
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.put_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self._contar("descartados")
+            return False
+        self._contar("enfileirados")
+        return True
+
+    # ---------- consumidor ----------
+    def _next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch(timeout=self.interval)
+            if batch:
+                self._send(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Para a thread e envia o que ainda estiver na fila."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        while True:
+            batch = self._next_batch(timeout=0)
+            if not batch:
+                break
+            self._send(batch)
+
+    # ---------- REST helpers ----------
+    def _experiment_id(self) -> str:
+        if self.exp_id is None:
+            self.exp_id = self._ensure_experiment(self.exp_name)
+        return self.exp_id
+
+    def _ensure_experiment(self, name: str) -> str:
+        r = self.session.get(
+            f"{self.mlflow}/api/2.0/mlflow/experiments/get-by-name",
+            params={"experiment_name": name},
+            timeout=10,
+        )
+        if r.ok and r.json().get("experiment"):
+            return r.json()["experiment"]["experiment_id"]
+        r = self.session.post(
+            f"{self.mlflow}/api/2.0/mlflow/experiments/create",
+            json={"name": name},
+            timeout=10,
+        )
+        r.raise_for_status()
+        return r.json()["experiment_id"]
+
+
+    def _create_run(self, run_name: Optional[str] = None) -> str:
+        payload: Dict[str, Any] = {"experiment_id": self._experiment_id()}
+        if run_name:
+            payload["run_name"] = run_name
+        r = self.session.post(
+            f"{self.mlflow}/api/2.0/mlflow/runs/create",
+            json=payload,
+            timeout=10,
+        )
+        r.raise_for_status()
+        j = r.json()
+        return (j.get("run", {}) or {}).get("info", {}).get("run_id") or j.get("run_id")
+
+
+    def _log_batch(self, run_id: str,
+                   metrics: Optional[List[Dict[str, Any]]] = None,
+                   params: Optional[List[Dict[str, str]]] = None,
+                   tags: Optional[List[Dict[str, str]]] = None) -> None:
+        payload = {"run_id": run_id,
+                   "metrics": metrics or [],
+                   "params": params or [],
+                   "tags": tags or []}
+        r = self.session.post(
+            f"{self.mlflow}/api/2.0/mlflow/runs/log-batch",
+            json=payload,
+            timeout=10,
+        )
+        r.raise_for_status()
+
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        """Um run por inferência; métricas divididas em chamadas de até 1000 itens."""
+        for rec in batch:
+            try:
+                run_id = self._create_run(f"infer-{rec['timestamp'] // 1000}")
+                ts = rec["timestamp"]
+                metrics = [{"key": key, "value": value, "timestamp": ts, "step": step}
+                           for key, value, step in rec["metrics"]]
+
+                params = [{"key": "model", "value": str(self.model)}] + \
+                         [{"key": key, "value": value} for key, value in rec["params"]]
+                tags = [{"key": "source", "value": "python-rest"}] + \
+                       [{"key": key, "value": value} for key, value in rec["tags"]]
+
+                for i in range(0, max(len(metrics), 1), _MLFLOW_MAX_METRICS_PER_BATCH):
+                    chunk = metrics[i:i + _MLFLOW_MAX_METRICS_PER_BATCH]
+                    if i == 0:
+                        self._log_batch(run_id, metrics=chunk, params=params, tags=tags)
+                    else:
+                        self._log_batch(run_id, metrics=chunk)
+                self._contar("enviados")
+            except Exception as e:
+                # MLflow fora do ar não pode afetar as predições: descarta o registro
+                self._contar("falhas")
+                logger.warning("Falha ao enviar registro ao MLflow: %s", e)
+
+
+_flushers: Dict[Tuple[int, str, str], _Flusher] = {}
+_flushers_lock = threading.Lock()
+
+
+def _get_flusher(mlflow_url: str, experiment_name: str, model: str) -> _Flusher:
+    """Um flusher por processo (a chave inclui o pid: workers do gunicorn criam o seu)."""
+    key = (os.getpid(), mlflow_url, experiment_name)
+    with _flushers_lock:
+        f = _flushers.get(key)
+        if f is None:
+            f = _flushers[key] = _Flusher(mlflow_url, experiment_name, model)
+        return f
+
+
+class Log:
+    def __init__(self,
+                 mlflow_url: Optional[str] = None,
+                 experiment_name: str = "decision-stats",
+                 max_sim_metrics: int = 200):
+        self.mlflow = (mlflow_url or os.getenv("MLFLOW_URL", "http://mlflow:5001")).rstrip("/")
+        self.model = os.getenv("MODEL", "unknown-model")
+        self.exp_name = experiment_name
+        self.max_sim_metrics = int(max_sim_metrics)
+        self.flusher = _get_flusher(self.mlflow, self.exp_name, self.model)
+
+
+    # ---------- API pública para log ----------
+    def log(self,
+            duration_ms: float,
+            similarities: Sequence[float],
+            k: int,
+            stages: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Enfileira as métricas da inferência para envio em lote ao MLflow.
+        `stages` (opcional): duração de cada etapa em ms, enviada como stage_<nome>_ms.
+        Não faz I/O; retorna False se o registro foi descartado (fila cheia).
+        """
+        sims = [float(x) for x in (similarities or [])]
+        n = len(sims)
+        metrics: List[Tuple[str, float, int]] = [("duration_ms", float(duration_ms), 0)]
+        for etapa, ms in (stages or {}).items():
+            metrics.append((f"stage_{etapa}_ms", float(ms), 0))
+
+        if n:
+            sim_mean = sum(sims) / n
+            sim_min, sim_max = min(sims), max(sims)
+            sim_std = _st.pstdev(sims) if n > 1 else 0.0
+            metrics += [
+                ("sim_mean", float(sim_mean), 0),
+                ("sim_min",  float(sim_min),  0),
+                ("sim_max",  float(sim_max),  0),
+                ("sim_std",  float(sim_std),  0),
+            ]
+            capped = sims[: self.max_sim_metrics]
+            for idx, val in enumerate(capped):
+                metrics.append(("sim", float(val), idx))
+
+        params = [("k", str(int(k))), ("n_sims", str(n))]
+        tags: List[Tuple[str, str]] = []
+        if n > self.max_sim_metrics:
+            tags.append(("sim_truncated", f"1|logged={self.max_sim_metrics}|total={n}"))
+
+        return self.flusher.put({
+            "timestamp": self.now_ms(),
+            "metrics": metrics,
+            "params": params,
+            "tags": tags,
+        })
+
+
+    def queue_stats(self) -> Dict[str, int]:
+        """Contadores da fila de envio deste processo."""
+        return dict(self.flusher.contadores(), pendentes=self.flusher.queue.qsize())
+
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+
+    def timed(self) -> float:
+        return time.time() * 1000.0
+
+
+    # ---------- NOVO: exportar "todos os dados" em JSON ----------
+    @staticmethod
+    def fetch_all(mlflow_url: Optional[str] = None,
+                  include_history: bool = True,
+                  cap_history: int = 1000,
+                  budget_s: Optional[float] = None,
+                  max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Consolida tudo do MLflow em JSON:
+          - experiments
+          - runs (com info)
+          - params, tags
+          - metrics_latest (últimos valores)
+          - metrics_history (histórico completo por métrica, limitado por cap_history)
+        Lê MLFLOW_URL do ambiente se mlflow_url não for passado.
+
+        Os históricos (uma chamada metrics/get-history por run x métrica) são buscados
+        em paralelo por um pool de `max_workers` threads (METRICS_WORKERS, padrão 16)
+        sobre uma sessão HTTP com pool de conexões. Cada chamada tem timeout próprio
+        (METRICS_CALL_TIMEOUT_S, padrão 10) e a consulta toda respeita um orçamento de
+        `budget_s` segundos (METRICS_BUDGET_S, padrão 20): ao estourar, retorna o que já
+        foi coletado com "partial": true.
+        """
+        mlflow = (mlflow_url or os.getenv("MLFLOW_URL", "http://mlflow:5001")).rstrip("/")
+        budget = float(budget_s if budget_s is not None else os.getenv("METRICS_BUDGET_S", 20))
+        workers = int(max_workers or os.getenv("METRICS_WORKERS", 16))
+        call_timeout = float(os.getenv("METRICS_CALL_TIMEOUT_S", 10))
+
+        t0 = time.monotonic()
+        deadline = t0 + budget
+        session = _http_session(pool_size=workers)
+
+        class _BudgetExceeded(Exception):
+            pass
+
+        def timeout() -> float:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _BudgetExceeded()
+            return min(call_timeout, remaining)
+
+        def search_experiments() -> List[Dict[str, Any]]:
+            items, token = [], None
+            while True:
+                body = {"max_results": 1000}
+                if token:
+                    body["page_token"] = token
+                r = session.post(f"{mlflow}/api/2.0/mlflow/experiments/search",
+                                 json=body, timeout=timeout())
+                r.raise_for_status()
+                j = r.json()
+                items.extend(j.get("experiments", []) or [])
+                token = j.get("next_page_token")
+                if not token:
+                    break
+            return items
+
+
+        def search_runs(exp_ids: List[str]) -> List[Dict[str, Any]]:
+            items, token = [], None
+            base = {
+                "experiment_ids": exp_ids,
+                "max_results": 1000,
+                "order_by": ["attributes.start_time DESC"],
+            }
+            while True:
+                body = dict(base)
+                if token:
+                    body["page_token"] = token
+                r = session.post(f"{mlflow}/api/2.0/mlflow/runs/search",
+                                 json=body, timeout=timeout())
+                r.raise_for_status()
+                j = r.json()
+                items.extend(j.get("runs", []) or [])
+                token = j.get("next_page_token")
+                if not token:
+                    break
+            return items
+
+
+        def get_metric_history(run_id: str, key: str) -> List[Dict[str, Any]]:
+            pts, token = [], None
+            while True:
+                params = {"run_id": run_id, "metric_key": key}
+                if token:
+                    params["page_token"] = token
+                r = session.get(f"{mlflow}/api/2.0/mlflow/metrics/get-history",
+                                params=params, timeout=timeout())
+                if not r.ok:
+                    break
+                j = r.json()
+                batch = j.get("metrics", []) or []
+                for m in batch:
+                    pts.append({
+                        "timestamp": m.get("timestamp"),
+                        "step": m.get("step"),
+                        "value": m.get("value"),
+                    })
+                    if len(pts) >= cap_history:
+                        return pts
+                token = j.get("next_page_token")
+                if not token:
+                    break
+            return pts
+
+        out: Dict[str, Any] = {"mlflow_url": mlflow, "experiments": [], "partial": False}
+        pending: List[Tuple[Dict[str, Any], str, str]] = []  # (run_obj, run_id, metric_key)
+
+        try:
+            experiments = search_experiments()
+
+            for e in experiments:
+                eid = e.get("experiment_id")
+                exp_obj = {
+                    "experiment_id": eid,
+                    "name": e.get("name"),
+                    "lifecycle_stage": e.get("lifecycle_stage"),
+                    "artifact_location": e.get("artifact_location"),
+                    "runs": [],
+                }
+                out["experiments"].append(exp_obj)
+                for r in search_runs([eid]):
+                    info = r.get("info", {}) or {}
+                    data = r.get("data", {}) or {}
+                    latest_metrics = {m["key"]: m["value"] for m in data.get("metrics", [])}
+                    params = {p["key"]: p["value"] for p in data.get("params", [])}
+                    tags = {t["key"]: t["value"] for t in data.get("tags", [])}
+
+                    run_id = info.get("run_id") or r.get("run_id")
+                    run_obj: Dict[str, Any] = {
+                        "run_id": run_id,
+                        "run_name": info.get("run_name"),
+                        "status": info.get("status"),
+                        "start_time": info.get("start_time"),
+                        "end_time": info.get("end_time"),
+                        "artifact_uri": info.get("artifact_uri"),
+                        "metrics_latest": latest_metrics,
+                        "params": params,
+                        "tags": tags,
+                    }
+
+                    if include_history and latest_metrics:
+                        run_obj["metrics_history"] = {}
+                        for k in latest_metrics.keys():
+                            pending.append((run_obj, run_id, k))
+
+                    exp_obj["runs"].append(run_obj)
+        except _BudgetExceeded:
+            out["partial"] = True
+
+        # Fan-out concorrente dos históricos, limitado pelo orçamento restante
+        missing = 0
+        if pending and not out["partial"]:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mlflow-history")
+            futures = {pool.submit(get_metric_history, run_id, k): (run_obj, k)
+                       for run_obj, run_id, k in pending}
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            pool.shutdown(wait=False, cancel_futures=True)
+
+            for fut in done:
+                run_obj, k = futures[fut]
+                try:
+                    run_obj["metrics_history"][k] = fut.result()
+                except (_BudgetExceeded, requests.RequestException):
+                    missing += 1
+            missing += len(not_done)
+        elif pending:
+            missing = len(pending)
+
+        if missing:
+            out["partial"] = True
+        out["history_missing"] = missing
+        out["elapsed_ms"] = round((time.monotonic() - t0) * 1000.0, 1)
+        return out
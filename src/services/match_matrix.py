@@ -0,0 +1,308 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import redis
+
+from src.services.local_index import LocalIndexSnapshot, LocalVectorIndex
+from src.services.quantization import get_precision
+from src.services.redis_pool import redis_client
+from src.services.result_cache import VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_blocos(q: np.ndarray, snap: LocalIndexSnapshot, k: int, linhas: Optional[np.ndarray] = None,
+                 bloco: int = 16_384) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k por linha de q [J, D] contra a matriz normalizada de um snapshot do índice local, em
+    blocos de `bloco` candidatos (LocalIndexSnapshot.iter_blocos): cada bloco vira um matmul [J, bloco] e
+    o top-k corrente de todas as vagas é atualizado de uma vez (argpartition ao longo do
+    eixo 1), sem laço por vaga. Com `linhas`, só essas linhas da matriz entram.
+    Retorna (linhas [J, k'], similaridades [J, k']) em ordem decrescente, com k' = min(k, candidatos).
+    """
+    total = snap.n if linhas is None else len(linhas)
+    k = max(0, min(int(k), total))
+    n_vagas = q.shape[0]
+    melhores = np.empty((n_vagas, 0), dtype=np.int64)
+    sims = np.empty((n_vagas, 0), dtype=np.float32)
+    for idx, vetores in snap.iter_blocos(linhas=linhas, bloco=bloco):
+        s = q @ vetores.T  # [J, B]
+        if s.shape[1] > k:
+            top = np.argpartition(-s, k - 1, axis=1)[:, :k]
+            s = np.take_along_axis(s, top, axis=1)
+            idx = idx[top]
+        else:
+            idx = np.broadcast_to(idx, s.shape)
+        sims = np.concatenate([sims, s], axis=1)
+        melhores = np.concatenate([melhores, idx], axis=1)
+        if sims.shape[1] > k:
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            sims = np.take_along_axis(sims, top, axis=1)
+            melhores = np.take_along_axis(melhores, top, axis=1)
+    ordem = np.argsort(-sims, axis=1, kind="stable")
+    return np.take_along_axis(melhores, ordem, axis=1), np.take_along_axis(sims, ordem, axis=1)
+
+
+class MatchMatrix:
+    """
+    Rankings vaga x candidato pré-computados no Redis (DB 4), para o /predict de uma vaga
+    já carregada ser uma leitura de chave em vez de embedding + busca vetorial:
+      - "mm:<job_id>"  JSON {"h": sha256(modelo | busca | descrição), "d": profundidade, "ids", "s"}
+      - "mm:version"   versão das coleções (rc:version) com que a matriz inteira foi conferida
+      - "mm:fp"        hash id -> impressão digital do vetor de cada candidato no último cálculo
+
+    O cálculo é exato (matmul em blocos sobre a matriz memory-mapped do índice local) e
+    incremental:
+      - vagas novas ou com descrição/modelo diferente: top-k completo, em blocos de vagas
+      - candidatos novos ou alterados: só os vetores deles são multiplicados pelas vagas e
+        fundidos nas listas
+      - vaga cuja lista tem candidato alterado ou removido: recalculada por inteiro (a posição
+        que ele ocupava pode ser de um candidato fora da lista)
+    Uma entrada só vale se o hash da descrição bate e se "mm:version" é a versão atual das
+    coleções (lidas no mesmo MGET): depois de qualquer upsert/delete, o /predict volta para
+    a busca normal até a próxima execução do scripts/build_match_matrix.py.
+
+    Variáveis de ambiente:
+      - MATCH_PRECOMPUTE (padrão false): liga a matriz (o entrypoint roda o build_match_matrix.py)
+      - REDIS_URL_4: DB da matriz (se ausente, fica desligada)
+      - MATCH_DEPTH (padrão 100; 0 desliga): candidatos guardados por vaga
+      - EMBED_DIM (padrão 3072): dimensão do índice local usado no cálculo
+
+    `enabled` só é verdadeiro com a matriz ligada e o índice local já gerado: fora disso o
+    /predict nem consulta o Redis e o /upload só pré-computa os embeddings das vagas.
+    """
+
+    PREFIX = "mm"
+    VERSION_KEY = "mm:version"
+    FP_KEY = "mm:fp"
+    LOCK_KEY = "mm:lock"
+    # Vagas por matmul e candidatos por bloco da matriz
+    JOB_BLOCK = 256
+    CANDIDATE_BLOCK = 16_384
+
+    def __init__(self, redis_url: Optional[str] = None, depth: Optional[int] = None):
+        url = redis_url or os.getenv("REDIS_URL_4")
+        self.depth = int(depth if depth is not None else os.getenv("MATCH_DEPTH", 100))
+        self.dim = int(os.getenv("EMBED_DIM", 3072))
+        ligada = os.getenv("MATCH_PRECOMPUTE", "false").lower() == "true"
+        self.redis = redis_client(url) if ligada and url and self.depth > 0 else None
+        self.stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def _contar(self, chave: str) -> None:
+        # += em dict não é atômico entre as threads do worker: contagens sob lock, como no Histogram
+        with self._stats_lock:
+            self.stats[chave] += 1
+
+    def contadores(self) -> Dict[str, int]:
+        """Cópia consistente de `stats` (para o /metrics)."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None and LocalVectorIndex().exists(self.dim)
+
+    @classmethod
+    def chave(cls, job_id: str) -> str:
+        return f"{cls.PREFIX}:{job_id}"
+
+    @staticmethod
+    def hash_vaga(descricao: str, model: str) -> str:
+        # backend, modo de busca e precisão do índice entram no hash, como na chave do ResultCache:
+        # entradas calculadas com outra configuração não respondem o /predict e são recalculadas
+        busca = (f"{os.getenv('VECTOR_BACKEND', 'chroma')}/{os.getenv('RETRIEVAL_MODE', 'single')}"
+                 f"/{get_precision()}")
+        return hashlib.sha256(f"{model}\x00{busca}\x00{descricao}".encode("utf-8")).hexdigest()
+
+    # ------------------------
+    # Leitura (/predict)
+    # ------------------------
+    def get(self, job_id: str, descricao: str, model: str, k: int) -> Optional[Dict[str, List]]:
+        """{"ids", "similarities"} com os k primeiros da vaga, ou None se não houver entrada válida."""
+        if not self.enabled:
+            return None
+        try:
+            atual, conferida, raw = self.redis.mget([VERSION_KEY, self.VERSION_KEY, self.chave(job_id)])
+        except redis.RedisError as e:
+            logger.warning("Matriz de rankings indisponível: %s", e)
+            return None
+
+        if raw is not None and conferida is not None and int(atual or 0) == int(conferida):
+            entrada = json.loads(raw)
+            if entrada["h"] == self.hash_vaga(descricao, model) and k <= entrada["d"]:
+                self._contar("hits")
+                return {"ids": entrada["ids"][:k], "similarities": entrada["s"][:k]}
+        self._contar("misses")
+        return None
+
+    # ------------------------
+    # Cálculo
+    # ------------------------
+    @staticmethod
+    def impressoes(snap: LocalIndexSnapshot, bloco: int = 16_384) -> Dict[str, str]:
+        """id -> blake2b (8 bytes) do vetor de cada linha da matriz do índice local."""
+        fps: Dict[str, str] = {}
+        for linhas, vetores in snap.iter_blocos(bloco=bloco):
+            for _id, vetor in zip(snap.ids[linhas], np.ascontiguousarray(vetores)):
+                fps[str(_id)] = hashlib.blake2b(vetor.tobytes(), digest_size=8).hexdigest()
+        return fps
+
+    @contextmanager
+    def _trava(self, ttl_s: int = 3600) -> Iterator[None]:
+        """
+        Exclusão mútua entre o script e as threads do /upload (SET NX com TTL, sem Lua: funciona
+        também com o fakeredis dos benchmarks). O TTL libera a trava de um processo que morreu.
+        """
+        token = uuid.uuid4().hex.encode("ascii")
+        while not self.redis.set(self.LOCK_KEY, token, nx=True, ex=ttl_s):
+            time.sleep(0.2)
+        try:
+            yield
+        finally:
+            if self.redis.get(self.LOCK_KEY) == token:
+                self.redis.delete(self.LOCK_KEY)
+
+    def _gravar(self, pipe, job_id: str, h: str, ids: Sequence[str], sims: Sequence[float]) -> None:
+        entrada = {"h": h, "d": self.depth, "ids": list(ids), "s": [float(x) for x in sims]}
+        pipe.set(self.chave(job_id), json.dumps(entrada))
+
+    def _calcular_vagas(self, snap: LocalIndexSnapshot, job_ids: List[str], hashes: List[str], q: np.ndarray) -> None:
+        """Top-k completo de várias vagas (blocos de JOB_BLOCK vagas x CANDIDATE_BLOCK candidatos)."""
+        ids = snap.ids
+        for i in range(0, len(job_ids), self.JOB_BLOCK):
+            linhas, sims = top_k_blocos(q[i:i + self.JOB_BLOCK], snap, self.depth, bloco=self.CANDIDATE_BLOCK)
+            pipe = self.redis.pipeline(transaction=False)
+            for job_id, h, row, s in zip(job_ids[i:i + self.JOB_BLOCK], hashes[i:i + self.JOB_BLOCK], linhas, sims):
+                self._gravar(pipe, job_id, h, ids[row].tolist(), s.tolist())
+            pipe.execute()
+
+    def _fundir_novos(self, snap: LocalIndexSnapshot, job_ids: List[str], entradas: List[Dict[str, Any]],
+                      q: np.ndarray, novas_linhas: np.ndarray) -> None:
+        """Funde nas listas das vagas os candidatos novos/alterados (só as linhas deles entram no matmul)."""
+        ids = snap.ids
+        for i in range(0, len(job_ids), self.JOB_BLOCK):
+            linhas, sims = top_k_blocos(q[i:i + self.JOB_BLOCK], snap, self.depth,
+                                        linhas=novas_linhas, bloco=self.CANDIDATE_BLOCK)
+            pipe = self.redis.pipeline(transaction=False)
+            for job_id, entrada, row, s in zip(job_ids[i:i + self.JOB_BLOCK], entradas[i:i + self.JOB_BLOCK], linhas, sims):
+                # dict: um candidato novo que já estava na lista (vaga calculada pelo /upload) não duplica
+                scores = dict(zip(entrada["ids"], entrada["s"]))
+                scores.update(zip(ids[row].tolist(), s.tolist()))
+                pares = sorted(scores.items(), key=lambda p: -p[1])[:self.depth]
+                self._gravar(pipe, job_id, entrada["h"], [p[0] for p in pares], [p[1] for p in pares])
+            pipe.execute()
+
+    def atualizar(self, index, dim: int, vagas: Sequence[Tuple[str, str]], embed, model: str,
+                  candidatos: bool = True) -> Dict[str, Any]:
+        """
+        Atualiza a matriz para `vagas` ((job_id, descrição); todas as vagas carregadas quando
+        `candidatos` é True) com os candidatos do índice local.
+        - embed: função lista de descrições -> lista de vetores (ex.: Model.embed_many)
+        - candidatos: se True, compara as impressões digitais dos candidatos com as do último
+          cálculo, aplica a diferença e confere a matriz com a versão atual das coleções (só
+          se o índice local tem todas as escritas do ChromaDB: um índice atrasado deixaria
+          de fora candidatos novos); se False (ex.: /upload), só recalcula as vagas
+          novas/alteradas
+        Retorna contagens do que foi recalculado.
+        """
+        if self.redis is None:
+            raise RuntimeError("Matriz de rankings desligada (MATCH_PRECOMPUTE, REDIS_URL_4 ou MATCH_DEPTH).")
+        with self._trava():
+            versao = int(self.redis.get(VERSION_KEY) or 0)
+            snap = index.snapshot(dim)  # todo o cálculo sobre a mesma geração do índice
+            conferir = candidatos and index.sincronizado(dim, snap)
+            ids = snap.ids
+            job_ids = [str(v) for v, _ in vagas]
+            hashes = [self.hash_vaga(d, model) for _, d in vagas]
+            brutos = self.redis.mget([self.chave(j) for j in job_ids]) if job_ids else []
+            entradas = [json.loads(raw) if raw is not None else None for raw in brutos]
+
+            novas_linhas = np.empty(0, dtype=np.int64)
+            sujos: Set[str] = set()
+            fps: Dict[str, str] = {}
+            if candidatos:
+                fps = self.impressoes(snap)
+                anteriores = {k.decode("utf-8"): v.decode("utf-8") for k, v in self.redis.hgetall(self.FP_KEY).items()}
+                novos = [i for i, fp in fps.items() if anteriores.get(i) != fp]  # novos ou alterados
+                sujos = {i for i, fp in anteriores.items() if fps.get(i) != fp}  # alterados ou removidos
+                pos = {str(_id): n for n, _id in enumerate(ids)}
+                novas_linhas = np.asarray(sorted(pos[i] for i in novos), dtype=np.int64)
+
+            completas, incrementais = [], []
+            for n, (h, entrada) in enumerate(zip(hashes, entradas)):
+                if (entrada is None or entrada["h"] != h or entrada["d"] != self.depth
+                        or (sujos and not sujos.isdisjoint(entrada["ids"]))):
+                    completas.append(n)
+                elif len(novas_linhas):
+                    incrementais.append(n)
+
+            alvo = completas + incrementais
+            if alvo:
+                descricoes = [vagas[n][1] for n in alvo]
+                q = np.vstack([np.asarray(v, dtype=np.float32) for v in embed(descricoes)])
+                if q.shape[1] != int(dim):
+                    raise ValueError(f"Embeddings das vagas com dimensão {q.shape[1]}, índice local com {dim}.")
+                normas = np.linalg.norm(q, axis=1, keepdims=True)
+                normas[normas == 0] = 1.0
+                q = q / normas
+                c = len(completas)
+                if completas:
+                    self._calcular_vagas(snap, [job_ids[n] for n in completas],
+                                         [hashes[n] for n in completas], q[:c])
+                if incrementais:
+                    self._fundir_novos(snap, [job_ids[n] for n in incrementais],
+                                       [entradas[n] for n in incrementais], q[c:], novas_linhas)
+
+            if candidatos:
+                # Impressões trocadas de uma vez (RENAME) e matriz conferida com a versão lida no início:
+                # se houve upsert durante o cálculo, as entradas já nascem inválidas
+                tmp = self.FP_KEY + ":tmp"
+                self.redis.delete(tmp)
+                itens = list(fps.items())
+                for i in range(0, len(itens), 10_000):
+                    self.redis.hset(tmp, mapping=dict(itens[i:i + 10_000]))
+                if itens:
+                    self.redis.rename(tmp, self.FP_KEY)
+                else:
+                    self.redis.delete(self.FP_KEY)
+                if conferir:
+                    self.redis.set(self.VERSION_KEY, versao)
+                else:
+                    logger.warning("Índice local atrás do ChromaDB: matriz calculada, mas não conferida.")
+
+        return {
+            "vagas": len(job_ids),
+            "recalculadas": len(completas),
+            "incrementais": len(incrementais),
+            "candidatos_novos_ou_alterados": int(len(novas_linhas)),
+            "candidatos_alterados_ou_removidos": len(sujos),
+            "conferida": bool(candidatos and conferir),
+        }
+
+    def atualizar_em_background(self, index, dim: int, vagas: Sequence[Tuple[str, str]], model) -> threading.Thread:
+        """
+        Pré-computa (e persiste) os embeddings das `vagas` e recalcula os rankings delas numa
+        thread daemon (usado pelo /upload). Sem o índice local, fica só nos embeddings.
+        """
+        def _run():
+            try:
+                model.precompute_embeddings([d for _, d in vagas])
+                resumo = self.atualizar(index, dim, vagas, model.embed_many, model.model_name, candidatos=False)
+                logger.info("Matriz de rankings atualizada: %s", resumo)
+            except FileNotFoundError as e:
+                logger.info("Matriz de rankings não atualizada: %s", e)
+            except Exception:
+                logger.exception("Falha ao atualizar a matriz de rankings")
+
+        t = threading.Thread(target=_run, name="match-matrix", daemon=True)
+        t.start()
+        return t
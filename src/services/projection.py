@@ -0,0 +1,100 @@
+# projection.py
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# Nome da variante das coleções projetadas (ex.: candidates_pca_dim256)
+VARIANT = "pca"
+
+
+def _normalizar(X: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(X, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return X / normas
+
+
+class Projection:
+    """
+    Projeção PCA (opcionalmente com whitening) ajustada offline sobre os
+    embeddings dos candidatos (scripts/fit_projection.py) e salva em .npz.
+
+    `transform` normaliza a entrada (L2), centraliza, projeta nos componentes
+    principais, aplica o whitening se houver e renormaliza: o resultado é
+    comparado por cosseno, igual aos vetores originais. O ajuste também é
+    feito sobre vetores normalizados, então a média não depende da escala.
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, scale: Optional[np.ndarray] = None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)  # [d_out, d_in]
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return int(self.components.shape[0])
+
+    @property
+    def input_dim(self) -> int:
+        return int(self.components.shape[1])
+
+    @classmethod
+    def fit(cls, X: np.ndarray, n_components: int, whiten: bool = False, seed: int = 0) -> "Projection":
+        from sklearn.decomposition import PCA
+
+        X = _normalizar(np.asarray(X, dtype=np.float32))
+        pca = PCA(n_components=int(n_components), whiten=whiten, svd_solver="randomized", random_state=seed).fit(X)
+        scale = 1.0 / np.sqrt(pca.explained_variance_) if whiten else None
+        proj = cls(pca.mean_, pca.components_, scale)
+        proj.explained_variance_ratio = float(pca.explained_variance_ratio_.sum())
+        return proj
+
+    def transform(self, X: Union[list, np.ndarray]) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[-1] != self.input_dim:
+            raise ValueError(f"Projeção espera vetores de dimensão {self.input_dim}, recebeu {X.shape[-1]}.")
+        Z = (_normalizar(X) - self.mean) @ self.components.T
+        if self.scale is not None:
+            Z *= self.scale
+        return _normalizar(Z)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        arrays = {"mean": self.mean, "components": self.components}
+        if self.scale is not None:
+            arrays["scale"] = self.scale
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as z:
+            return cls(z["mean"], z["components"], z["scale"] if "scale" in z.files else None)
+
+
+_cache: Tuple[Optional[str], float, Optional[Projection]] = (None, 0.0, None)
+_cache_lock = threading.Lock()
+
+
+def get_projection() -> Optional[Projection]:
+    """
+    Projeção ativa quando RETRIEVAL_MODE=pca (arquivo em PROJECTION_PATH);
+    None nos demais modos. Recarrega se o arquivo mudar no disco.
+    """
+    global _cache
+    if os.getenv("RETRIEVAL_MODE", "single").strip().lower() != "pca":
+        return None
+
+    path = os.getenv("PROJECTION_PATH", "database/index/projection_pca.npz")
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Projeção '{path}' não encontrada. Gere com scripts/fit_projection.py.")
+    with _cache_lock:
+        if _cache[0] != path or _cache[1] != mtime:
+            _cache = (path, mtime, Projection.load(path))
+        return _cache[2]
@@ -0,0 +1,69 @@
+# quantization.py
+import os
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Precisões aceitas para armazenar vetores (VECTOR_PRECISION)
+PRECISOES = ("float32", "float16", "int8")
+
+
+def get_precision(precision: Optional[str] = None) -> str:
+    """Precisão efetiva: argumento explícito ou VECTOR_PRECISION (padrão: float32)."""
+    p = (precision or os.getenv("VECTOR_PRECISION", "float32")).strip().lower()
+    if p not in PRECISOES:
+        raise ValueError(f"Precisão inválida: '{p}'. Use uma de {PRECISOES}.")
+    return p
+
+
+def bytes_por_vetor(dim: int, precision: str) -> int:
+    precision = get_precision(precision)
+    if precision == "int8":
+        return int(dim) + 4  # códigos + escala float32
+    return int(dim) * np.dtype(precision).itemsize
+
+
+def quantize(X: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Converte uma matriz [N, D] (ou vetor [D]) para a precisão de armazenamento.
+    Retorna (códigos, escala):
+      - float32 / float16: cast direto, escala None
+      - int8: quantização escalar simétrica por vetor; escala = max|x| / 127 (float32 [N])
+    """
+    precision = get_precision(precision)
+    X = np.asarray(X, dtype=np.float32)
+    if precision != "int8":
+        return X.astype(precision, copy=False), None
+
+    escala = np.abs(X).max(axis=-1) / 127.0
+    escala = np.where(escala == 0, 1.0, escala).astype(np.float32)
+    codigos = np.clip(np.rint(X / escala[..., None]), -127, 127).astype(np.int8)
+    return codigos, escala
+
+
+def dequantize(codigos: np.ndarray, escala: Optional[np.ndarray] = None) -> np.ndarray:
+    """Volta para float32; vetores int8 precisam da escala por vetor."""
+    codigos = np.asarray(codigos)
+    if codigos.dtype == np.int8:
+        if escala is None:
+            raise ValueError("Vetores int8 exigem a escala por vetor.")
+        return codigos.astype(np.float32) * np.asarray(escala, dtype=np.float32)[..., None]
+    return codigos.astype(np.float32, copy=False)
+
+
+def pack(vetor: np.ndarray, precision: str) -> bytes:
+    """Serializa um vetor [D] (int8: escala float32 seguida dos códigos)."""
+    codigos, escala = quantize(np.asarray(vetor).reshape(-1), precision)
+    if escala is None:
+        return codigos.tobytes()
+    return struct.pack("<f", float(escala)) + codigos.tobytes()
+
+
+def unpack(raw: bytes, precision: str) -> np.ndarray:
+    """Inverso de `pack`: retorna o vetor em float32."""
+    precision = get_precision(precision)
+    if precision == "int8":
+        (escala,) = struct.unpack_from("<f", raw)
+        return np.frombuffer(raw, dtype=np.int8, offset=4).astype(np.float32) * escala
+    return np.frombuffer(raw, dtype=precision).astype(np.float32, copy=False)
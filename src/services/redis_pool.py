@@ -0,0 +1,43 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from redis.retry import Retry
+
+_clients: Dict[Tuple[int, str], redis.Redis] = {}
+_clients_lock = threading.Lock()
+
+
+def redis_client(url: str) -> redis.Redis:
+    """
+    Cliente Redis compartilhado por processo para `url` (um pool de conexões por DB).
+    Instâncias de Data/EmbeddingCache criadas em qualquer ponto reaproveitam o mesmo pool
+    em vez de abrir conexões novas; a chave inclui o pid (workers do gunicorn criam o seu).
+
+    As conexões ociosas são verificadas com PING antes do uso (health check) e comandos
+    que falham por conexão/timeout são refeitos com backoff exponencial, reconectando.
+
+    Variáveis de ambiente:
+      - REDIS_HEALTH_CHECK_S (padrão 30): intervalo do health check das conexões
+      - REDIS_RETRIES (padrão 3): novas tentativas por comando
+      - REDIS_SOCKET_TIMEOUT_S (padrão 5): timeout de leitura/escrita no socket
+    """
+    key = (os.getpid(), url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = redis.from_url(
+                url,
+                health_check_interval=int(os.getenv("REDIS_HEALTH_CHECK_S", 30)),
+                retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), int(os.getenv("REDIS_RETRIES", 3))),
+                retry_on_error=[RedisConnectionError, RedisTimeoutError],
+                socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT_S", 5)),
+                socket_keepalive=True,
+            )
+        return client
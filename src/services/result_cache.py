@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import redis
+
+from src.services.quantization import get_precision
+from src.services.redis_pool import redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "rc:version"
+CHROMA_VERSION_PREFIX = "rc:chroma"
+
+
+def bump_collection_version(colecao: Optional[str] = None) -> Optional[int]:
+    """
+    Incrementa a versão das coleções de candidatos (INCR em REDIS_URL_4), invalidando
+    de uma vez todos os rankings em cache. Chamado em toda escrita que pode mudar um
+    ranking: upsert/delete de vetores e atualização de metadados no ChromaDB (o filtro
+    por área depende deles), reconstrução dos índices locais/IVF-PQ e do índice léxico.
+    Com `colecao` (escritas no ChromaDB), incrementa também o contador de escritas dessa
+    coleção ("rc:chroma:<nome>"), que diz se um índice local gerado dela ficou para trás.
+    Sem Redis configurado (ex.: scripts isolados) não faz nada; falhas só são
+    registradas no log.
+    """
+    url = os.getenv("REDIS_URL_4")
+    if not url:
+        return None
+    try:
+        r = redis_client(url)
+        if not colecao:
+            return int(r.incr(VERSION_KEY))
+        pipe = r.pipeline(transaction=False)
+        pipe.incr(VERSION_KEY)
+        pipe.incr(f"{CHROMA_VERSION_PREFIX}:{colecao}")
+        return int(pipe.execute()[0])
+    except redis.RedisError as e:
+        logger.warning("Falha ao incrementar a versão das coleções: %s", e)
+        return None
+
+
+def chroma_version(colecao: str) -> Optional[int]:
+    """Escritas registradas na coleção `colecao` do ChromaDB (0 se nenhuma; None sem Redis)."""
+    url = os.getenv("REDIS_URL_4")
+    if not url:
+        return None
+    try:
+        return int(redis_client(url).get(f"{CHROMA_VERSION_PREFIX}:{colecao}") or 0)
+    except redis.RedisError as e:
+        logger.warning("Falha ao ler a versão da coleção '%s': %s", colecao, e)
+        return None
+
+
+class ResultCache:
+    """
+    Cache do ranking do /predict (ids + similaridades, em ordem) no Redis (DB 4):
+      - chave = "rc:" + job_id + sha256(descrição | modelo | configuração da busca | filtro)
+      - valor = JSON {"v": versão das coleções, "d": profundidade, "ids": [...], "s": [...]}
+
+    Um único ranking com `depth` candidatos (RESULT_CACHE_DEPTH) responde qualquer k até
+    essa profundidade. A invalidação é automática:
+      - descrição alterada pelo load_vagas -> hash diferente -> outra chave
+      - upsert/delete de candidatos -> `rc:version` muda -> entrada com "v" antigo é miss
+    A versão atual e a entrada vêm no mesmo MGET (uma ida ao Redis por consulta).
+
+    Variáveis de ambiente:
+      - REDIS_URL_4: DB do cache (se ausente, o cache fica desligado)
+      - RESULT_CACHE_DEPTH (padrão 100; 0 desliga): candidatos guardados por vaga
+      - RESULT_CACHE_TTL (padrão 3600): TTL em segundos das entradas
+    """
+
+    PREFIX = "rc"
+
+    def __init__(self, redis_url: Optional[str] = None, depth: Optional[int] = None, ttl_s: Optional[int] = None):
+        url = redis_url or os.getenv("REDIS_URL_4")
+        self.depth = int(depth if depth is not None else os.getenv("RESULT_CACHE_DEPTH", 100))
+        self.ttl = int(ttl_s if ttl_s is not None else os.getenv("RESULT_CACHE_TTL", 3600))
+        self.redis = redis_client(url) if url and self.depth > 0 else None
+        self.stats = {"hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def _contar(self, chave: str) -> None:
+        with self._stats_lock:
+            self.stats[chave] += 1
+
+    def contadores(self) -> Dict[str, int]:
+        """Cópia consistente de `stats` (para o /metrics)."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None
+
+    @classmethod
+    def chave(cls, job_id: str, descricao: str, model: str, filtro: str = "") -> str:
+        h = hashlib.sha256()
+        # tudo que muda o ranking entra na chave: backend, modo de busca, precisão do índice,
+        # parâmetros das buscas aproximadas (two_stage e IVF-PQ) e o filtro (ex.: áreas)
+        busca = "/".join([
+            os.getenv("VECTOR_BACKEND", "chroma"),
+            os.getenv("RETRIEVAL_MODE", "single"),
+            get_precision(),
+            os.getenv("TRUNCATE_DIM", "768"),
+            os.getenv("SHORTLIST_SIZE", "200"),
+            os.getenv("IVFPQ_NPROBE", "16"),
+            os.getenv("IVFPQ_RERANK", "200"),
+        ])
+        for parte in (descricao, model, busca, filtro):
+            h.update(parte.encode("utf-8"))
+            h.update(b"\x00")
+        return f"{cls.PREFIX}:{job_id}:{h.hexdigest()[:32]}"
+
+    def get(self, job_id: str, descricao: str, model: str, k: int,
+            filtro: str = "") -> Tuple[Optional[Dict[str, List]], Optional[int]]:
+        """
+        Retorna ({"ids", "similarities"} com os k primeiros, ou None se miss) e a versão
+        atual das coleções, a ser repassada ao `set` depois de uma consulta ao backend.
+        """
+        if self.redis is None:
+            return None, None
+        try:
+            versao_raw, raw = self.redis.mget([VERSION_KEY, self.chave(job_id, descricao, model, filtro)])
+        except redis.RedisError as e:
+            logger.warning("Cache de resultados indisponível: %s", e)
+            return None, None
+
+        versao = int(versao_raw or 0)
+        if raw is not None:
+            entrada = json.loads(raw)
+            if entrada["v"] == versao and k <= entrada["d"]:
+                self._contar("hits")
+                return {"ids": entrada["ids"][:k], "similarities": entrada["s"][:k]}, versao
+        self._contar("misses")
+        return None, versao
+
+    def query_depth(self, k: int) -> int:
+        """Quantos vizinhos buscar num miss: a profundidade do cache (ou k, se maior)."""
+        return max(int(k), self.depth) if self.redis is not None else int(k)
+
+    def set(self,
+            job_id: str,
+            descricao: str,
+            model: str,
+            versao: Optional[int],
+            ids: Sequence[Any],
+            similaridades: Sequence[float],
+            depth: int,
+            filtro: str = "") -> None:
+        """
+        Grava o ranking de profundidade `depth` (menos itens só quando a coleção tem menos
+        candidatos). `versao` é a lida no `get` anterior à consulta: se houve upsert no meio,
+        a entrada já nasce desatualizada e vira miss, nunca um resultado antigo.
+        """
+        if self.redis is None or versao is None:
+            return
+        entrada = {
+            "v": int(versao),
+            "d": int(depth),
+            "ids": [str(i) for i in ids],
+            "s": [float(x) for x in similaridades],
+        }
+        try:
+            self.redis.set(self.chave(job_id, descricao, model, filtro), json.dumps(entrada), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning("Falha ao gravar no cache de resultados: %s", e)
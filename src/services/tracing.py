@@ -0,0 +1,158 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional
+
+# Limites superiores (ms) dos buckets; o último bucket é aberto (+inf)
+BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+_NOOP = nullcontext()
+
+
+def _flag(nome: str, padrao: str) -> bool:
+    return os.getenv(nome, padrao).strip().lower() in ("1", "true", "yes", "on")
+
+
+class Histogram:
+    """Histograma de latências com buckets fixos (BUCKETS_MS), seguro entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        i = bisect.bisect_left(BUCKETS_MS, ms)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def _percentil(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        """Estimativa pelo limite superior do bucket que contém o quantil `q` (o bucket aberto usa o máximo)."""
+        if not total:
+            return None
+        alvo = q * total
+        acumulado = 0
+        for i, c in enumerate(counts):
+            acumulado += c
+            if acumulado >= alvo:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts, total, soma, maximo = list(self.counts), self.count, self.sum_ms, self.max_ms
+        return {
+            "count": total,
+            "sum_ms": round(soma, 3),
+            "mean_ms": round(soma / total, 3) if total else None,
+            "max_ms": round(maximo, 3),
+            "p50_ms": self._percentil(counts, total, 0.50),
+            "p95_ms": self._percentil(counts, total, 0.95),
+            "p99_ms": self._percentil(counts, total, 0.99),
+            # contagem por limite superior ("+Inf" para o bucket aberto), não cumulativa
+            "buckets": {**{str(b): c for b, c in zip(BUCKETS_MS, counts)}, "+Inf": counts[-1]},
+        }
+
+
+class Tracer:
+    """
+    Tempo por etapa do /predict (busca da descrição, embedding, busca vetorial,
+    hidratação dos candidatos, log), agregado em histogramas em memória por processo.
+
+    - `span(nome)` mede um trecho e soma no histograma da etapa; com TRACING_ENABLED=false
+      devolve um contexto vazio compartilhado (sem relógio, sem lock, sem alocação)
+    - `request()` abre a coleta das etapas de uma requisição (contextvar): o dicionário
+      devolvido recebe a duração de cada span aberto dentro dela, para envio junto com o
+      log da inferência ao MLflow (TRACING_MLFLOW=true)
+
+    Variáveis de ambiente:
+      - TRACING_ENABLED (padrão: true)
+      - TRACING_MLFLOW (padrão: false): encaminha as etapas como métricas stage_<nome>_ms
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, forward_mlflow: Optional[bool] = None):
+        self.enabled = _flag("TRACING_ENABLED", "true") if enabled is None else bool(enabled)
+        self.forward_mlflow = self.enabled and (
+            _flag("TRACING_MLFLOW", "false") if forward_mlflow is None else bool(forward_mlflow))
+        self._hist: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._atual: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+            "tracing_request", default=None)
+
+    def _histograma(self, nome: str) -> Histogram:
+        h = self._hist.get(nome)
+        if h is None:
+            with self._lock:
+                h = self._hist.setdefault(nome, Histogram())
+        return h
+
+    def observe(self, nome: str, ms: float) -> None:
+        self._histograma(nome).observe(ms)
+        etapas = self._atual.get()
+        if etapas is not None:
+            etapas[nome] = etapas.get(nome, 0.0) + ms
+
+    @contextmanager
+    def _span(self, nome: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(nome, (time.perf_counter() - t0) * 1000)
+
+    def span(self, nome: str):
+        if not self.enabled:
+            return _NOOP
+        return self._span(nome)
+
+    @contextmanager
+    def request(self) -> Iterator[Dict[str, float]]:
+        """Coleta as etapas da requisição corrente; o dicionário fica vazio com o tracing desligado."""
+        etapas: Dict[str, float] = {}
+        if not self.enabled:
+            yield etapas
+            return
+        token = self._atual.set(etapas)
+        try:
+            yield etapas
+        finally:
+            self._atual.reset(token)
+
+    def snapshot(self, reset: bool = False) -> Dict:
+        with self._lock:
+            hist = dict(self._hist)
+            if reset:
+                self._hist = {}
+        return {
+            "enabled": self.enabled,
+            "pid": os.getpid(),
+            "stages": {nome: h.snapshot() for nome, h in sorted(hist.items())},
+        }
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Um tracer por processo (cada worker do gunicorn agrega os próprios histogramas)."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def span(nome: str):
+    """Atalho para `get_tracer().span(nome)`."""
+    return get_tracer().span(nome)
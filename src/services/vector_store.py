@@ -0,0 +1,140 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.services.retrieve_data import ChromaDB
+
+
+def truncar(embeddings: Union[List[List[float]], np.ndarray], dim: int) -> np.ndarray:
+    """
+    Mantém as primeiras `dim` coordenadas e renormaliza (L2). O modelo de embedding
+    é treinado para que esse prefixo continue sendo um embedding válido.
+    """
+    m = np.asarray(embeddings, dtype=np.float32)[..., :int(dim)]
+    normas = np.linalg.norm(m, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return m / normas
+
+
+class TwoStageRetriever:
+    """
+    Busca coarse-to-fine sobre um backend vetorial:
+      1) shortlist de `shortlist` candidatos na coleção truncada (`coarse_dim`,
+         ex.: candidates_dim768), com a consulta truncada do mesmo jeito
+      2) rerank exato da shortlist com os vetores completos (ex.: 3072)
+
+    A maior parte da busca roda em vetores com 1/4 do tamanho; só a shortlist
+    é lida em dimensão cheia. Mesmo contrato de `query_similar_by_embedding(s)`.
+    """
+
+    def __init__(self, store, coarse_dim: Optional[int] = None, shortlist: Optional[int] = None):
+        self.store = store
+        self.coarse_dim = int(coarse_dim or os.getenv("TRUNCATE_DIM", 768))
+        self.shortlist = int(shortlist or os.getenv("SHORTLIST_SIZE", 200))
+
+    def query_similar_by_embedding(
+        self,
+        query_embedding: Union[List[float], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        q = np.asarray(query_embedding, dtype=np.float32)
+        if q.ndim == 1:
+            q = q.reshape(1, -1)
+        if q.ndim != 2 or q.shape[0] != 1:
+            raise ValueError("`query_embedding` deve ter shape [D] ou [1, D].")
+
+        return self.query_similar_by_embeddings(
+            q, top_k=top_k, dim=dim, include_embeddings=include_embeddings, areas=areas
+        )
+
+    def query_similar_by_embeddings(
+        self,
+        query_embeddings: Union[List[List[float]], np.ndarray],
+        top_k: int = 5,
+        dim: Optional[int] = None,
+        include_embeddings: bool = False,
+        shortlist: Optional[int] = None,
+        areas: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if q.ndim != 2 or q.shape[0] == 0:
+            raise ValueError("`query_embeddings` deve ser uma matriz 2D (shape [N, D]).")
+
+        d = q.shape[1]
+        if dim is not None and int(dim) != d:
+            raise ValueError(f"Dimensão informada ({dim}) não bate com o embedding de consulta ({d}).")
+        if d <= self.coarse_dim:
+            # Nada a truncar: busca direta
+            return self.store.query_similar_by_embeddings(
+                q, top_k=top_k, include_embeddings=include_embeddings, areas=areas
+            )
+
+        k = max(0, int(top_k))
+        n_short = max(k, int(shortlist or self.shortlist))
+        # O filtro por área já restringe a shortlist (o rerank só vê candidatos das áreas)
+        coarse = self.store.query_similar_by_embeddings(truncar(q, self.coarse_dim), top_k=n_short, areas=areas)
+
+        # Uma única leitura dos vetores completos para todas as shortlists
+        uniao = list(dict.fromkeys(_id for row in coarse["ids"] for _id in row))
+        achados, vetores = self.store.get_embeddings(uniao, d) if uniao else ([], np.empty((0, d), np.float32))
+        vetores = truncar(vetores, d)
+        linha_de = {_id: i for i, _id in enumerate(achados)}
+        q = truncar(q, d)
+
+        res: Dict[str, Any] = {"ids": [], "distances": [], "similarities": [], "metadatas": []}
+        if include_embeddings:
+            res["embeddings"] = []
+        for qi, row in enumerate(coarse["ids"]):
+            cand = [_id for _id in row if _id in linha_de]
+            linhas = np.asarray([linha_de[_id] for _id in cand], dtype=np.int64)
+            sims = vetores[linhas] @ q[qi] if len(linhas) else np.empty(0, np.float32)
+            top = np.argsort(-sims, kind="stable")[:k]
+            s = sims[top].astype(float)
+            row_ids = [cand[i] for i in top]
+            res["ids"].append(row_ids)
+            res["similarities"].append(s.tolist())
+            res["distances"].append((1.0 - s).tolist())
+            res["metadatas"].append([{"candidate_id": _id} for _id in row_ids])
+            if include_embeddings:
+                res["embeddings"].append(vetores[linhas[top]])
+
+        return res
+
+
+def get_vector_store():
+    """
+    Backend de busca vetorial selecionado por VECTOR_BACKEND:
+      - "chroma" (padrão): servidor ChromaDB via HTTP
+      - "local": busca exata em processo sobre matriz memory-mapped (LocalVectorIndex)
+      - "ivfpq": busca aproximada IVF-PQ com rerank exato (IVFPQIndex)
+    Todos expõem `query_similar_by_embedding(s)` com o mesmo formato de retorno.
+
+    Com RETRIEVAL_MODE=two_stage o backend é envolvido pelo TwoStageRetriever
+    (shortlist em TRUNCATE_DIM dimensões + rerank com os vetores completos).
+    Com RETRIEVAL_MODE=pca o backend é usado direto; quem consulta aplica a
+    projeção (src.services.projection) e busca na variante "pca".
+    """
+    backend = os.getenv("VECTOR_BACKEND", "chroma").strip().lower()
+    if backend == "local":
+        from src.services.local_index import LocalVectorIndex
+        store = LocalVectorIndex()
+    elif backend == "ivfpq":
+        from src.services.ivfpq_index import IVFPQIndex
+        store = IVFPQIndex()
+    elif backend == "chroma":
+        store = ChromaDB()
+    else:
+        raise ValueError(f"VECTOR_BACKEND inválido: '{backend}'.")
+
+    mode = os.getenv("RETRIEVAL_MODE", "single").strip().lower()
+    if mode == "two_stage":
+        return TwoStageRetriever(store)
+    if mode == "pca" and backend == "ivfpq":
+        raise ValueError("RETRIEVAL_MODE=pca requer VECTOR_BACKEND=chroma ou local.")
+    if mode not in ("single", "pca"):
+        raise ValueError(f"RETRIEVAL_MODE inválido: '{mode}'.")
+    return store